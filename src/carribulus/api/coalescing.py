@@ -0,0 +1,94 @@
+"""
+Single-Flight Request Coalescing
+
+When the same question lands several times within seconds (e.g. a shared
+campaign link), every request used to run its own crew and burn
+SerpAPI/Serper quota. Now the first request (the leader) starts ONE run;
+identical requests arriving while it is in flight join it and share the
+result (or the error).
+
+- Keyed on the normalized crew inputs (same key as the exact response cache)
+- Live events of the shared run are broadcast to every subscriber
+- Late joiners get a {"type": "coalesced"} event first (they missed the start)
+- The run is shielded: a disconnecting client doesn't cancel it for the others
+
+Per-process, like the response cache (identical requests hitting different
+API workers still run separately).
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+EventCallback = Callable[[dict], None]
+
+
+class _Flight:
+    __slots__ = ("task", "subscribers", "joined")
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: list = []
+        self.joined = 0
+
+    def publish(self, event: dict):
+        # May be called from a crew worker thread: iterate over a snapshot
+        for callback in tuple(self.subscribers):
+            try:
+                callback(dict(event))
+            except Exception as e:
+                print(f"Coalesced event delivery failed: {e}")
+
+
+class SingleFlight:
+    """Deduplicates concurrent runs with the same key"""
+
+    def __init__(self):
+        self._flights: dict = {}
+
+        # Metrics
+        self.leaders = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def run(self, key: str, start: Callable[[EventCallback], Awaitable],
+                  on_event: Optional[EventCallback] = None):
+        """
+        Await start(publish) for this key, or join the run already in flight.
+        `publish` fans live events out to the on_event of every subscriber.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            flight.joined += 1
+            if on_event is not None:
+                on_event({"type": "coalesced", "waiting_with": flight.joined})
+                flight.subscribers.append(on_event)
+            return await asyncio.shield(flight.task)
+
+        flight = _Flight()
+        if on_event is not None:
+            flight.subscribers.append(on_event)
+        flight.task = asyncio.ensure_future(start(flight.publish))
+        self._flights[key] = flight
+        self.leaders += 1
+        flight.task.add_done_callback(lambda task: self._finish(key, task))
+        return await asyncio.shield(flight.task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._flights.pop(key, None)
+        # Every waiter may have been cancelled (client gone): don't leave the error unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        runs = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "runs": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / runs, 3) if runs else 0.0,
+        }
+
+
+crew_flights = SingleFlight()
@@ -0,0 +1,214 @@
+"""
+Crew Execution Pool
+
+`kickoff()` is synchronous and a full trip-planning run takes 60-150s,
+so it must never run on the uvicorn event loop.
+
+- Runs crews on a bounded worker pool (thread or process)
+- Admission queue with a hard limit → QueueFullError (API returns 503 + Retry-After)
+- Tracks queue depth, wait time and run time so we can size workers
+
+Config (.env):
+    CREW_EXECUTOR=thread      # thread | process
+    CREW_MAX_WORKERS=4        # crews running at the same time
+    CREW_MAX_QUEUE=16         # requests allowed to wait for a free worker
+    CREW_RETRY_AFTER=30       # default Retry-After (seconds) before we have samples
+"""
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Callable, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+CREW_EXECUTOR = os.getenv("CREW_EXECUTOR", "thread").lower()
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "4"))
+CREW_MAX_QUEUE = int(os.getenv("CREW_MAX_QUEUE", "16"))
+CREW_RETRY_AFTER = int(os.getenv("CREW_RETRY_AFTER", "30"))
+
+# How many recent samples to keep for wait/run time stats
+_SAMPLE_WINDOW = 200
+
+
+class QueueFullError(Exception):
+    """Raised when the admission queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Crew queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def run_crew(inputs: dict, on_event: Optional[Callable[[dict], None]] = None, expert: Optional[str] = None) -> tuple:
+    """
+    Build a crew and run it. Executed inside a pool worker.
+    Module-level function so it can be pickled for the process pool.
+    Returns (result, run profile), see metrics.RunProfiler.
+
+    on_event (thread pool only) receives live agent/tool events, see crew_events.py
+    expert runs that expert's single-agent crew instead of the manager (see router.py)
+    """
+    from carribulus.crew import build_crew
+    from carribulus.metrics import RunProfiler
+
+    profiler = RunProfiler()
+    with profiler.stage("crew_build"):
+        crew = build_crew(expert)
+    result = _kickoff(crew, inputs, on_event, expert or "manager", profiler)
+    return result, profiler.profile()
+
+
+def run_planning_crew(inputs: dict, on_event: Optional[Callable[[dict], None]] = None) -> tuple:
+    """
+    Run the parallel planning fan-out crew (see crew.planning_crew).
+    Returns (result, fan-out timing, run profile), the timing carries the achieved speedup.
+    """
+    from carribulus.crew import build_crew, fan_out_timing, PLANNING
+    from carribulus.metrics import RunProfiler
+
+    profiler = RunProfiler()
+    with profiler.stage("crew_build"):
+        crew = build_crew(PLANNING)
+    result = _kickoff(crew, inputs, on_event, PLANNING, profiler)
+    return result, fan_out_timing(crew), profiler.profile()
+
+
+def _kickoff(crew, inputs: dict, on_event: Optional[Callable[[dict], None]], label: str, profiler):
+    from carribulus.llms.prompt_cache import track_run
+    from carribulus.crew_events import CrewEventStream
+    from carribulus.tracing import setup_tracing
+
+    # No-op after the first run (process pool workers don't share the API's setup)
+    setup_tracing()
+
+    # Logs the run's cached vs uncached input tokens when it ends.
+    # Events always feed the profiler (per-agent / per-tool time), on_event if given
+    with track_run(crew, label) as usage:
+        with profiler.stage("kickoff"), CrewEventStream(crew, profiler.observer(on_event)):
+            result = crew.kickoff(inputs=inputs)
+    profiler.tokens = usage.get("agents", {})
+    return result
+
+
+def _timed_call(fn, args: tuple) -> tuple:
+    """Run fn in the worker and report when it actually started (wall clock)"""
+    started_at = time.time()
+    result = fn(*args)
+    return started_at, time.time(), result
+
+
+def _percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class CrewExecutor:
+    """
+    Bounded pool for blocking crew runs.
+
+    Admission is counted on the event loop (single thread), so no locking
+    is needed: at most `max_workers + max_queue` runs are in flight.
+    """
+
+    def __init__(self, kind: str = CREW_EXECUTOR, max_workers: int = CREW_MAX_WORKERS, max_queue: int = CREW_MAX_QUEUE):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"CREW_EXECUTOR must be 'thread' or 'process', got '{kind}'")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool: Executor | None = None
+
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_times = deque(maxlen=_SAMPLE_WINDOW)
+        self._run_times = deque(maxlen=_SAMPLE_WINDOW)
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew")
+        print(f"Crew pool started: {self.kind} x{self.max_workers}, queue limit {self.max_queue}")
+
+    def shutdown(self):
+        if self._pool is not None:
+            # Don't block shutdown on a 2-minute crew run
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def supports_events(self) -> bool:
+        """Live event callbacks can't cross a process boundary"""
+        return self.kind == "thread"
+
+    @property
+    def is_full(self) -> bool:
+        return self._in_flight >= self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        """Runs admitted but still waiting for a free worker"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def retry_after(self) -> int:
+        """Rough estimate (seconds) until a queue slot frees up"""
+        if not self._run_times:
+            return CREW_RETRY_AFTER
+        avg_run = sum(self._run_times) / len(self._run_times)
+        waves = (self.queue_depth + 1) / self.max_workers
+        return max(1, math.ceil(avg_run * waves))
+
+    async def submit(self, fn, *args):
+        """
+        Run fn(*args) on the pool and await the result.
+        Raises QueueFullError if the admission queue is full.
+        """
+        if self._pool is None:
+            self.start()
+        if self.is_full:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        self._in_flight += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, finished_at, result = await loop.run_in_executor(self._pool, _timed_call, fn, args)
+            self._wait_times.append(max(0.0, started_at - submitted_at))
+            self._run_times.append(finished_at - started_at)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        waits = list(self._wait_times)
+        runs = list(self._run_times)
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_time_avg_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_time_p95_s": round(_percentile(waits, 95), 3),
+            "wait_time_max_s": round(max(waits), 3) if waits else 0.0,
+            "run_time_avg_s": round(sum(runs) / len(runs), 3) if runs else 0.0,
+            "run_time_p95_s": round(_percentile(runs, 95), 3),
+        }
+
+
+crew_executor = CrewExecutor()
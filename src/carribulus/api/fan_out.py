@@ -0,0 +1,49 @@
+"""
+Planning Fan-Out Stats
+
+The planning path (router.py, PLANNING_MODE=parallel) runs the transport,
+local and news research concurrently before the manager compiles the plan.
+Each run reports its timing (see crew.fan_out_timing):
+
+    speedup = research time added up / wall time of the research stage
+
+~1.0 means the experts effectively ran one after another, ~3.0 means the
+stage took as long as the slowest expert. Aggregated here for /stats.
+"""
+from collections import deque
+from typing import Optional
+
+# How many recent runs to keep
+_SAMPLE_WINDOW = 200
+
+
+class FanOutStats:
+    def __init__(self):
+        self.runs = 0
+        self._speedups = deque(maxlen=_SAMPLE_WINDOW)
+        self._saved_s = deque(maxlen=_SAMPLE_WINDOW)
+        self.last: Optional[dict] = None
+
+    def record(self, timing: Optional[dict]):
+        if not timing:
+            return
+        self.runs += 1
+        self._speedups.append(timing["speedup"])
+        self._saved_s.append(timing["research_sequential_s"] - timing["research_wall_s"])
+        self.last = timing
+        print(f"Planning fan-out: {timing['speedup']}x speedup "
+              f"({timing['research_sequential_s']}s of research in {timing['research_wall_s']}s)")
+
+    def stats(self) -> dict:
+        speedups = list(self._speedups)
+        saved = list(self._saved_s)
+        return {
+            "runs": self.runs,
+            "speedup_avg": round(sum(speedups) / len(speedups), 2) if speedups else 0.0,
+            "speedup_min": min(speedups) if speedups else 0.0,
+            "time_saved_avg_s": round(sum(saved) / len(saved), 2) if saved else 0.0,
+            "last": self.last,
+        }
+
+
+fan_out_stats = FanOutStats()
@@ -1,15 +1,47 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-from .models import ChatRequest, ChatResponse, ChatSession, Message
+from typing import Optional
+from .models import ChatRequest, ChatResponse, ChatSession, Message, Job, JobCreated
 from .db import db
-from .utils import generate_rolling_summary
-from ..crew import Carribulus
+from .session_cache import sessions
+from .utils import generate_rolling_summary, generate_direct_reply
+from .executor import crew_executor, run_crew, run_planning_crew, QueueFullError
+from .response_cache import response_cache, request_keys
+from .coalescing import crew_flights
+from .fan_out import fan_out_stats
+from carribulus.router import Route, route_request, router_stats
+from carribulus.llms.routing import llm_routing_stats
+from carribulus.llms.prompt_cache import prompt_cache_stats
+from carribulus.tools.http_pool import http_stats, close_http_clients
+from carribulus.tools.tool_cache import tool_cache
+from carribulus.tools.compaction import compaction_stats
+from carribulus.tools.image_loader import image_stats
+from carribulus.tools.vision_cache import vision_cache
+from carribulus.tools.hedged_vision import hedged_vision_stats
+from carribulus.tracing import setup_tracing, shutdown_tracing, tracing_stats
+from carribulus.metrics import (
+    METRICS_ENABLED, SERVER_TIMING, CONTENT_TYPE, registry, render_metrics,
+    stage, stage_seconds, start_request_timing, current_timings, record_run, requests_total,
+)
+import asyncio
 import datetime
+import json
+import time
+import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_tracing()
     await db.connect()
+    await sessions.start()
+    crew_executor.start()
     yield
+    crew_executor.shutdown()
+    shutdown_tracing()  # Flush queued traces
+    close_http_clients()
+    tool_cache.close()
+    await sessions.stop()  # Final flush before disconnecting
     await db.close()
 
 app = FastAPI(lifespan=lifespan)
@@ -18,76 +50,500 @@ app = FastAPI(lifespan=lifespan)
 async def root():
     return {"message": "API is running. Go to /docs to test the chat endpoint via Swagger UI."}
 
+@app.get("/health")
+async def health():
+    # Stays responsive while crews run, because kickoff happens on the worker pool
+    return {"status": "ok"}
+
+@app.get("/stats")
+async def stats():
+    """Runtime stats for sizing workers (queue depth, wait time, etc.)"""
+    return {
+        "crew_pool": crew_executor.stats(),
+        "session_cache": sessions.stats(),
+        "response_cache": response_cache.stats(),
+        "router": router_stats(),
+        "llm_routing": llm_routing_stats(),
+        "prompt_cache": prompt_cache_stats(),
+        "coalescing": crew_flights.stats(),
+        "planning_fan_out": fan_out_stats.stats(),
+        "http_pool": http_stats(),
+        "tool_cache": tool_cache.stats(),
+        "tool_compaction": compaction_stats(),
+        "vision_images": image_stats(),
+        "vision_cache": vision_cache.stats(),
+        "vision_providers": hedged_vision_stats(),
+        "tracing": tracing_stats(),
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint (stage / agent / tool latency, tokens, caches, queue)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+# Existing stats read at scrape time
+def _cache_hits() -> list:
+    response, session, vision = response_cache.stats(), sessions.stats(), vision_cache.stats()
+    tools = tool_cache.stats()["tools"].values()
+    return [
+        ({"cache": "response", "tier": "exact"}, response["exact_hits"]),
+        ({"cache": "response", "tier": "semantic"}, response["semantic_hits"]),
+        ({"cache": "session", "tier": "memory"}, session["hits"]),
+        ({"cache": "tool", "tier": "memory"}, sum(t["memory_hits"] for t in tools)),
+        ({"cache": "tool", "tier": "disk"}, sum(t["disk_hits"] for t in tools)),
+        ({"cache": "vision", "tier": "source"}, vision["source_hits"]),
+        ({"cache": "vision", "tier": "exact"}, vision["exact_hits"]),
+        ({"cache": "vision", "tier": "near"}, vision["near_hits"]),
+    ]
+
+def _cache_misses() -> list:
+    return [
+        ({"cache": "response"}, response_cache.stats()["misses"]),
+        ({"cache": "session"}, sessions.stats()["misses"]),
+        ({"cache": "tool"}, sum(t["misses"] for t in tool_cache.stats()["tools"].values())),
+        ({"cache": "vision"}, vision_cache.stats()["misses"]),
+    ]
+
+registry.collected("carribulus_cache_hits_total", "Cache hits by cache and tier", "counter", _cache_hits)
+registry.collected("carribulus_cache_misses_total", "Cache misses by cache", "counter", _cache_misses)
+registry.collected("carribulus_crew_queue_depth", "Crew runs waiting for a free worker", "gauge",
+                   lambda: [({}, crew_executor.queue_depth)])
+registry.collected("carribulus_crew_in_flight", "Crew runs admitted (running + queued)", "gauge",
+                   lambda: [({}, crew_executor.stats()["in_flight"])])
+registry.collected("carribulus_crew_runs_total", "Crew runs by outcome", "counter",
+                   lambda: [({"outcome": o}, crew_executor.stats()[o]) for o in ("completed", "failed", "rejected")])
+def _traces() -> list:
+    t = tracing_stats()
+    if not t["enabled"]:
+        return []
+    return [({"outcome": f"kept_{reason}"}, count) for reason, count in t["kept"].items()] + [
+        ({"outcome": o}, t[o]) for o in ("sampled_out", "dropped", "exported", "failed")
+    ]
+
+registry.collected("carribulus_traces_total", "MLflow traces by export outcome", "counter", _traces)
+registry.collected("carribulus_coalesced_requests_total", "Requests that joined a crew run in flight", "counter",
+                   lambda: [({}, crew_flights.stats()["coalesced"])])
+
 MAX_RECENT_MESSAGES = 6
+# Keep only the last 2 messages (User + AI pair) out of the summary
+KEEP_COUNT = 2
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    # 1. Retrieve or Create Session
-    if request.session_id:
-        session_data = await db.get_session(request.session_id)
+# Keep references, otherwise asyncio may garbage-collect running tasks
+_background_tasks: set = set()
+
+def spawn_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # MongoDB returns naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
+
+
+# Shared session path (used by /chat, /chat/stream and /jobs)
+# =============================================================================
+
+async def load_session(session_id: Optional[str]) -> ChatSession:
+    """Retrieve or create session"""
+    if session_id:
+        with stage("session_load"):
+            session_data = await sessions.get_session(session_id)
         if not session_data:
             # If ID provided but not found, create new
-            session = ChatSession(session_id=request.session_id)
-        else:
-            session = ChatSession(**session_data)
-    else:
-        session = ChatSession()
+            return ChatSession(session_id=session_id)
+        session = ChatSession(**session_data)
+        # Drop messages the background summary already covers
+        if session.summarized_through:
+            cutoff = _as_utc(session.summarized_through)
+            session.recent_messages = [
+                m for m in session.recent_messages if _as_utc(m.timestamp) > cutoff
+            ]
+        return session
+    return ChatSession()
 
-    # 2. Add User Message
-    user_msg = Message(role="user", content=request.message)
+def build_crew_inputs(session: ChatSession, message: str) -> dict:
+    """Add the user message to the session and build the crew inputs"""
+    # Add User Message
+    user_msg = Message(role="user", content=message)
     session.recent_messages.append(user_msg)
 
-    # 3. Construct Context for Agent
+    # Construct Context for Agent
     # Combine Summary + Recent Messages
     recent_history_text = "\n".join([f"{m.role}: {m.content}" for m in session.recent_messages])
     full_context = f"Summary of past conversation:\n{session.summary}\n\nRecent conversation:\n{recent_history_text}"
 
-    # 4. Initialize and run CrewAI Agent
     # The inputs expected by the crew tasks need to be aligned.
     # We'll pass 'topic' (the user message) and 'chat_history' (the context)
-    crew_instance = Carribulus()
-    inputs = {
-        "topic": request.message,
+    return {
+        "topic": message,
         "chat_history": full_context,
         "current_date": datetime.datetime.now().strftime("%Y-%m-%d")
     }
-    
+
+def cache_context(session: ChatSession) -> str:
+    """Conversation BEFORE the current message (part of the response cache key)"""
+    previous = "\n".join(f"{m.role}: {m.content}" for m in session.recent_messages[:-1])
+    return f"{session.summary}\n{previous}"
+
+def previous_reply(session: ChatSession) -> str:
+    """Last assistant turn before the current message (routing: was it a question?)"""
+    for m in reversed(session.recent_messages[:-1]):
+        if m.role == "assistant":
+            return m.content
+    return ""
+
+async def cached_response(session: ChatSession, inputs: dict) -> Optional[tuple]:
+    """(response_text, tier) if this question was already answered, else None"""
     try:
-        # kickoff() returns a CrewOutput object, we want the raw string usually
-        result = crew_instance.crew().kickoff(inputs=inputs)
-        response_text = str(result)
+        return await response_cache.get(inputs["topic"], inputs["current_date"], cache_context(session))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+        print(f"Response cache lookup failed: {e}")
+        return None
 
-    # 5. Add Assistant Message
+async def cache_response(session: ChatSession, inputs: dict, response_text: str):
+    try:
+        await response_cache.put(inputs["topic"], inputs["current_date"], cache_context(session), response_text)
+    except Exception as e:
+        print(f"Response cache store failed: {e}")
+
+async def answer_fast_path(session: ChatSession, inputs: dict, route: Route) -> Optional[ChatResponse]:
+    """Answer without queueing a crew run (direct reply or response cache hit), else None"""
+    if route.path == "direct":
+        with stage("direct_reply"):
+            response_text = await generate_direct_reply(inputs["topic"], inputs["chat_history"])
+        return await finalize_session(session, response_text, route)
+
+    with stage("response_cache"):
+        hit = await cached_response(session, inputs)
+    if hit:
+        return await finalize_session(session, hit[0], route, cached=hit[1])
+    return None
+
+def crew_run_key(session: ChatSession, inputs: dict, route: Route) -> str:
+    """Identical requests (same question, date and context) share one crew run"""
+    key, _ = request_keys(inputs["topic"], inputs["current_date"], cache_context(session))
+    return f"{route.expert or route.path}:{key}"
+
+def must_wait_for_worker(session: ChatSession, inputs: dict, route: Route) -> bool:
+    """True if this request needs a new crew run (joining one in flight takes no slot)"""
+    return not crew_flights.in_flight(crew_run_key(session, inputs, route))
+
+async def execute_crew(session: ChatSession, inputs: dict, route: Route, on_event=None) -> tuple:
+    """
+    Run the crew on the worker pool and cache the answer. Concurrent identical
+    requests join the run already in flight instead (see coalescing.py).
+    Returns (response_text, fan_out timing or None).
+    The crew-side stages (queue, build, kickoff, agents, tools) go to the
+    metrics and to the current request's Server-Timing.
+    """
+    async def start(publish) -> tuple:
+        callback = publish if crew_executor.supports_events else None
+        fan_out = None
+        submitted_at = time.time()
+        if route.path == "planning":
+            result, fan_out, profile = await crew_executor.submit(run_planning_crew, inputs, callback)
+            fan_out_stats.record(fan_out)
+            if fan_out:
+                publish({"type": "fan_out", **fan_out})
+        else:
+            result, profile = await crew_executor.submit(run_crew, inputs, callback, route.expert)
+        profile["queue"] = max(0.0, profile["started_at"] - submitted_at)
+        record_run(profile)
+        response_text = str(result)
+        await cache_response(session, inputs, response_text)
+        return response_text, fan_out, profile
+
+    response_text, fan_out, profile = await crew_flights.run(crew_run_key(session, inputs, route), start, on_event)
+    timings = current_timings()
+    if timings is not None:
+        timings.add_run(profile)
+    return response_text, fan_out
+
+async def finalize_session(session: ChatSession, response_text: str, route: Route,
+                           cached: Optional[str] = None, fan_out: Optional[dict] = None) -> ChatResponse:
+    """Add the assistant reply, roll the summary if needed and save the session"""
+    # Add Assistant Message
     assistant_msg = Message(role="assistant", content=response_text)
     session.recent_messages.append(assistant_msg)
 
-    # 6. Update Rolling Summary if needed
-    if len(session.recent_messages) > MAX_RECENT_MESSAGES:
-        # Keep only the last 2 messages (User + AI pair) to maintain immediate context
-        # Summarize everything else to save tokens while keep context working
-        KEEP_COUNT = 2
-        
-        messages_to_summarize = session.recent_messages[:-KEEP_COUNT]
-        messages_to_keep = session.recent_messages[-KEEP_COUNT:]
-        
-        new_summary = generate_rolling_summary(session.summary, messages_to_summarize)
-        
-        session.summary = new_summary
-        session.recent_messages = messages_to_keep
-
     session.updated_at = datetime.datetime.now(datetime.timezone.utc)
 
-    # 7. Save Session
-    await db.save_session(session.model_dump())
+    # Save Session
+    with stage("session_save"):
+        await sessions.save_session(session.model_dump())
+
+    # Update Rolling Summary in the background if needed
+    # (the response doesn't wait for it, the next turn picks it up)
+    if len(session.recent_messages) > MAX_RECENT_MESSAGES:
+        schedule_summary(session)
 
     return ChatResponse(
         session_id=session.session_id,
         response=response_text,
-        history_summary=session.summary
+        history_summary=session.summary,
+        cached=cached,
+        route=route.path,
+        expert=route.expert,
+        fan_out=fan_out
+    )
+
+
+# Background Rolling Summary
+# =============================================================================
+
+# Sessions with a summary already being generated (no duplicate LLM calls)
+_summaries_in_flight: set = set()
+
+def schedule_summary(session: ChatSession):
+    """Summarize everything but the last KEEP_COUNT messages, off the request path"""
+    if session.session_id in _summaries_in_flight:
+        return
+    _summaries_in_flight.add(session.session_id)
+
+    messages_to_summarize = list(session.recent_messages[:-KEEP_COUNT])
+    spawn_background(refresh_summary(
+        session.session_id,
+        session.summary_version,
+        session.summary,
+        messages_to_summarize
+    ))
+
+async def refresh_summary(session_id: str, base_version: int, current_summary: str, messages: list):
+    # Off the request path: histogram only, not part of any Server-Timing
+    start = time.perf_counter()
+    try:
+        new_summary = await generate_rolling_summary(current_summary, messages)
+        if new_summary == current_summary:
+            return  # LLM failed, keep messages raw and retry next turn
+        applied = await sessions.apply_summary(session_id, base_version, new_summary, messages[-1].timestamp)
+        if not applied:
+            print(f"Summary for session {session_id} is outdated (version changed), discarded.")
+    except Exception as e:
+        print(f"Background summary failed for session {session_id}: {e}")
+    finally:
+        _summaries_in_flight.discard(session_id)
+        stage_seconds.observe(time.perf_counter() - start, stage="summary")
+
+def _busy_error(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy planning other trips. Please retry shortly.",
+        headers={"Retry-After": str(retry_after)}
     )
 
+
+# Endpoints
+# =============================================================================
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest, response: Response):
+    timings = start_request_timing()
+    session = await load_session(request.session_id)
+    inputs = build_crew_inputs(session, request.message)
+    with stage("route"):
+        route = route_request(request.message, previous_reply(session))
+    requests_total.inc(endpoint="chat", route=route.path)
+
+    fast = await answer_fast_path(session, inputs, route)
+    if fast:
+        if SERVER_TIMING:
+            response.headers["Server-Timing"] = timings.header()
+        return fast
+
+    # Run CrewAI Agent on the worker pool (never on the event loop)
+    try:
+        # kickoff() returns a CrewOutput object, we want the raw string usually
+        response_text, fan_out = await execute_crew(session, inputs, route)
+    except QueueFullError as e:
+        raise _busy_error(e.retry_after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+
+    result = await finalize_session(session, response_text, route, fan_out=fan_out)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timings.header()
+    return result
+
+
+def _sse(payload: dict) -> str:
+    """Format one Server-Sent Event"""
+    data = json.dumps(payload, ensure_ascii=False, default=str)
+    return f"event: {payload.get('type', 'message')}\ndata: {data}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Same as /chat, but streams progress as Server-Sent Events:
+        session → delegation / agent_* / tool_* / token ... → done (or error)
+    The final `done` event carries the same fields as ChatResponse.
+    Direct replies and response cache hits go straight from `session` to `done`.
+    """
+    session = await load_session(request.session_id)
+    inputs = build_crew_inputs(session, request.message)
+    with stage("route"):
+        route = route_request(request.message, previous_reply(session))
+    requests_total.inc(endpoint="chat_stream", route=route.path)
+
+    fast = await answer_fast_path(session, inputs, route)
+    if fast is None and crew_executor.is_full and must_wait_for_worker(session, inputs, route):
+        raise _busy_error(crew_executor.retry_after())
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: dict):
+        # Called from the crew worker thread
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def event_source():
+        yield _sse({
+            "type": "session",
+            "session_id": session.session_id,
+            "queue_depth": crew_executor.queue_depth,
+            "route": route.path,
+            "expert": route.expert,
+        })
+
+        if fast:
+            yield _sse({"type": "done", **fast.model_dump()})
+            return
+
+        run = asyncio.create_task(execute_crew(session, inputs, route, on_event))
+
+        # Forward events until the crew finishes
+        while True:
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                yield _sse(next_event.result())
+                continue
+            next_event.cancel()
+            break
+
+        while not events.empty():
+            yield _sse(events.get_nowait())
+
+        try:
+            response_text, fan_out = run.result()
+        except QueueFullError as e:
+            yield _sse({"type": "error", "status": 503, "retry_after": e.retry_after,
+                        "detail": "Server is busy planning other trips. Please retry shortly."})
+            return
+        except Exception as e:
+            yield _sse({"type": "error", "status": 500, "detail": f"Agent execution failed: {str(e)}"})
+            return
+
+        response = await finalize_session(session, response_text, route, fan_out=fan_out)
+        yield _sse({"type": "done", **response.model_dump()})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Async Jobs (for runs that outlive proxy/client timeouts)
+# =============================================================================
+# POST /jobs returns a job id immediately; GET /jobs/{id} reports status,
+# progress, finished expert outputs and the final ChatResponse.
+# Jobs are persisted, so any worker (or a restarted one) can report them.
+
+# A queued/running job not updated for this long is reported as failed
+# (its worker most likely died or restarted mid-run)
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+
+async def run_job(job: Job, session: ChatSession, inputs: dict, route: Route):
+    """Run the crew for a job and persist progress as it happens"""
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_event(event: dict):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def record_events():
+        while True:
+            event = await events.get()
+            if event is None:
+                return
+            kind = event.get("type")
+            if kind == "token":
+                continue  # too chatty to persist
+            fields = {"updated_at": _utcnow()}
+            push = {}
+            if kind in ("run_started", "coalesced"):
+                fields["status"] = "running"
+            elif kind == "agent_finished" and event.get("output"):
+                push["partial_outputs"] = [{"agent": event.get("agent"), "output": event.pop("output")}]
+            push["progress"] = [event]
+            try:
+                await db.update_job(job.job_id, fields, push=push)
+            except Exception as e:
+                print(f"Failed to record job progress: {e}")
+
+    recorder = asyncio.create_task(record_events())
+    try:
+        response_text, fan_out = await execute_crew(session, inputs, route, on_event)
+        response = await finalize_session(session, response_text, route, fan_out=fan_out)
+        fields = {"status": "completed", "result": response.model_dump()}
+    except QueueFullError as e:
+        fields = {"status": "failed", "error": f"Server busy, retry after {e.retry_after}s"}
+    except Exception as e:
+        fields = {"status": "failed", "error": f"Agent execution failed: {str(e)}"}
+    finally:
+        # Let the recorder flush what the crew already emitted, then stop it
+        events.put_nowait(None)
+        await recorder
+
+    fields["updated_at"] = _utcnow()
+    await db.update_job(job.job_id, fields)
+
+@app.post("/jobs", response_model=JobCreated, status_code=202)
+async def create_job(request: ChatRequest):
+    session = await load_session(request.session_id)
+    inputs = build_crew_inputs(session, request.message)
+    with stage("route"):
+        route = route_request(request.message, previous_reply(session))
+    requests_total.inc(endpoint="jobs", route=route.path)
+
+    # Answered without a crew run: the job is born completed
+    fast = await answer_fast_path(session, inputs, route)
+    if fast:
+        job = Job(session_id=session.session_id, message=request.message, status="completed", result=fast)
+        await db.save_job(job.model_dump())
+        return JobCreated(job_id=job.job_id, session_id=job.session_id, status=job.status)
+
+    if crew_executor.is_full and must_wait_for_worker(session, inputs, route):
+        raise _busy_error(crew_executor.retry_after())
+
+    job = Job(session_id=session.session_id, message=request.message)
+    await db.save_job(job.model_dump())
+    spawn_background(run_job(job, session, inputs, route))
+
+    return JobCreated(job_id=job.job_id, session_id=job.session_id, status=job.status)
+
+@app.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job_data = await db.get_job(job_id)
+    if not job_data:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = Job(**job_data)
+
+    if job.status in ("queued", "running"):
+        idle = (_utcnow() - _as_utc(job.updated_at)).total_seconds()
+        if idle > JOB_STALE_SECONDS:
+            job.status = "failed"
+            job.error = "Job was interrupted (worker restarted or crashed). Please resubmit."
+            await db.update_job(job_id, {"status": job.status, "error": job.error, "updated_at": _utcnow()})
+    return job
+
 if __name__ == "__main__":
     import uvicorn
     # RUN using uvicorn src.carribulus.api.main:app --reload
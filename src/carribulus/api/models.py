@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime, timezone
 import uuid
 
@@ -11,6 +11,8 @@ class Message(BaseModel):
 class ChatSession(BaseModel):
     session_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     summary: str = ""  # The "Rolling Summary" of the conversation so far
+    summary_version: int = 0  # Bumped on every summary update (optimistic concurrency)
+    summarized_through: Optional[datetime] = None  # Messages up to this time are in the summary
     recent_messages: List[Message] = []  # The last N messages (raw)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -23,3 +25,25 @@ class ChatResponse(BaseModel):
     session_id: str
     response: str
     history_summary: str  # return summary for debugging
+    cached: Optional[str] = None  # "exact" / "semantic" if served from the response cache
+    route: Optional[str] = None  # "direct" / "expert" / "planning" / "manager" (see router.py)
+    expert: Optional[str] = None  # Agent that answered on the "expert" path
+    fan_out: Optional[dict] = None  # "planning" path: expert research timings and achieved speedup
+
+class Job(BaseModel):
+    """Background crew run (POST /jobs), persisted next to sessions"""
+    job_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    session_id: str
+    message: str
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    progress: List[dict] = []  # Recent agent/tool events (see crew_events.py)
+    partial_outputs: List[dict] = []  # Finished expert outputs: {"agent": ..., "output": ...}
+    result: Optional[ChatResponse] = None  # Set when completed
+    error: Optional[str] = None  # Set when failed
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class JobCreated(BaseModel):
+    job_id: str
+    session_id: str
+    status: str
@@ -0,0 +1,310 @@
+"""
+Two-Tier Response Cache (in front of the crew kickoff)
+
+Many users ask (almost) the same thing: "best food in Penang", "is it safe
+to visit Bangkok". A hit skips the whole hierarchical crew.
+
+Tier 1 - exact:    normalized topic + current_date bucket + context hash
+Tier 2 - semantic: local embedding of the topic, cosine top-k within the
+                   same date bucket + context + request entities, accepted
+                   above a threshold
+
+Embeddings barely move when only a date, a price or a place changes
+("flights KUL to NRT on 2026-12-05" vs "... 2026-12-06" scores ~0.95), so
+the entities of the topic (numbers / dates, IATA codes, month and day names,
+place names) are part of the semantic scope: they must match EXACTLY, the
+embedding only decides between different phrasings of the same request.
+
+The context hash covers the conversation BEFORE the current message
+(rolling summary + recent messages), so follow-ups like "book the second
+one" never get another conversation's answer.
+
+TTL depends on the intent (news goes stale fast, food spots don't; trip
+plans quote flight and hotel prices, so they expire like transport answers).
+Entries are evicted LRU once RESPONSE_CACHE_SIZE is reached.
+
+Config (.env):
+    RESPONSE_CACHE_SIZE=512            # 0 = disabled
+    RESPONSE_CACHE_SIMILARITY=0.92     # semantic tier threshold (cosine)
+    RESPONSE_CACHE_TOP_K=3
+    RESPONSE_CACHE_EMBEDDER=onnx       # onnx (MiniLM via chromadb) | hash (char n-grams)
+"""
+import os
+import re
+import time
+import zlib
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from carribulus.intent import classify_intent, normalize_text
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+RESPONSE_CACHE_TOP_K = int(os.getenv("RESPONSE_CACHE_TOP_K", "3"))
+RESPONSE_CACHE_EMBEDDER = os.getenv("RESPONSE_CACHE_EMBEDDER", "onnx").lower()
+
+# Seconds an answer stays valid, per intent (0 = never cached)
+INTENT_TTLS = {
+    "greeting": 24 * 3600,
+    "local": 24 * 3600,       # attractions / food barely change
+    "general": 6 * 3600,
+    "planning": 30 * 60,      # plans quote flight / hotel prices, same as transport
+    "transport": 30 * 60,     # prices move
+    "news": 60 * 60,          # events / safety go stale fast
+    "vision": 0,              # depends on the image, see vision cache instead
+}
+
+# Politeness fillers that don't change the answer
+_FILLERS = {"please", "pls", "plz", "can", "could", "you", "tell", "me", "show", "give", "kindly", "hi", "hello"}
+
+
+def normalize_topic(topic: str) -> str:
+    words = [w for w in normalize_text(topic).split() if w not in _FILLERS]
+    return " ".join(words)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+# Date words that change the answer as much as a date does
+_DATE_WORDS = {
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug",
+    "sep", "sept", "oct", "nov", "dec", "monday", "tuesday", "wednesday", "thursday",
+    "friday", "saturday", "sunday", "today", "tonight", "tomorrow", "yesterday",
+    "weekend", "next", "last",
+}
+# A place usually follows one of these ("food in penang", "from kl to bangkok")
+_PLACE_PREPOSITIONS = {"in", "to", "from", "near", "at", "around", "via", "between"}
+_NOT_PLACES = {"the", "a", "an", "my", "our", "your", "this", "that", "go", "get", "do", "eat",
+               "visit", "see", "stay", "travel", "fly", "book", "find", "and", "or"}
+_SENTENCE_START = re.compile(r"(?:^|[.!?]\s+)([A-Z][\w'-]*)")
+
+
+def topic_entities(topic: str) -> str:
+    """
+    Tokens of the topic that must match exactly for a semantic hit:
+    numbers and dates, IATA codes, month/day words and place names
+    (capitalized words, words after in/to/from/near/...)
+    """
+    raw = topic or ""
+    entities = set(re.findall(r"\d+(?:[.,:/-]\d+)*", raw))
+    entities.update(code.lower() for code in re.findall(r"\b[A-Z]{3}\b", raw))
+
+    words = normalize_text(raw).split()
+    entities.update(w for w in words if w in _DATE_WORDS)
+    for previous, word in zip(words, words[1:]):
+        if previous in _PLACE_PREPOSITIONS and word not in _NOT_PLACES and word not in _FILLERS:
+            entities.add(word)
+
+    # Capitalized words, except the one starting a sentence ("Cheapest flights ...")
+    sentence_starts = {m.start(1) for m in _SENTENCE_START.finditer(raw)}
+    for match in re.finditer(r"\b[A-Z][\w'-]*", raw):
+        if match.start() not in sentence_starts and match.group() != "I":
+            entities.add(match.group().lower())
+    return "|".join(sorted(entities))
+
+
+def request_keys(topic: str, current_date: str, context: str) -> tuple:
+    """(exact key, semantic scope) of a request, also used for run coalescing"""
+    scope = _digest(current_date, context, topic_entities(topic))
+    return _digest(scope, normalize_topic(topic)), scope
+
+
+# Embedders (local, no API calls)
+# =============================================================================
+
+class HashEmbedder:
+    """Character 3-gram hashing vectors: zero setup, good for near-identical phrasing"""
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f"  {text}  "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class OnnxEmbedder:
+    """all-MiniLM-L6-v2 on ONNX runtime (ships with chromadb, a crewai dependency)"""
+
+    def __init__(self):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+        self._model = ONNXMiniLM_L6_V2()
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.asarray(self._model([text])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def create_embedder(kind: str):
+    if kind == "onnx":
+        try:
+            return OnnxEmbedder()
+        except Exception as e:
+            print(f"Response cache: ONNX embedder unavailable ({e}), using hash embedder.")
+    return HashEmbedder()
+
+
+# Cache
+# =============================================================================
+
+class _Entry:
+    __slots__ = ("key", "scope", "response", "vector", "expires_at", "intent")
+
+    def __init__(self, key, scope, response, vector, expires_at, intent):
+        self.key = key
+        self.scope = scope
+        self.response = response
+        self.vector = vector
+        self.expires_at = expires_at
+        self.intent = intent
+
+
+class ResponseCache:
+    """Exact + semantic LRU cache of final crew answers"""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, threshold: float = RESPONSE_CACHE_SIMILARITY,
+                 top_k: int = RESPONSE_CACHE_TOP_K, embedder: str = RESPONSE_CACHE_EMBEDDER):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.top_k = max(1, top_k)
+        self._embedder_kind = embedder
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._scopes: dict = {}  # scope -> {key: entry} (semantic candidates)
+
+        # Metrics
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+        self._hit_latency_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _embed(self, text: str) -> np.ndarray:
+        # Lazy: the ONNX model loads on first use (runs in a worker thread)
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    self._embedder = create_embedder(self._embedder_kind)
+        return self._embedder(text)
+
+    async def get(self, topic: str, current_date: str, context: str) -> Optional[tuple]:
+        """Returns (response, tier) on a hit, tier is "exact" or "semantic"; None on a miss"""
+        if not self.enabled:
+            return None
+        intent = classify_intent(topic)
+        if not INTENT_TTLS.get(intent, 0):
+            return None
+
+        start = time.perf_counter()
+        key, scope = request_keys(topic, current_date, context)
+
+        # Tier 1: exact
+        entry = self._live(key)
+        if entry is not None:
+            self.exact_hits += 1
+            self._hit_latency_total += time.perf_counter() - start
+            return entry.response, "exact"
+
+        # Tier 2: semantic (same date bucket + conversation context + entities only)
+        candidates = list(self._scopes.get(scope, {}).values())
+        if candidates:
+            query = await asyncio.to_thread(self._embed, normalize_topic(topic))
+            matrix = np.stack([c.vector for c in candidates])
+            similarities = matrix @ query
+            for index in np.argsort(-similarities)[:self.top_k]:
+                if similarities[index] < self.threshold:
+                    break
+                entry = self._live(candidates[index].key)
+                if entry is not None and entry.intent == intent:
+                    self.semantic_hits += 1
+                    self._hit_latency_total += time.perf_counter() - start
+                    return entry.response, "semantic"
+
+        self.misses += 1
+        return None
+
+    async def put(self, topic: str, current_date: str, context: str, response: str):
+        if not self.enabled or not response:
+            return
+        intent = classify_intent(topic)
+        ttl = INTENT_TTLS.get(intent, 0)
+        if not ttl:
+            return
+
+        key, scope = request_keys(topic, current_date, context)
+        vector = await asyncio.to_thread(self._embed, normalize_topic(topic))
+
+        self._remove(key)
+        entry = _Entry(key, scope, response, vector, time.time() + ttl, intent)
+        self._entries[key] = entry
+        self._scopes.setdefault(scope, {})[key] = entry
+        self.stores += 1
+
+        while len(self._entries) > self.max_size:
+            old_key, _ = next(iter(self._entries.items()))
+            self._remove(old_key)
+            self.evictions += 1
+
+    def _live(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.time():
+            self._remove(key)
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        scope = self._scopes.get(entry.scope)
+        if scope is not None:
+            scope.pop(key, None)
+            if not scope:
+                del self._scopes[entry.scope]
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "embedder": type(self._embedder).__name__ if self._embedder else self._embedder_kind,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "hit_latency_avg_ms": round(self._hit_latency_total / hits * 1000, 3) if hits else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+response_cache = ResponseCache()
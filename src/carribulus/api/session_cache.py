@@ -0,0 +1,317 @@
+"""
+Write-Behind Session Cache
+
+In-process LRU of hot sessions in front of the database:
+- get_session(): served from memory while fresh (TTL), else one find_one
+- save_session(): only updates memory and marks the session dirty
+- A background flusher batches dirty sessions into ONE bulk write, with
+  incremental updates ($push new messages, $set only changed fields)
+
+Trade-off: up to SESSION_FLUSH_INTERVAL seconds of writes are lost if the
+process crashes, and the cache is per process. With several API workers
+behind a load balancer, either pin sessions to a worker or set
+SESSION_CACHE_SIZE=0 (pass-through, every call goes to the database).
+
+Config (.env):
+    SESSION_CACHE_SIZE=1000       # max cached sessions (0 = disabled)
+    SESSION_CACHE_TTL=300         # seconds before a clean entry is re-read
+    SESSION_FLUSH_INTERVAL=0.5    # seconds between background flushes
+"""
+import os
+import copy
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from .db import db, SUMMARY_FIELDS
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "300"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+
+
+class _Entry:
+    __slots__ = ("data", "persisted", "loaded_at", "revision", "flushed_revision")
+
+    def __init__(self, data: dict, persisted: Optional[dict]):
+        self.data = data
+        self.persisted = persisted  # Last known database state (None = maybe not in DB yet)
+        self.loaded_at = time.monotonic()
+        self.revision = 0
+        self.flushed_revision = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self.revision != self.flushed_revision
+
+
+def _diff_messages(old: list, new: list) -> Optional[dict]:
+    """
+    Express old → new as "$push the tail, keep the last len(new)".
+    Covers the normal turn (append) and summary trimming (drop from front).
+    """
+    if old == new:
+        return None
+    # Largest overlap: old[k:] is a prefix of new
+    for k in range(len(old) + 1):
+        overlap = len(old) - k
+        if new[:overlap] == old[k:]:
+            return {"push_messages": new[overlap:], "keep_last": len(new)}
+    return None  # unreachable, k == len(old) always matches
+
+
+def build_update(session_id: str, persisted: Optional[dict], data: dict) -> Optional[dict]:
+    """
+    Incremental update from the last persisted snapshot to the current data.
+
+    Returns a store-agnostic update spec (see Database.bulk_update_sessions):
+        {"session_id", "set", "push_messages", "keep_last"}
+    """
+    if persisted is None:
+        # Database state unknown (new session or failed flush): full, idempotent upsert.
+        # The cached entry owns the summary fields too (see apply_summary)
+        return {"session_id": session_id, "set": dict(data)}
+
+    update = {"session_id": session_id, "set": {}}
+    for key, value in data.items():
+        if key == "recent_messages":
+            continue
+        if persisted.get(key) != value:
+            update["set"][key] = value
+
+    messages = _diff_messages(persisted.get("recent_messages", []), data.get("recent_messages", []))
+    if messages:
+        update.update(messages)
+
+    if not update["set"] and "push_messages" not in update:
+        return None
+    return update
+
+
+class SessionCache:
+    """LRU + TTL session cache with batched, incremental write-behind"""
+
+    def __init__(self, store, max_size: int = SESSION_CACHE_SIZE, ttl: float = SESSION_CACHE_TTL,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._evicted: dict = {}  # Dirty entries pushed out of the LRU, waiting for flush
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.flushed_updates = 0
+        self.flush_errors = 0
+        self.flush_bytes = 0
+        self._flush_latency_total = 0.0
+        self.flush_latency_last = 0.0
+        self.flush_latency_max = 0.0
+        self.loads = 0
+        self._load_latency_total = 0.0
+        self.load_latency_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    # Lifecycle
+    # =========================================================================
+
+    async def start(self):
+        if self.enabled and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Session flush failed: {e}")
+
+    # Session API (same signatures as Database)
+    # =========================================================================
+
+    async def get_session(self, session_id: str):
+        if not self.enabled:
+            return await self._load(session_id)
+
+        entry = self._lookup(session_id)
+        if entry is not None:
+            self.hits += 1
+            return copy.deepcopy(entry.data)
+
+        self.misses += 1
+        data = await self._load(session_id)
+        if data is None:
+            return None
+        data.pop("_id", None)
+        self._insert(session_id, _Entry(data, copy.deepcopy(data)))
+        return copy.deepcopy(data)
+
+    async def _load(self, session_id: str):
+        """Read from the store, timing it (compare backends via /stats)"""
+        start = time.perf_counter()
+        data = await self.store.get_session(session_id)
+        latency = time.perf_counter() - start
+        self.loads += 1
+        self._load_latency_total += latency
+        self.load_latency_max = max(self.load_latency_max, latency)
+        return data
+
+    async def save_session(self, session_data: dict):
+        if not self.enabled:
+            return await self.store.save_session(session_data)
+
+        session_id = session_data["session_id"]
+        new_data = copy.deepcopy(session_data)
+        entry = self._lookup(session_id, for_write=True)
+        if entry is None:
+            entry = _Entry(new_data, None)
+            self._insert(session_id, entry)
+        else:
+            # Summary fields belong to apply_summary(), keep the cached ones
+            for key in SUMMARY_FIELDS:
+                if key in entry.data:
+                    new_data[key] = entry.data[key]
+            entry.data = new_data
+        entry.revision += 1
+
+    async def apply_summary(self, session_id: str, expected_version: int, summary: str, summarized_through) -> bool:
+        entry = self._lookup(session_id, for_write=True) if self.enabled else None
+        if entry is None:
+            return await self.store.apply_summary(session_id, expected_version, summary, summarized_through)
+
+        if (entry.data.get("summary_version") or 0) != expected_version:
+            return False
+        entry.data["summary"] = summary
+        entry.data["summarized_through"] = summarized_through
+        entry.data["summary_version"] = expected_version + 1
+        entry.revision += 1
+        return True
+
+    # LRU internals
+    # =========================================================================
+
+    def _lookup(self, session_id: str, for_write: bool = False) -> Optional[_Entry]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = self._evicted.pop(session_id, None)
+            if entry is None:
+                return None
+            self._insert(session_id, entry)
+            return entry
+
+        # Clean entries expire, dirty ones are always the newest state
+        expired = time.monotonic() - entry.loaded_at > self.ttl
+        if expired and not entry.dirty and not for_write:
+            del self._entries[session_id]
+            return None
+
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def _insert(self, session_id: str, entry: _Entry):
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_size:
+            old_id, old_entry = self._entries.popitem(last=False)
+            self.evictions += 1
+            if old_entry.dirty:
+                self._evicted[old_id] = old_entry
+
+    # Write-behind flush
+    # =========================================================================
+
+    async def flush(self):
+        """Write all dirty sessions in one batched, incremental bulk write"""
+        async with self._flush_lock:
+            pending = [(sid, e) for sid, e in self._entries.items() if e.dirty]
+            pending += list(self._evicted.items())
+            if not pending:
+                return
+
+            updates, snapshots = [], []
+            for session_id, entry in pending:
+                snapshot = copy.deepcopy(entry.data)
+                update = build_update(session_id, entry.persisted, snapshot)
+                if update is not None:
+                    updates.append(update)
+                snapshots.append((session_id, entry, snapshot, entry.revision))
+
+            start = time.perf_counter()
+            try:
+                if updates:
+                    await self.store.bulk_update_sessions(updates)
+            except Exception as e:
+                # Part of an unordered bulk write may have been applied, so
+                # retry with full $set updates ($push is not idempotent)
+                for _, entry, _, _ in snapshots:
+                    entry.persisted = None
+                self.flush_errors += 1
+                print(f"Session flush failed, will retry: {e}")
+                return
+            latency = time.perf_counter() - start
+
+            for session_id, entry, snapshot, revision in snapshots:
+                entry.persisted = snapshot
+                entry.flushed_revision = revision
+                entry.loaded_at = time.monotonic()
+                if self._evicted.get(session_id) is entry and not entry.dirty:
+                    del self._evicted[session_id]
+
+            self.flushes += 1
+            self.flushed_updates += len(updates)
+            self.flush_bytes += sum(len(json.dumps(u, default=str)) for u in updates)
+            self._flush_latency_total += latency
+            self.flush_latency_last = latency
+            self.flush_latency_max = max(self.flush_latency_max, latency)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "store": type(self.store).__name__,
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl,
+            "dirty": sum(1 for e in self._entries.values() if e.dirty) + len(self._evicted),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "flushed_updates": self.flushed_updates,
+            "flush_errors": self.flush_errors,
+            "flush_bytes_approx": self.flush_bytes,
+            "flush_latency_last_ms": round(self.flush_latency_last * 1000, 2),
+            "flush_latency_avg_ms": round(self._flush_latency_total / self.flushes * 1000, 2) if self.flushes else 0.0,
+            "flush_latency_max_ms": round(self.flush_latency_max * 1000, 2),
+            "store_loads": self.loads,
+            "store_load_latency_avg_ms": round(self._load_latency_total / self.loads * 1000, 3) if self.loads else 0.0,
+            "store_load_latency_max_ms": round(self.load_latency_max * 1000, 3),
+        }
+
+
+# Sessions go through the cache, jobs go straight to the database
+sessions = SessionCache(db, max_size=SESSION_CACHE_SIZE if db.cacheable else 0)
@@ -0,0 +1,28 @@
+"""
+Session Store Backends
+
+- mongo:  MongoDB Atlas via Motor (default)
+- sqlite: embedded SQLite file, WAL mode (single node / local load tests)
+- memory: plain dicts, nothing persisted (tests / benchmarks)
+
+Select with SESSION_STORE in .env, see api/db.py
+"""
+from .base import SessionStore, SUMMARY_FIELDS
+
+
+def create_store(kind: str, sqlite_path: str = "sessions.db") -> SessionStore:
+    """Build the configured backend (imports are lazy, so motor is only needed for mongo)"""
+    kind = kind.lower()
+    if kind == "mongo":
+        from .mongo import MongoSessionStore
+        return MongoSessionStore()
+    if kind == "sqlite":
+        from .sqlite import SQLiteSessionStore
+        return SQLiteSessionStore(sqlite_path)
+    if kind == "memory":
+        from .memory import MemorySessionStore
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE '{kind}', use mongo, sqlite or memory")
+
+
+__all__ = ["SessionStore", "SUMMARY_FIELDS", "create_store"]
@@ -0,0 +1,117 @@
+"""
+Session Store Interface
+
+Every backend stores two kinds of documents:
+- sessions (ChatSession.model_dump(), keyed by session_id)
+- jobs     (Job.model_dump(), keyed by job_id)
+
+The update semantics are shared (see the apply_* helpers below), so the
+session cache and the API behave the same on every backend.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+
+# Session fields written only by apply_summary()
+SUMMARY_FIELDS = ("summary", "summary_version", "summarized_through")
+
+
+class SessionStore(ABC):
+    """Async session + job storage backend"""
+
+    # Worth putting the in-process session cache in front of this store?
+    cacheable: bool = True
+
+    @abstractmethod
+    async def connect(self): ...
+
+    @abstractmethod
+    async def close(self): ...
+
+    # Sessions
+    # =========================================================================
+
+    @abstractmethod
+    async def get_session(self, session_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def save_session(self, session_data: dict):
+        """Upsert a session. Summary fields are only written on insert."""
+
+    @abstractmethod
+    async def bulk_update_sessions(self, updates: list):
+        """
+        Apply incremental session updates (upserted), in one round-trip.
+        Each update (see session_cache.build_update):
+            session_id     - which session
+            set            - fields to set
+            push_messages  - messages appended to recent_messages
+            keep_last      - then keep only the last N messages
+        """
+
+    @abstractmethod
+    async def apply_summary(self, session_id: str, expected_version: int, summary: str, summarized_through) -> bool:
+        """
+        Store a new rolling summary, only if nobody else updated it since
+        `expected_version` was read. Returns False if the version check failed.
+        """
+
+    # Jobs (POST /jobs)
+    # =========================================================================
+
+    @abstractmethod
+    async def get_job(self, job_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def save_job(self, job_data: dict): ...
+
+    @abstractmethod
+    async def update_job(self, job_id: str, fields: dict, push: dict = None, keep_last: int = 50):
+        """
+        Partial update of a job: set fields, and optionally push items
+        onto list fields (capped to the last `keep_last` items)
+        """
+
+
+# Shared document update helpers (for stores that keep plain dicts)
+# =============================================================================
+
+def merge_session_save(doc: Optional[dict], session_data: dict) -> dict:
+    """save_session() semantics: summary fields only on insert"""
+    if doc is None:
+        return dict(session_data)
+    merged = dict(doc)
+    merged.update({k: v for k, v in session_data.items() if k not in SUMMARY_FIELDS})
+    return merged
+
+
+def apply_session_update(doc: Optional[dict], update: dict) -> dict:
+    """bulk_update_sessions() semantics for one update"""
+    doc = dict(doc) if doc else {"session_id": update["session_id"]}
+    doc.update(update.get("set") or {})
+    if "push_messages" in update:
+        messages = list(doc.get("recent_messages") or []) + list(update["push_messages"])
+        keep_last = update["keep_last"]
+        doc["recent_messages"] = messages[-keep_last:] if keep_last else []
+    return doc
+
+
+def apply_summary_update(doc: Optional[dict], expected_version: int, summary: str, summarized_through) -> Optional[dict]:
+    """apply_summary() semantics: None if the version check fails"""
+    if doc is None or (doc.get("summary_version") or 0) != expected_version:
+        return None
+    doc = dict(doc)
+    doc["summary"] = summary
+    doc["summarized_through"] = summarized_through
+    doc["summary_version"] = expected_version + 1
+    return doc
+
+
+def apply_job_update(doc: Optional[dict], fields: dict, push: dict = None, keep_last: int = 50) -> Optional[dict]:
+    """update_job() semantics: None if the job doesn't exist"""
+    if doc is None:
+        return None
+    doc = dict(doc)
+    doc.update(fields)
+    for key, items in (push or {}).items():
+        doc[key] = (list(doc.get(key) or []) + list(items))[-keep_last:]
+    return doc
@@ -0,0 +1,75 @@
+"""
+In-Memory Session Store
+
+Plain dicts in the API process: zero I/O, nothing survives a restart.
+Use for load tests (measure the crew, not the database) and local dev.
+
+Config (.env):
+    SESSION_STORE=memory
+"""
+import copy
+from typing import Optional
+
+from .base import (
+    SessionStore,
+    merge_session_save,
+    apply_session_update,
+    apply_summary_update,
+    apply_job_update,
+)
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Dict-backed store. Methods never await, so every update is atomic
+    on the event loop. Documents are deep-copied in and out.
+    """
+
+    # Already in memory, the session cache would only add copies
+    cacheable = False
+
+    def __init__(self):
+        self._sessions: dict = {}
+        self._jobs: dict = {}
+
+    async def connect(self):
+        print("Using in-memory session store (data is lost on restart).")
+
+    async def close(self):
+        pass
+
+    # Sessions
+    # =========================================================================
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        return copy.deepcopy(self._sessions.get(session_id))
+
+    async def save_session(self, session_data: dict):
+        session_id = session_data["session_id"]
+        self._sessions[session_id] = merge_session_save(self._sessions.get(session_id), copy.deepcopy(session_data))
+
+    async def bulk_update_sessions(self, updates: list):
+        for update in copy.deepcopy(updates):
+            session_id = update["session_id"]
+            self._sessions[session_id] = apply_session_update(self._sessions.get(session_id), update)
+
+    async def apply_summary(self, session_id: str, expected_version: int, summary: str, summarized_through) -> bool:
+        doc = apply_summary_update(self._sessions.get(session_id), expected_version, summary, summarized_through)
+        if doc is None:
+            return False
+        self._sessions[session_id] = doc
+        return True
+
+    # Jobs
+    # =========================================================================
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        return copy.deepcopy(self._jobs.get(job_id))
+
+    async def save_job(self, job_data: dict):
+        self._jobs[job_data["job_id"]] = {**self._jobs.get(job_data["job_id"], {}), **copy.deepcopy(job_data)}
+
+    async def update_job(self, job_id: str, fields: dict, push: dict = None, keep_last: int = 50):
+        doc = apply_job_update(self._jobs.get(job_id), copy.deepcopy(fields), copy.deepcopy(push), keep_last)
+        if doc is not None:
+            self._jobs[job_id] = doc
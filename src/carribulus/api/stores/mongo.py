@@ -0,0 +1,137 @@
+"""
+MongoDB Session Store (default)
+
+Sessions and jobs live in two collections of DB_NAME on MongoDB Atlas.
+"""
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+from .base import SessionStore, SUMMARY_FIELDS
+
+load_dotenv()
+
+# Build MongoDB URI
+MONGO_USERNAME = os.getenv("MONGO_USERNAME")
+MONGO_PASSWORD = os.getenv("MONGO_PASSWORD")
+MONGO_CLUSTER = os.getenv("MONGO_CLUSTER")
+MONGO_APP_NAME = os.getenv("MONGO_APP_NAME", "KaiFeng")
+
+MONGO_URI = f"mongodb+srv://{MONGO_USERNAME}:{MONGO_PASSWORD}@{MONGO_CLUSTER}/?retryWrites=true&w=majority&appName={MONGO_APP_NAME}"
+DB_NAME = os.getenv("DB_NAME", "carribulus_db")
+
+
+class MongoSessionStore(SessionStore):
+    """MongoDB (Atlas) backend via Motor"""
+
+    client: AsyncIOMotorClient = None
+    db = None
+
+    async def connect(self):
+        # Add connectTimeoutMS=5000 to fail faster if network is bad
+        self.client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        try:
+            # Force a connection to verify it works
+            await self.client.admin.command('ping')
+            self.db = self.client[DB_NAME]
+            print("Connected to MongoDB Atlas successfully.")
+        except Exception as e:
+            print(f"Failed to connect to MongoDB: {e}")
+            raise e
+        await self.ensure_indexes()
+
+    async def ensure_indexes(self):
+        """Unique lookup keys, created once at startup (no-op if they exist)"""
+        try:
+            await self.db.sessions.create_index("session_id", unique=True)
+            await self.db.jobs.create_index("job_id", unique=True)
+        except Exception as e:
+            # e.g. duplicate session_id from older data, lookups still work
+            print(f"Warning: could not create indexes: {e}")
+
+    async def close(self):
+        if self.client:
+            self.client.close()
+            print("Disconnected from MongoDB.")
+
+    async def get_session(self, session_id: str):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        return await self.db.sessions.find_one({"session_id": session_id}, {"_id": 0})
+
+    async def save_session(self, session_data: dict):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        # Summary fields are owned by apply_summary() (background task),
+        # so a turn never overwrites a newer summary with the one it loaded
+        session_data = dict(session_data)
+        summary_fields = {key: session_data.pop(key) for key in SUMMARY_FIELDS if key in session_data}
+        update = {"$set": session_data}
+        if summary_fields:
+            update["$setOnInsert"] = summary_fields
+        await self.db.sessions.update_one(
+            {"session_id": session_data["session_id"]},
+            update,
+            upsert=True
+        )
+
+    async def bulk_update_sessions(self, updates: list):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        operations = []
+        for update in updates:
+            ops = {}
+            if update.get("set"):
+                ops["$set"] = update["set"]
+            if "push_messages" in update:
+                ops["$push"] = {"recent_messages": {
+                    "$each": update["push_messages"],
+                    "$slice": -update["keep_last"],
+                }}
+            if ops:
+                operations.append(UpdateOne({"session_id": update["session_id"]}, ops, upsert=True))
+        if operations:
+            await self.db.sessions.bulk_write(operations, ordered=False)
+
+    async def apply_summary(self, session_id: str, expected_version: int, summary: str, summarized_through) -> bool:
+        if self.db is None:
+            raise Exception("Database not initialized")
+        # Sessions saved before versioning have no summary_version field (= version 0)
+        version_filter = {"$in": [0, None]} if expected_version == 0 else expected_version
+        result = await self.db.sessions.update_one(
+            {"session_id": session_id, "summary_version": version_filter},
+            {
+                "$set": {"summary": summary, "summarized_through": summarized_through},
+                "$inc": {"summary_version": 1},
+            }
+        )
+        return result.modified_count == 1
+
+    # Jobs (POST /jobs)
+    # =========================================================================
+
+    async def get_job(self, job_id: str):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        return await self.db.jobs.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def save_job(self, job_data: dict):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        await self.db.jobs.update_one(
+            {"job_id": job_data["job_id"]},
+            {"$set": job_data},
+            upsert=True
+        )
+
+    async def update_job(self, job_id: str, fields: dict, push: dict = None, keep_last: int = 50):
+        if self.db is None:
+            raise Exception("Database not initialized")
+        update = {"$set": fields}
+        if push:
+            update["$push"] = {
+                key: {"$each": items, "$slice": -keep_last}
+                for key, items in push.items()
+            }
+        await self.db.jobs.update_one({"job_id": job_id}, update)
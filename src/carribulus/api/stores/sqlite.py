@@ -0,0 +1,163 @@
+"""
+SQLite Session Store (embedded, WAL mode)
+
+For local load testing and single-node deployments: session I/O is a local
+file read/write instead of a WAN round-trip to Atlas.
+
+- Documents are stored as JSON (datetimes round-trip as {"$date": iso})
+- All SQLite calls run on ONE dedicated thread, so the event loop never
+  blocks and read-modify-write updates are serialized (atomic)
+
+Config (.env):
+    SESSION_STORE=sqlite
+    SQLITE_PATH=sessions.db
+"""
+import json
+import sqlite3
+import asyncio
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .base import (
+    SessionStore,
+    merge_session_save,
+    apply_session_update,
+    apply_summary_update,
+    apply_job_update,
+)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _dumps(doc: dict) -> str:
+    return json.dumps(doc, default=_encode, ensure_ascii=False)
+
+
+def _loads(text: str) -> dict:
+    return json.loads(text, object_hook=_decode)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Embedded SQLite backend (WAL), async via a single worker thread"""
+
+    def __init__(self, path: str = "sessions.db"):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            raise Exception("Database not initialized")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def connect(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-store")
+        await self._run(self._open)
+        print(f"Connected to SQLite session store: {self.path} (WAL)")
+
+    def _open(self):
+        # Autocommit mode; multi-statement writes use explicit transactions
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, much faster than FULL
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn = conn
+
+    async def close(self):
+        if self._executor is not None:
+            await self._run(self._conn.close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            print("Disconnected from SQLite.")
+
+    # Blocking helpers (run on the store thread only)
+    # =========================================================================
+
+    def _get(self, table: str, key: str, value: str) -> Optional[dict]:
+        row = self._conn.execute(f"SELECT data FROM {table} WHERE {key} = ?", (value,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    def _put(self, table: str, key: str, value: str, doc: dict):
+        self._conn.execute(
+            f"INSERT INTO {table} ({key}, data) VALUES (?, ?) "
+            f"ON CONFLICT({key}) DO UPDATE SET data = excluded.data",
+            (value, _dumps(doc))
+        )
+
+    def _modify(self, table: str, key: str, value: str, change) -> bool:
+        """Read-modify-write in one transaction; change(doc) returns None to skip"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            new_doc = change(self._get(table, key, value))
+            if new_doc is not None:
+                self._put(table, key, value, new_doc)
+            self._conn.execute("COMMIT")
+            return new_doc is not None
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _bulk_update(self, updates: list):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for update in updates:
+                session_id = update["session_id"]
+                doc = apply_session_update(self._get("sessions", "session_id", session_id), update)
+                self._put("sessions", "session_id", session_id, doc)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    # Sessions
+    # =========================================================================
+
+    async def get_session(self, session_id: str):
+        return await self._run(self._get, "sessions", "session_id", session_id)
+
+    async def save_session(self, session_data: dict):
+        await self._run(
+            self._modify, "sessions", "session_id", session_data["session_id"],
+            lambda doc: merge_session_save(doc, session_data)
+        )
+
+    async def bulk_update_sessions(self, updates: list):
+        if updates:
+            await self._run(self._bulk_update, updates)
+
+    async def apply_summary(self, session_id: str, expected_version: int, summary: str, summarized_through) -> bool:
+        return await self._run(
+            self._modify, "sessions", "session_id", session_id,
+            lambda doc: apply_summary_update(doc, expected_version, summary, summarized_through)
+        )
+
+    # Jobs
+    # =========================================================================
+
+    async def get_job(self, job_id: str):
+        return await self._run(self._get, "jobs", "job_id", job_id)
+
+    async def save_job(self, job_data: dict):
+        await self._run(
+            self._modify, "jobs", "job_id", job_data["job_id"],
+            lambda doc: {**(doc or {}), **job_data}
+        )
+
+    async def update_job(self, job_id: str, fields: dict, push: dict = None, keep_last: int = 50):
+        await self._run(
+            self._modify, "jobs", "job_id", job_id,
+            lambda doc: apply_job_update(doc, fields, push, keep_last)
+        )
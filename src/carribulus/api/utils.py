@@ -1,12 +1,13 @@
-from litellm import completion
+from litellm import acompletion
 import os
 from typing import List
 from .models import Message
 
-def generate_rolling_summary(current_summary: str, new_messages: List[Message]) -> str:
+async def generate_rolling_summary(current_summary: str, new_messages: List[Message]) -> str:
     """
     Condenses the current summary and new messages into a new summary.
-    Uses a synchronous call for simplicity, but could be async if needed.
+    Async (acompletion), so it never blocks the event loop. It runs as a
+    background task after the response is sent, see api/main.py.
     """
     if not new_messages:
         return current_summary
@@ -31,7 +32,7 @@ def generate_rolling_summary(current_summary: str, new_messages: List[Message])
     model = os.getenv("SUMMARY_MODEL")
 
     try:
-        response = completion(
+        response = await acompletion(
             model=model,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -39,3 +40,39 @@ def generate_rolling_summary(current_summary: str, new_messages: List[Message])
     except Exception as e:
         print(f"Error generating summary: {e}")
         return current_summary
+
+# Used when the LLM call fails, so a greeting never errors out
+FALLBACK_DIRECT_REPLY = (
+    "Hi! I'm your travel assistant. I can find flights and hotels, recommend "
+    "food and attractions, check events and safety news, translate photos of "
+    "signs or menus, or plan a whole trip. Where would you like to go?"
+)
+
+async def generate_direct_reply(message: str, chat_history: str) -> str:
+    """
+    Reply to greetings / chit-chat without the crew (router "direct" path).
+    One small LLM call instead of a full hierarchical crew run.
+    """
+    prompt = f"""
+    You are a warm, professional travel assistant.
+    You can find flights and hotels, recommend food and attractions,
+    check events and safety news, translate images, and plan full trips.
+
+    Conversation so far:
+    {chat_history}
+
+    Reply warmly and briefly (1-3 sentences) to the user's latest message:
+    "{message}"
+    """
+
+    model = os.getenv("ROUTER_MODEL") or os.getenv("SUMMARY_MODEL")
+
+    try:
+        response = await acompletion(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content or FALLBACK_DIRECT_REPLY
+    except Exception as e:
+        print(f"Error generating direct reply: {e}")
+        return FALLBACK_DIRECT_REPLY
@@ -1,9 +1,10 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from typing import List
+from typing import List, Optional
+import threading
 
 # Import LLMs from separate module
-from carribulus.llms import gm, hf, orouter
+from carribulus.llms import routed_llm
 
 # Import Tools organized by provider
 from carribulus.tools import (
@@ -17,12 +18,18 @@ from carribulus.tools import (
     serpapi_flights,    # Google Flights
     serpapi_hotels,     # Google Hotels
     # Vision (To bypass CrewAI agent wrapper that have bugs with multimodal=True)
-    gemini_vision,      # Gemini
-    huggingface_vision, # HuggingFace
-    openrouter_vision,  # OpenRouter
+    hedged_vision,      # Gemini / HuggingFace / OpenRouter: fastest healthy provider + hedged requests
 )
 
 
+# Planning fan-out: expert (method name) → its research task (tasks.yaml)
+PLANNING_RESEARCH = {
+    "transport_expert": "research_transport",
+    "local_guide": "research_local",
+    "news_analyst": "research_news",
+}
+
+
 @CrewBase
 class Carribulus():
     """Travel Agent Crew"""
@@ -34,7 +41,8 @@ class Carribulus():
     # =========================================================================
     # NOTE: No @agent decorator because manager_agent can't be in the agents list
     # https://docs.crewai.com/en/learn/custom-manager-agent
-    def travel_manager(self) -> Agent:
+    # allow_delegation=False is the compiler of the planning fan-out (the research is already done)
+    def travel_manager(self, allow_delegation: bool = True) -> Agent:
         return Agent(
             role="Travel Manager",
             goal="Understand user needs, coordinate experts, and compile the final comprehensive travel plan.",
@@ -61,8 +69,8 @@ class Carribulus():
                   * Safety notes
                   * Practical tips
             """,
-            llm=gm,  # Should be a strong and clever model as supervisor
-            allow_delegation=True,
+            llm=routed_llm("manager"),  # Should be a strong and clever model as supervisor
+            allow_delegation=allow_delegation,
             verbose=True,
             max_retry_limit=3,
             max_iter=25,
@@ -84,7 +92,7 @@ class Carribulus():
                 serpapi_hotels,     # Google Hotels (precise pricing)
                 serper_search,      # For buses, trains, Grab, ferries, etc.
             ],
-            llm=gm,
+            llm=routed_llm("expert"),
             verbose=True
         )
 
@@ -94,7 +102,7 @@ class Carribulus():
         return Agent(
             config=self.agents_config['local_guide'],
             tools=[serper_places, tavily_search],
-            llm=gm,
+            llm=routed_llm("expert"),
             verbose=True
         )
 
@@ -104,7 +112,7 @@ class Carribulus():
         return Agent(
             config=self.agents_config['news_analyst'],
             tools=[serper_news],
-            llm=gm,
+            llm=routed_llm("expert"),
             verbose=True
         )
 
@@ -113,8 +121,8 @@ class Carribulus():
         """Handles image analysis and translation"""
         return Agent(
             config=self.agents_config['vision_translator'],
-            tools=[huggingface_vision],
-            llm=hf,
+            tools=[hedged_vision],
+            llm=routed_llm("vision"),
             verbose=True
             # Note: multimodal=True have bug for Vision Language Model (VLM)
             # so we bypass CrewAI wrapper by using vision tool directly (call VLM API in tool)
@@ -134,6 +142,35 @@ class Carribulus():
             # No agent specified - Manager will delegate based on request
         )
 
+    # NOTE: No @task decorator, it must not join the hierarchical crew's task list
+    def handle_focused_request(self, expert: Agent) -> Task:
+        """Fast path task: one expert answers a single-domain request directly"""
+        return Task(
+            config=self.tasks_config['handle_focused_request'],
+            agent=expert,
+            human_input=False
+        )
+
+    # NOTE: No @task decorator either, these only exist in the planning fan-out crew
+    def research_task(self, name: str, expert: Agent) -> Task:
+        """Planning fan-out: one expert's research, runs concurrently with the others"""
+        return Task(
+            config=self.tasks_config[name],
+            agent=expert,
+            async_execution=True,
+            human_input=False
+        )
+
+    def compile_trip_plan(self, compiler: Agent, research: List[Task]) -> Task:
+        """Planning fan-out: the manager compiles the finished research into the plan"""
+        return Task(
+            config=self.tasks_config['compile_trip_plan'],
+            agent=compiler,
+            context=research,
+            output_file="report.md",
+            human_input=False
+        )
+
     # Crew Assembly
     # =========================================================================
     # To learn how to add knowledge sources to your crew, check out the documentation:
@@ -150,3 +187,96 @@ class Carribulus():
             verbose=True,
             output_log_file=False, # Enable if you want to save logs to a file
         )
+
+    def focused_crew(self, expert: str) -> Crew:
+        """Single-agent sequential crew for one expert (no manager, no delegation)"""
+        expert_agent = getattr(self, expert)()
+        return Crew(
+            agents=[expert_agent],
+            tasks=[self.handle_focused_request(expert_agent)],
+            process=Process.sequential,
+            verbose=True,
+            output_log_file=False,
+        )
+
+    def planning_crew(self) -> Crew:
+        """
+        Trip planning fan-out: transport / local / news research run at the same
+        time (async tasks), then the manager compiles them (sequential process,
+        the sync compile task waits for all three). Wall time ≈ slowest expert.
+        """
+        experts = {name: getattr(self, name)() for name in PLANNING_RESEARCH}
+        research = [self.research_task(task_name, experts[name]) for name, task_name in PLANNING_RESEARCH.items()]
+        compiler = self.travel_manager(allow_delegation=False)
+        return Crew(
+            agents=[*experts.values(), compiler],
+            tasks=[*research, self.compile_trip_plan(compiler, research)],
+            process=Process.sequential,
+            verbose=True,
+            output_log_file=False,
+        )
+
+
+# Crew Blueprint (built once per process)
+# =========================================================================
+# Carribulus() re-reads + re-parses agents.yaml / tasks.yaml and rebuilds the
+# manager and all sub-agents on every call. The blueprint does that ONCE;
+# each run gets a copy (fresh agents/tasks state, shared LLMs + tool instances).
+# NOTE: never kickoff() the blueprint itself, always use build_crew().
+#
+# kind=None is the full hierarchical crew, "planning" the parallel planning
+# fan-out, and an expert name (e.g. "local_guide") is that expert's
+# single-agent fast-path crew (see router.py).
+
+EXPERTS = ("transport_expert", "local_guide", "news_analyst", "vision_translator")
+PLANNING = "planning"
+
+_blueprints: dict = {}
+_blueprint_lock = threading.Lock()
+
+
+def crew_blueprint(kind: Optional[str] = None) -> Crew:
+    """Process-wide precompiled crew (parsed config, agents, tool wiring)"""
+    if kind is not None and kind != PLANNING and kind not in EXPERTS:
+        raise ValueError(f"Unknown crew: {kind}")
+    blueprint = _blueprints.get(kind)
+    if blueprint is None:
+        with _blueprint_lock:
+            blueprint = _blueprints.get(kind)
+            if blueprint is None:
+                carribulus = Carribulus()
+                if kind is None:
+                    blueprint = carribulus.crew()
+                elif kind == PLANNING:
+                    blueprint = carribulus.planning_crew()
+                else:
+                    blueprint = carribulus.focused_crew(kind)
+                _blueprints[kind] = blueprint
+    return blueprint
+
+
+def build_crew(kind: Optional[str] = None) -> Crew:
+    """Cheap per-run crew instance; only the inputs are bound at kickoff()"""
+    return crew_blueprint(kind).copy()
+
+
+def fan_out_timing(crew: Crew) -> Optional[dict]:
+    """
+    Speedup of a finished planning run: the experts' research time added up
+    (what the one-after-another manager would have taken) vs the wall time of
+    the concurrent research stage.
+    """
+    research = [t for t in crew.tasks if t.async_execution and t.start_time and t.end_time]
+    if not research:
+        return None
+    experts = {t.agent.role.strip(): round(t.execution_duration, 2) for t in research}
+    wall = (max(t.end_time for t in research) - min(t.start_time for t in research)).total_seconds()
+    sequential = sum(t.execution_duration for t in research)
+    compile_task = crew.tasks[-1]
+    return {
+        "experts_s": experts,
+        "research_sequential_s": round(sequential, 2),
+        "research_wall_s": round(wall, 2),
+        "speedup": round(sequential / wall, 2) if wall > 0 else 1.0,
+        "compile_s": round(compile_task.execution_duration or 0.0, 2),
+    }
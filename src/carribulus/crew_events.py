@@ -0,0 +1,221 @@
+"""
+Crew Event Stream
+
+Bridges CrewAI's global event bus to ONE crew run, so we can push progress
+(manager delegation, tool start/finish, LLM tokens) to a client while the
+crew is still working.
+
+The event bus is process-wide and several crews can run at the same time,
+so handlers are registered once and each event is routed to the run whose
+agents/tasks produced it (matched by agent/task id).
+
+Usage:
+    with CrewEventStream(crew, on_event):
+        crew.kickoff(inputs=inputs)
+
+on_event receives plain dicts, e.g.
+    {"type": "tool_started", "agent": "Local Guide", "tool": "Search the internet"}
+    {"type": "task_finished", "agent": "Local Guide", "duration_s": 41.2}
+
+NOTE: on_event is called from the crew's worker thread(s).
+"""
+import time
+import threading
+from typing import Callable, Optional
+
+# CrewAI's built-in delegation tools (hierarchical process)
+DELEGATION_TOOLS = {"delegate work to coworker", "ask question to coworker"}
+
+_lock = threading.Lock()
+_active_runs: dict = {}        # agent/task id -> CrewEventStream
+_handlers_registered = False
+
+
+def _event_ids(event) -> set:
+    """Collect every agent/task id an event can be traced back to"""
+    ids = set()
+    for attr in ("agent_id", "task_id"):
+        value = getattr(event, attr, None)
+        if value:
+            ids.add(str(value))
+    for attr in ("agent", "task", "from_agent", "from_task"):
+        obj = getattr(event, attr, None)
+        obj_id = getattr(obj, "id", None)
+        if obj_id:
+            ids.add(str(obj_id))
+    return ids
+
+
+def _agent_role(event) -> str:
+    role = getattr(event, "agent_role", None)
+    if not role:
+        for attr in ("agent", "from_agent"):
+            agent = getattr(event, attr, None)
+            role = getattr(agent, "role", None)
+            if role:
+                break
+    return (role or "").strip()
+
+
+def _find_run(event) -> Optional["CrewEventStream"]:
+    ids = _event_ids(event)
+    if not ids:
+        return None
+    with _lock:
+        for event_id in ids:
+            run = _active_runs.get(event_id)
+            if run is not None:
+                return run
+    return None
+
+
+def _dispatch(event, payload: dict):
+    run = _find_run(event)
+    if run is not None:
+        run.emit(payload)
+
+
+def _register_handlers():
+    """Register bus handlers once per process (lazy, so importing is cheap)"""
+    global _handlers_registered
+    with _lock:
+        if _handlers_registered:
+            return
+        _handlers_registered = True
+
+    from carribulus.tools.compaction import compaction_report
+    from crewai.events import (
+        crewai_event_bus,
+        AgentExecutionStartedEvent,
+        AgentExecutionCompletedEvent,
+        ToolUsageStartedEvent,
+        ToolUsageFinishedEvent,
+        ToolUsageErrorEvent,
+        LLMStreamChunkEvent,
+        TaskStartedEvent,
+        TaskCompletedEvent,
+    )
+
+    # Task events carry the task (its agent is the one working on it);
+    # in the planning fan-out several tasks are running at the same time
+    def _task_agent(event) -> str:
+        agent = getattr(getattr(event, "task", None), "agent", None)
+        return (getattr(agent, "role", None) or "").strip()
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def on_task_started(source, event):
+        _dispatch(event, {"type": "task_started", "agent": _task_agent(event)})
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def on_task_completed(source, event):
+        task = getattr(event, "task", None)
+        _dispatch(event, {
+            "type": "task_finished",
+            "agent": _task_agent(event),
+            "duration_s": round(task.execution_duration, 3) if task is not None and task.execution_duration else None,
+        })
+
+    @crewai_event_bus.on(AgentExecutionStartedEvent)
+    def on_agent_started(source, event):
+        _dispatch(event, {"type": "agent_started", "agent": _agent_role(event)})
+
+    @crewai_event_bus.on(AgentExecutionCompletedEvent)
+    def on_agent_completed(source, event):
+        _dispatch(event, {
+            "type": "agent_finished",
+            "agent": _agent_role(event),
+            "output": str(getattr(event, "output", "") or ""),
+        })
+
+    @crewai_event_bus.on(ToolUsageStartedEvent)
+    def on_tool_started(source, event):
+        tool_name = getattr(event, "tool_name", "") or ""
+        tool_args = getattr(event, "tool_args", None) or {}
+        if tool_name.strip().lower() in DELEGATION_TOOLS:
+            args = tool_args if isinstance(tool_args, dict) else {}
+            _dispatch(event, {
+                "type": "delegation",
+                "agent": _agent_role(event),
+                "coworker": args.get("coworker", ""),
+                "task": args.get("task") or args.get("question", ""),
+            })
+        else:
+            _dispatch(event, {
+                "type": "tool_started",
+                "agent": _agent_role(event),
+                "tool": tool_name,
+                "args": tool_args,
+            })
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def on_tool_finished(source, event):
+        started_at = getattr(event, "started_at", None)
+        finished_at = getattr(event, "finished_at", None)
+        duration = None
+        if started_at and finished_at:
+            duration = round((finished_at - started_at).total_seconds(), 3)
+        payload = {
+            "type": "tool_finished",
+            "agent": _agent_role(event),
+            "tool": getattr(event, "tool_name", ""),
+            "duration_s": duration,
+            "from_cache": bool(getattr(event, "from_cache", False)),
+        }
+        # tokens_before / tokens_after if the output went through compaction.py
+        payload.update(compaction_report(getattr(event, "output", None)) or {})
+        _dispatch(event, payload)
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def on_tool_error(source, event):
+        _dispatch(event, {
+            "type": "tool_error",
+            "agent": _agent_role(event),
+            "tool": getattr(event, "tool_name", ""),
+            "error": str(getattr(event, "error", "")),
+        })
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def on_llm_chunk(source, event):
+        chunk = getattr(event, "chunk", "")
+        if chunk:
+            _dispatch(event, {"type": "token", "agent": _agent_role(event), "text": chunk})
+
+
+class CrewEventStream:
+    """Context manager that forwards the events of one crew run to a callback"""
+
+    def __init__(self, crew, on_event: Callable[[dict], None]):
+        self.on_event = on_event
+        self.started_at = time.time()
+        self._ids = set()
+
+        agents = list(getattr(crew, "agents", []) or [])
+        if getattr(crew, "manager_agent", None) is not None:
+            agents.append(crew.manager_agent)
+        for agent in agents:
+            self._ids.add(str(agent.id))
+        for task in getattr(crew, "tasks", []) or []:
+            self._ids.add(str(task.id))
+
+    def emit(self, payload: dict):
+        payload.setdefault("elapsed_s", round(time.time() - self.started_at, 2))
+        try:
+            self.on_event(payload)
+        except Exception as e:
+            # A broken consumer must never break the crew run
+            print(f"Event stream callback failed: {e}")
+
+    def __enter__(self):
+        _register_handlers()
+        with _lock:
+            for run_id in self._ids:
+                _active_runs[run_id] = self
+        self.emit({"type": "run_started"})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with _lock:
+            for run_id in self._ids:
+                if _active_runs.get(run_id) is self:
+                    del _active_runs[run_id]
+        return False
@@ -0,0 +1,110 @@
+"""
+Intent Detection (rule-based, no LLM call)
+
+Cheap keyword/regex scoring of a user message into the domains used by the
+crew (same split as the Decision Guide in tasks.yaml):
+
+- greeting:  hello / thanks / chit-chat (not when answering a question the
+             assistant just asked: "ok" / "great" there is a reply for the manager)
+- vision:    image URL or "translate this photo"
+- transport: flights, hotels, buses, trains      → transport_expert
+- local:     food, attractions, culture          → local_guide
+- news:      events, weather, safety             → news_analyst
+- planning:  full trip / itinerary / budget      → travel_manager + experts
+- general:   anything else
+"""
+import re
+import unicodedata
+
+# Greeting / chit-chat: whole message is short and matches one of these
+_GREETING = re.compile(
+    r"^(hi+|hello+|hey+|yo|hola|howdy|good (morning|afternoon|evening|night)|"
+    r"how are you( doing)?|what'?s up|thanks?( you)?( so much)?|thank u|thx|ty|"
+    r"ok(ay)?|cool|great|nice|bye|goodbye|see (you|ya)|who are you|what can you do)"
+    r"( there)?( (bot|assistant|buddy|friend))?$"
+)
+
+_IMAGE_URL = re.compile(r"(https?://\S+\.(jpe?g|png|webp|gif|bmp)\b|data:image/)", re.IGNORECASE)
+
+DOMAIN_KEYWORDS = {
+    "transport": {
+        "flight", "flights", "fly", "flying", "airline", "airlines", "airport", "airfare",
+        "hotel", "hotels", "hostel", "hostels", "resort", "resorts", "accommodation", "stay",
+        "bus", "buses", "train", "trains", "mrt", "lrt", "ferry", "grab", "taxi", "transfer",
+        "ticket", "tickets", "booking", "check-in", "layover", "transit",
+    },
+    "local": {
+        "food", "eat", "eating", "restaurant", "restaurants", "cafe", "cafes", "dish", "dishes",
+        "street", "hawker", "attraction", "attractions", "sightseeing", "museum", "museums",
+        "temple", "temples", "beach", "beaches", "culture", "cultural", "shopping", "market",
+        "markets", "nightlife", "hidden gems", "landmark", "landmarks", "hike", "hiking",
+        "things to do", "activities", "must-see", "must-visit",
+    },
+    "news": {
+        "news", "safe", "safety", "dangerous", "weather", "forecast", "rain", "typhoon",
+        "flood", "floods", "earthquake", "haze", "protest", "protests", "advisory",
+        "warning", "warnings", "event", "events", "festival", "festivals", "concert",
+        "concerts", "exhibition", "happening",
+    },
+    # Only strong signals: "budget hotels" or "trip to Bali" alone are not full planning
+    "planning": {
+        "plan", "planning", "itinerary", "schedule", "day-by-day", "day by day",
+    },
+}
+
+_DAYS = re.compile(r"\b\d+\s*-?\s*(day|days|night|nights|d\d*n)\b")
+_VISION_WORDS = {"image", "photo", "picture", "pic", "menu", "sign", "screenshot"}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, unify unicode, strip punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[^\w\s'-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def domain_scores(text: str) -> dict:
+    """Keyword/phrase hits per domain (the small 'classifier' features)"""
+    normalized = normalize_text(text)
+    words = set(normalized.split())
+    padded = f" {normalized} "
+    scores = {}
+    for domain, keywords in DOMAIN_KEYWORDS.items():
+        scores[domain] = sum(
+            (f" {k} " in padded) if " " in k else (k in words)
+            for k in keywords
+        )
+    if _DAYS.search(normalized):
+        scores["planning"] += 1
+    return scores
+
+
+def asked_question(reply: str) -> bool:
+    """Did an assistant turn end by asking the user something (clarifying question)"""
+    lines = [line.strip() for line in (reply or "").strip().splitlines() if line.strip()]
+    return any(line.endswith("?") for line in lines[-3:])
+
+
+def classify_intent(text: str, previous_reply: str = "") -> str:
+    """
+    Single best intent for a message (see module docstring).
+    previous_reply is the assistant's last turn, if any.
+    """
+    if _IMAGE_URL.search(text or ""):
+        return "vision"
+
+    normalized = normalize_text(text)
+    if not normalized:
+        return "general"
+    if _GREETING.match(normalized) and not asked_question(previous_reply):
+        return "greeting"
+    if "translate" in normalized and _VISION_WORDS & set(normalized.split()):
+        return "vision"
+
+    scores = domain_scores(text)
+    experts = [d for d in ("transport", "local", "news") if scores[d] > 0]
+    if scores["planning"] or len(experts) >= 2:
+        return "planning"
+    if len(experts) == 1:
+        return experts[0]
+    return "general"
@@ -1,6 +1,12 @@
 """
 LLM Providers Module
+
+providers: the configured models (gm, hf, orouter)
+routing: per-role RoutingLLM over them (latency-aware failover / load balancing)
+prompt_cache: provider prompt caching + cached vs uncached input tokens per run
 """
 from carribulus.llms.providers import orouter, hf, gm
+from carribulus.llms.routing import RoutingLLM, routed_llm, llm_routing_stats
+from carribulus.llms.prompt_cache import prompt_cache_stats
 
-__all__ = ["orouter", "hf", "gm"]
+__all__ = ["orouter", "hf", "gm", "RoutingLLM", "routed_llm", "llm_routing_stats", "prompt_cache_stats"]
@@ -0,0 +1,374 @@
+"""
+Provider-Side Prompt / Context Caching
+
+The travel_manager backstory, the task instructions (tasks.yaml) and all
+tool descriptions are identical on every call, yet were re-sent and
+re-processed on every ReAct iteration. Three parts:
+
+1. Static prefix first: tasks.yaml puts the (static) instructions first and
+   the dynamic chat history / request / date LAST, so every call of an agent
+   starts with the same system prompt (role, backstory, tools) + task text.
+   Providers with automatic prefix caching (Gemini 2.5 implicit caching,
+   OpenAI, DeepSeek, ...) serve that prefix from cache without any flag.
+2. Explicit cache (native Gemini, gm): with GEMINI_CONTEXT_CACHE=true the
+   system instruction + tools are stored as a Gemini cached content (TTL
+   GEMINI_CONTEXT_CACHE_TTL) and referenced instead of being re-sent. Only
+   prefixes of at least GEMINI_CONTEXT_CACHE_MIN_TOKENS are cached (Gemini's
+   minimum), failures fall back to the normal request. The cache is created
+   outside the lock: other calls send the full prompt meanwhile, they never
+   wait for it. (The configured litellm models, HF Qwen and OpenRouter
+   Mistral, do not honour `cache_control` markers, none are sent.)
+3. Accounting: every call captures its input, cached input and output
+   tokens (litellm usage callback / Gemini usage metadata): routed calls in
+   llms/routing.py, Gemini calls made without routing
+   (LLM_ROUTING_ENABLED=false) in instrument_gemini(). Totals per crew run
+   (and per agent of the run) are logged when the run ends, and kept per
+   model + for the recent runs, see prompt_cache_stats()
+
+crewAI's native Gemini provider reads no usage from streamed calls
+(LLM_STREAMING=true): instrument_gemini() takes it from the last chunk that
+carries usage metadata, so streamed calls are counted too.
+
+Config (.env):
+    GEMINI_CONTEXT_CACHE=false             # explicit Gemini cached contents (storage is billed)
+    GEMINI_CONTEXT_CACHE_TTL=3600          # seconds
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS=1024
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Optional
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# Recent runs kept for /stats
+_RECENT_RUNS = 20
+
+# A cache creation still unfinished after this many seconds is retried
+_CACHE_CREATE_TIMEOUT = 60
+
+# Gemini accepts at most 5 stop sequences
+_GEMINI_MAX_STOP_SEQUENCES = 5
+
+
+# Per-call usage capture
+# =============================================================================
+
+class CallUsage:
+    __slots__ = ("input_tokens", "cached_tokens", "output_tokens")
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+
+    def add(self, input_tokens: int, cached_tokens: int, output_tokens: int):
+        self.input_tokens += input_tokens or 0
+        self.cached_tokens += cached_tokens or 0
+        self.output_tokens += output_tokens or 0
+
+
+# The LLM call runs synchronously on the caller's thread, so a thread-local
+# sink connects the provider's usage report to the routed call
+_sink = threading.local()
+
+
+@contextmanager
+def capture_usage():
+    usage = CallUsage()
+    previous = getattr(_sink, "usage", None)
+    _sink.usage = usage
+    try:
+        yield usage
+    finally:
+        _sink.usage = previous
+
+
+def _report(input_tokens: int, cached_tokens: int, output_tokens: int):
+    usage = getattr(_sink, "usage", None)
+    if usage is not None:
+        usage.add(input_tokens, cached_tokens, output_tokens)
+
+
+def _field(obj, name: str):
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+class _UsageCallback:
+    """litellm-style callback: crewAI's LLM hands it the response usage"""
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = _field(response_obj, "usage")
+        if not usage:
+            return
+        details = _field(usage, "prompt_tokens_details")
+        cached = (_field(details, "cached_tokens")
+                  or _field(usage, "cache_read_input_tokens")  # Anthropic
+                  or 0)
+        _report(_field(usage, "prompt_tokens") or 0, cached, _field(usage, "completion_tokens") or 0)
+
+
+usage_callback = _UsageCallback()
+
+
+# Native Gemini: cached token counts + explicit cached contents
+# =============================================================================
+
+class _GeminiContextCache:
+    """System instruction + tools → Gemini cached content name, per model"""
+
+    def __init__(self):
+        self._entries: dict = {}   # key → (name or None, expires_at)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.failed = 0
+
+    def _key(self, model: str, config) -> str:
+        payload = f"{model}\x1f{config.system_instruction!r}\x1f{config.tools!r}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cached_config(self, llm, config):
+        """The config referencing a cached content for its prefix (or config unchanged)"""
+        if config.system_instruction is None:
+            return config
+        text = "".join(p.text or "" for p in (config.system_instruction.parts or []))
+        if len(text) // 4 + len(repr(config.tools or "")) // 4 < GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+            return config
+
+        key = self._key(llm.model, config)
+        now = time.time()
+        with self._lock:
+            name, expires_at = self._entries.get(key, (None, 0.0))
+            if expires_at > now:
+                if name is None:
+                    return config  # being created, or creation failed recently
+                self.reused += 1
+                return config.model_copy(update={"system_instruction": None, "tools": None,
+                                                 "cached_content": name})
+            # Claim the creation: meanwhile other calls send the full prompt
+            self._entries[key] = (None, now + _CACHE_CREATE_TIMEOUT)
+
+        # Network call outside the lock, no Gemini call waits for it
+        try:
+            from google.genai import types
+
+            cached = llm.client.caches.create(
+                model=llm.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    ttl=f"{GEMINI_CONTEXT_CACHE_TTL}s",
+                    display_name=f"carribulus-{key[:12]}",
+                ),
+            )
+            name = cached.name
+            print(f"Gemini context cache created: {name} (~{len(text) // 4} tokens, ttl {GEMINI_CONTEXT_CACHE_TTL}s)")
+        except Exception as e:
+            name = None
+            print(f"Gemini context cache unavailable, sending the full prompt: {e}")
+
+        with self._lock:
+            if name is None:
+                self.failed += 1
+            else:
+                self.created += 1
+            # Recreate a minute before Gemini expires it (or retry after a failure)
+            self._entries[key] = (name, now + max(60, GEMINI_CONTEXT_CACHE_TTL - 60))
+        if name is None:
+            return config
+        return config.model_copy(update={"system_instruction": None, "tools": None, "cached_content": name})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": GEMINI_CONTEXT_CACHE, "entries": sum(1 for n, _ in self._entries.values() if n),
+                    "created": self.created, "reused": self.reused, "failed": self.failed}
+
+
+gemini_context_cache = _GeminiContextCache()
+
+
+def instrument_gemini(llm, name: str = "gm"):
+    """
+    Native Gemini provider (crewAI GeminiCompletion): report cached tokens
+    (crewAI drops usage_metadata.cached_content_token_count) and the usage of
+    streamed calls (crewAI ignores it), send the agent's stop words as Gemini
+    stop_sequences (crewAI only truncates non-streamed responses at them),
+    record the usage of calls made without routing (under `name`) and, if
+    enabled, reference the explicit context cache. Other LLMs are returned
+    unchanged.
+    """
+    if not hasattr(llm, "_extract_token_usage") or not hasattr(llm, "_prepare_generation_config"):
+        return llm
+
+    extract = llm._extract_token_usage
+    prepare = llm._prepare_generation_config
+
+    def extract_token_usage(response):
+        usage = extract(response)
+        metadata = getattr(response, "usage_metadata", None)
+        cached = getattr(metadata, "cached_content_token_count", None) or 0
+        usage["cached_prompt_tokens"] = cached
+        _report(usage.get("prompt_token_count") or 0, cached, usage.get("candidates_token_count") or 0)
+        return usage
+
+    def prepare_generation_config(system_instruction=None, tools=None):
+        config = prepare(system_instruction, tools)
+        # crewAI sets the ReAct stop words ("\nObservation:") on llm.stop at run
+        # time, stop_sequences only come from the constructor
+        if llm.stop and not config.stop_sequences:
+            config = config.model_copy(update={"stop_sequences": list(llm.stop)[:_GEMINI_MAX_STOP_SEQUENCES]})
+        if GEMINI_CONTEXT_CACHE:
+            config = gemini_context_cache.cached_config(llm, config)
+        return config
+
+    call = llm.call
+
+    def call_with_usage(messages, *args, **kwargs):
+        if getattr(_sink, "usage", None) is not None:
+            return call(messages, *args, **kwargs)  # routed: RoutingLLM records it
+        with capture_usage() as usage:
+            result = call(messages, *args, **kwargs)
+        from_agent = kwargs.get("from_agent")
+        prompt_cache_ledger.record(run_id_of(from_agent), name, usage, agent_role_of(from_agent))
+        return result
+
+    llm._extract_token_usage = extract_token_usage
+    llm._prepare_generation_config = prepare_generation_config
+    llm.call = call_with_usage
+
+    if hasattr(llm, "_handle_streaming_completion"):
+        handle_streaming = llm._handle_streaming_completion
+
+        def handle_streaming_completion(*args, **kwargs):
+            result = handle_streaming(*args, **kwargs)
+            return llm._apply_stop_words(result) if isinstance(result, str) else result
+
+        llm._handle_streaming_completion = handle_streaming_completion
+
+    models = getattr(getattr(llm, "client", None), "models", None)
+    if models is not None and hasattr(models, "generate_content_stream"):
+        stream = models.generate_content_stream
+
+        def generate_content_stream(**kwargs):
+            # Usage metadata is cumulative, the last chunk carrying it has the
+            # totals. Reported even if the consumer stops early or the stream fails
+            last = None
+            try:
+                for chunk in stream(**kwargs):
+                    if getattr(chunk, "usage_metadata", None) is not None:
+                        last = chunk
+                    yield chunk
+            finally:
+                if last is not None:
+                    extract_token_usage(last)
+
+        models.generate_content_stream = generate_content_stream
+    return llm
+
+
+# Per-run / per-model ledger
+# =============================================================================
+
+class _Totals:
+    __slots__ = ("calls", "input_tokens", "cached_tokens", "output_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+
+    def add(self, usage: CallUsage):
+        self.calls += 1
+        self.input_tokens += usage.input_tokens
+        self.cached_tokens += usage.cached_tokens
+        self.output_tokens += usage.output_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_tokens,
+            "uncached_input_tokens": self.input_tokens - self.cached_tokens,
+            "cached_ratio": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class PromptCacheLedger:
+    """Token usage per crew run (by crew id) and per model, thread-safe"""
+
+    def __init__(self):
+        self._runs: dict = defaultdict(_Totals)
+        self._run_agents: dict = defaultdict(lambda: defaultdict(_Totals))   # run → agent role → totals
+        self._models: dict = defaultdict(_Totals)
+        self._recent = deque(maxlen=_RECENT_RUNS)
+        self._lock = threading.Lock()
+
+    def record(self, run_id: Optional[str], model: str, usage: CallUsage, agent: Optional[str] = None):
+        with self._lock:
+            self._models[model].add(usage)
+            if run_id is not None:
+                self._runs[run_id].add(usage)
+                self._run_agents[run_id][agent or "unknown"].add(usage)
+
+    def finish_run(self, run_id: str, label: str) -> dict:
+        """Pop the run's totals, log them and keep them for /stats"""
+        with self._lock:
+            totals = self._runs.pop(run_id, None) or _Totals()
+            agents = self._run_agents.pop(run_id, None) or {}
+            report = {"run": label, **totals.as_dict(),
+                      "agents": {role: t.as_dict() for role, t in agents.items()}}
+            self._recent.append(report)
+        print(f"Prompt cache [{label}]: {report['input_tokens']:,} input tokens, "
+              f"{report['cached_input_tokens']:,} cached / {report['uncached_input_tokens']:,} uncached "
+              f"({report['cached_ratio']:.0%}) over {report['calls']} LLM calls")
+        return report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "gemini_context_cache": gemini_context_cache.stats(),
+                "models": {m: t.as_dict() for m, t in self._models.items()},
+                "recent_runs": list(self._recent),
+            }
+
+
+prompt_cache_ledger = PromptCacheLedger()
+
+
+def run_id_of(from_agent) -> Optional[str]:
+    """Crew run an LLM call belongs to (crewAI sets agent.crew at kickoff)"""
+    crew = getattr(from_agent, "crew", None)
+    crew_id = getattr(crew, "id", None)
+    return str(crew_id) if crew_id is not None else None
+
+
+def agent_role_of(from_agent) -> Optional[str]:
+    role = getattr(from_agent, "role", None)
+    return role.strip() if isinstance(role, str) else None
+
+
+@contextmanager
+def track_run(crew, label: str):
+    """
+    Around crew.kickoff(): report the run's cached vs uncached input tokens.
+    Yields a dict that holds the run's report (incl. per-agent usage) afterwards.
+    """
+    report: dict = {}
+    try:
+        yield report
+    finally:
+        report.update(prompt_cache_ledger.finish_run(str(crew.id), label))
+
+
+def prompt_cache_stats() -> dict:
+    return prompt_cache_ledger.stats()
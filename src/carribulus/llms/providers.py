@@ -6,29 +6,50 @@ from crewai import LLM
 from dotenv import load_dotenv
 import os
 
+from carribulus.llms.prompt_cache import instrument_gemini
+
 load_dotenv()
 
+# Stream tokens from the LLM (emits LLMStreamChunkEvent → /chat/stream "token" events).
+# On by default: without it /chat/stream only gets agent / tool events, no tokens.
+# crewAI does not apply the ReAct stop words to streamed Gemini responses,
+# instrument_gemini() sends them as stop_sequences and truncates the result
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+
 # OpenRouter platform models (All models included paid and free)
 # u can refer to: https://openrouter.ai/models
 # ====================================================================================
-orouter = LLM(
-    model="openrouter/mistralai/mistral-small-3.1-24b-instruct:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
+def build_orouter() -> LLM:
+    return LLM(
+        model="openrouter/mistralai/mistral-small-3.1-24b-instruct:free",
+        base_url="https://openrouter.ai/api/v1",
+        api_key=os.getenv("OPENROUTER_API_KEY")
+    )
 
 # Hugging Face platform models (Open Source)
 # u can refer to: https://huggingface.co/models
 # ====================================================================================
-hf = LLM(
-    model="huggingface/Qwen/Qwen3-VL-8B-Instruct:novita"
-)
+def build_hf() -> LLM:
+    return LLM(
+        model="huggingface/Qwen/Qwen3-VL-8B-Instruct:novita"
+    )
 
 # Google AI Studio platform models (Gemini)
 # u can refer to: https://ai.google.dev/
 # I used the most for this, becuz it is powerful, fast, free and have high limit quota.
 # =====================================================================================
-gm = LLM(
-    model="gemini/gemini-2.5-flash",
-    temperature=0.7
-)
+# Native Gemini SDK: implicit prefix caching, cached token counts (+ optional
+# explicit context cache), see prompt_cache.py
+def build_gm() -> LLM:
+    return instrument_gemini(LLM(
+        model="gemini/gemini-2.5-flash",
+        temperature=0.7,
+        stream=LLM_STREAMING
+    ), name="gm")
+
+
+# Shared instances. crewAI writes an agent's stop words onto the LLM it is
+# given, so routing.RoutingLLM builds its own instances (build_*) instead
+orouter = build_orouter()
+hf = build_hf()
+gm = build_gm()
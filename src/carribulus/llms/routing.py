@@ -0,0 +1,345 @@
+"""
+Latency-Adaptive LLM Routing
+
+Every agent was bound to ONE static LLM (mostly gm = gemini-2.5-flash), so
+when Gemini slowed down or rate-limited, every crew run slowed with it.
+Agents now get a RoutingLLM per role: a crewAI BaseLLM that forwards each
+call to one of the configured models (gm / orouter / hf) by policy:
+
+- pinned    only the first model (no failover)
+- failover  fixed order: the first model unless it errors, is rate-limited
+            (429) or is cooling down, then the next one
+- fastest   healthy models ordered by rolling median latency, failover on
+            errors. A model with too few samples counts as
+            LLM_UNMEASURED_LATENCY seconds (pessimistic): traffic stays on the
+            preferred model until it is slower than that or fails
+- balanced  spread calls over the healthy models, weighted by 1 / latency
+
+Per model (shared by all roles, a 429 on Gemini concerns everyone):
+rolling latency window, errors, 429s. A 429 puts the model in cooldown for
+LLM_RATE_LIMIT_COOLDOWN seconds, LLM_MAX_CONSECUTIVE_ERRORS errors in a row
+for LLM_ERROR_COOLDOWN seconds. Cooling models are skipped unless every
+candidate is cooling. Context-window errors are raised as-is (crewAI
+summarizes and retries those itself).
+
+Each role gets its own instances of its models (providers.build_*, built
+once per process and role): RoutingLLM sets the agent's stop words on the
+LLM before every call, and the shared gm / hf / orouter singletons are used
+by every agent and concurrent crews.
+
+Routing decisions (model chosen per role, failovers, exhausted) and the
+model health are exported, see llm_routing_stats().
+
+Config (.env):
+    LLM_ROUTING_ENABLED=true
+    LLM_POLICY_MANAGER=failover:gm,orouter     # policy:models, first = preferred
+    LLM_POLICY_EXPERT=fastest:gm,orouter
+    LLM_POLICY_VISION=failover:hf,gm
+    LLM_LATENCY_WINDOW=50
+    LLM_UNMEASURED_LATENCY=15                  # seconds assumed for unmeasured models
+    LLM_RATE_LIMIT_COOLDOWN=30                 # seconds
+    LLM_ERROR_COOLDOWN=30
+    LLM_MAX_CONSECUTIVE_ERRORS=3
+"""
+import os
+import time
+import random
+import statistics
+import threading
+from collections import defaultdict, deque
+from typing import Any, Optional
+
+from crewai import BaseLLM
+from crewai.utilities.exceptions.context_window_exceeding_exception import (
+    LLMContextLengthExceededError,
+)
+
+from carribulus.llms.providers import gm, hf, orouter, build_gm, build_hf, build_orouter
+from carribulus.llms.prompt_cache import (
+    capture_usage, usage_callback, prompt_cache_ledger, run_id_of, agent_role_of,
+)
+
+LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", "true").lower() == "true"
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "50"))
+LLM_RATE_LIMIT_COOLDOWN = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN", "30"))
+LLM_UNMEASURED_LATENCY = float(os.getenv("LLM_UNMEASURED_LATENCY", "15"))
+LLM_ERROR_COOLDOWN = float(os.getenv("LLM_ERROR_COOLDOWN", "30"))
+LLM_MAX_CONSECUTIVE_ERRORS = int(os.getenv("LLM_MAX_CONSECUTIVE_ERRORS", "3"))
+
+# Configured models by the names used in providers.py
+MODELS = {"gm": gm, "hf": hf, "orouter": orouter}
+MODEL_BUILDERS = {"gm": build_gm, "hf": build_hf, "orouter": build_orouter}
+
+POLICIES = ("pinned", "failover", "fastest", "balanced")
+
+# Role → default "policy:models". The manager stays on the strongest model.
+DEFAULT_POLICIES = {
+    "manager": "failover:gm,orouter",
+    "expert": "fastest:gm,orouter",
+    "vision": "failover:hf,gm",
+}
+
+# Fewer successful samples than this → latency unknown (LLM_UNMEASURED_LATENCY)
+_MIN_SAMPLES = 3
+
+
+def _parse_policy(spec: str) -> Optional[tuple]:
+    """'fastest:gm,orouter' → ('fastest', ['gm', 'orouter']), None if invalid"""
+    policy, _, names = spec.partition(":")
+    policy = policy.strip().lower()
+    models = [n.strip() for n in names.split(",") if n.strip() in MODELS]
+    return (policy, models) if policy in POLICIES and models else None
+
+
+def role_policy(role: str) -> tuple:
+    """LLM_POLICY_<ROLE> (or the default) → (policy, [model names])"""
+    default = DEFAULT_POLICIES.get(role, "pinned:gm")
+    spec = os.getenv(f"LLM_POLICY_{role.upper()}", default)
+    parsed = _parse_policy(spec)
+    if parsed is None:
+        print(f"Invalid LLM_POLICY_{role.upper()}={spec!r}, using {default}")
+        parsed = _parse_policy(default)
+    return parsed
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429 or str(status) == "429":
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "resource_exhausted" in text or "quota" in text
+
+
+# Model health
+# =============================================================================
+
+class _ModelStats:
+    __slots__ = ("latencies", "calls", "errors", "rate_limited", "consecutive_errors", "cooldown_until")
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)   # seconds, successful calls
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+
+
+class _RoleStats:
+    __slots__ = ("policy", "decisions", "failovers", "exhausted")
+
+    def __init__(self):
+        self.policy = ""
+        self.decisions: dict = defaultdict(int)   # model → calls answered
+        self.failovers = 0
+        self.exhausted = 0
+
+
+class ModelHealth:
+    """Per-model latency / error / 429 windows and per-role decisions, thread-safe"""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self._models: dict = defaultdict(lambda: _ModelStats(window))
+        self._roles: dict = defaultdict(_RoleStats)
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float, outcome: str):
+        """outcome: ok | error | rate_limited"""
+        now = time.time()
+        with self._lock:
+            s = self._models[model]
+            s.calls += 1
+            if outcome == "ok":
+                s.latencies.append(seconds)
+                s.consecutive_errors = 0
+                return
+            s.errors += 1
+            s.consecutive_errors += 1
+            if outcome == "rate_limited":
+                s.rate_limited += 1
+                s.cooldown_until = max(s.cooldown_until, now + LLM_RATE_LIMIT_COOLDOWN)
+            elif s.consecutive_errors >= LLM_MAX_CONSECUTIVE_ERRORS:
+                s.cooldown_until = max(s.cooldown_until, now + LLM_ERROR_COOLDOWN)
+
+    def register(self, role: str, policy: str, models: list):
+        with self._lock:
+            self._roles[role].policy = f"{policy}:{','.join(models)}"
+
+    def record_decision(self, role: str, model: str, failover: bool):
+        with self._lock:
+            r = self._roles[role]
+            r.decisions[model] += 1
+            r.failovers += 1 if failover else 0
+
+    def record_exhausted(self, role: str):
+        with self._lock:
+            self._roles[role].exhausted += 1
+
+    def _latency(self, s: _ModelStats) -> float:
+        # Caller holds _lock
+        return statistics.median(s.latencies) if len(s.latencies) >= _MIN_SAMPLES else LLM_UNMEASURED_LATENCY
+
+    def order(self, policy: str, models: list) -> list:
+        """Models in the order they should be tried for this call"""
+        if policy == "pinned":
+            return models[:1]
+        now = time.time()
+        with self._lock:
+            ready = [m for m in models if self._models[m].cooldown_until <= now]
+            cooling = [m for m in models if m not in ready]
+            if policy in ("fastest", "balanced"):
+                # Unmeasured models count as slow: the first traffic stays on the
+                # preferred model, the others are only tried when it is slower
+                # than LLM_UNMEASURED_LATENCY (or fails)
+                latency = {m: self._latency(self._models[m]) for m in ready}
+                ready.sort(key=lambda m: (latency[m], models.index(m)))
+                if policy == "balanced" and len(ready) > 1:
+                    weights = [1 / max(latency[m], 0.05) for m in ready]
+                    first = random.choices(ready, weights=weights)[0]
+                    ready.remove(first)
+                    ready.insert(0, first)
+            # Cooling models last (earliest end of cooldown first), as a last resort
+            cooling.sort(key=lambda m: self._models[m].cooldown_until)
+        return ready + cooling
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            models = {}
+            for name, s in self._models.items():
+                latencies = sorted(s.latencies)
+                models[name] = {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "rate_limited": s.rate_limited,
+                    "error_rate": round(s.errors / s.calls, 3) if s.calls else 0.0,
+                    "cooling_down_s": round(max(0.0, s.cooldown_until - now), 1),
+                    "p50_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000)
+                              if latencies else None,
+                }
+            roles = {
+                role: {
+                    "policy": r.policy,
+                    "decisions": dict(r.decisions),
+                    "failovers": r.failovers,
+                    "exhausted": r.exhausted,
+                }
+                for role, r in self._roles.items()
+            }
+        return {"models": models, "roles": roles}
+
+
+model_health = ModelHealth()
+
+
+def llm_routing_stats() -> dict:
+    return {"enabled": LLM_ROUTING_ENABLED, **model_health.stats()}
+
+
+# Routing LLM
+# =============================================================================
+
+_role_llms: dict = {}   # (role, model name) → LLM instance
+_role_llms_lock = threading.Lock()
+
+
+def _role_llm(role: str, name: str):
+    """The role's own instance of a configured model (a Gemini client takes ~130 ms to build)"""
+    with _role_llms_lock:
+        llm = _role_llms.get((role, name))
+        if llm is None:
+            llm = _role_llms[(role, name)] = MODEL_BUILDERS[name]()
+        return llm
+
+
+class RoutingLLM(BaseLLM):
+    """
+    BaseLLM that forwards every call to one of several configured LLMs.
+    Capabilities (function calling, stop words) are the preferred model's,
+    the context window is the smallest one (any model may end up answering).
+    """
+
+    def __init__(self, role: str, policy: str, models: list):
+        primary = MODELS[models[0]]
+        super().__init__(
+            model=primary.model,
+            temperature=getattr(primary, "temperature", None),
+            provider=getattr(primary, "provider", None),
+        )
+        self.role = role
+        self.policy = policy
+        self.models = models
+        # Role's own instances: llm.stop is written before each call (see module docstring)
+        self.llms = {name: _role_llm(role, name) for name in models}
+        model_health.register(role, policy, models)
+
+    def call(
+        self,
+        messages,
+        tools: Optional[list] = None,
+        callbacks: Optional[list] = None,
+        available_functions: Optional[dict] = None,
+        from_task: Any = None,
+        from_agent: Any = None,
+    ) -> Any:
+        order = model_health.order(self.policy, self.models)
+        last_error: Optional[Exception] = None
+
+        for attempt, name in enumerate(order):
+            llm = self.llms[name]
+            # crewAI sets the agent's stop words on the LLM it holds (this one)
+            llm.stop = list(self.stop)
+            start = time.perf_counter()
+            try:
+                # Token usage (incl. cached input) of this call, see prompt_cache.py
+                with capture_usage() as usage:
+                    result = llm.call(
+                        messages,
+                        tools=tools,
+                        callbacks=[*(callbacks or []), usage_callback],
+                        available_functions=available_functions,
+                        from_task=from_task,
+                        from_agent=from_agent,
+                    )
+            except LLMContextLengthExceededError:
+                raise
+            except Exception as e:
+                outcome = "rate_limited" if _is_rate_limit(e) else "error"
+                model_health.record(name, time.perf_counter() - start, outcome)
+                last_error = e
+                if attempt + 1 < len(order):
+                    print(f"LLM routing [{self.role}]: {name} failed ({outcome}: {str(e)[:120]}), "
+                          f"failing over to {order[attempt + 1]}")
+                continue
+
+            model_health.record(name, time.perf_counter() - start, "ok")
+            model_health.record_decision(self.role, name, failover=attempt > 0)
+            prompt_cache_ledger.record(run_id_of(from_agent), name, usage, agent_role_of(from_agent))
+            self._track_token_usage_internal({
+                "prompt_tokens": usage.input_tokens,
+                "completion_tokens": usage.output_tokens,
+                "cached_prompt_tokens": usage.cached_tokens,
+            })
+            return result
+
+        model_health.record_exhausted(self.role)
+        raise last_error if last_error else RuntimeError(f"No LLM available for role {self.role}")
+
+    def supports_function_calling(self) -> bool:
+        return MODELS[self.models[0]].supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return MODELS[self.models[0]].supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return min(MODELS[name].get_context_window_size() for name in self.models)
+
+
+def routed_llm(role: str):
+    """The LLM for an agent of this role (a fresh RoutingLLM per agent, or the
+    preferred model itself when routing is disabled)"""
+    policy, models = role_policy(role)
+    if not LLM_ROUTING_ENABLED:
+        return MODELS[models[0]]
+    return RoutingLLM(role, policy, models)
@@ -1,11 +1,11 @@
-import os
 import sys
 import warnings
 import time
 
 from datetime import datetime
 from dotenv import load_dotenv
-from carribulus.crew import Carribulus
+from carribulus.crew import Carribulus, build_crew
+from carribulus.tracing import setup_tracing
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -15,20 +15,13 @@ load_dotenv()
 # =============================================================================
 # I've set ENABLE_TRACING=true in the .env, so auto tracing is enabled by default.
 # U can set ENABLE_TRACING=false if don't want to use MLflow tracing.
+# Traces are exported in the background with sampling, see tracing.py
 #
 # Command to open monitoring interface (copy & run in terminal):
 #   mlflow ui --backend-store-uri sqlite:///mlflow.db --workers 1
 #   Then open this: http://127.0.0.1:5000
 
-if os.getenv("ENABLE_TRACING", "true").lower() == "true":
-    import mlflow
-    
-    mlflow.set_tracking_uri("sqlite:///mlflow.db")
-    
-    mlflow.crewai.autolog()
-    mlflow.set_experiment("Carribulus-TravelAgent")
-    print("📊 MLflow Tracing: ENABLED [sqlite:///mlflow.db]")
-else:
+if not setup_tracing():
     print("📊 MLflow Tracing: DISABLED")
 
 
@@ -91,7 +84,7 @@ def run():
             # Track execution time
             start_time = time.time()
             
-            crew_instance = Carribulus().crew()
+            crew_instance = build_crew()
             result = crew_instance.kickoff(inputs=inputs)
             
             end_time = time.time()
@@ -175,7 +168,7 @@ def run_with_trigger():
     }
 
     try:
-        result = Carribulus().crew().kickoff(inputs=inputs)
+        result = build_crew().kickoff(inputs=inputs)
         return result
     except Exception as e:
         raise Exception(f"An error occurred while running the crew with trigger: {e}")
@@ -0,0 +1,369 @@
+"""
+Request Stage Timing + Prometheus Metrics
+
+The only timing we had was the execution time printed by the CLI. The hot
+path is now instrumented per stage:
+
+    session_load → route → direct_reply | response_cache → queue → crew_build
+    → kickoff (per agent, per tool call) → session_save
+    (+ summary, off the request path)
+
+- /chat answers carry a `Server-Timing` header with the stages of THAT
+  request (visible in the browser devtools / curl -i), e.g.
+      session_load;dur=2.1, route;dur=0.3, response_cache;dur=4.0, queue;dur=0.0,
+      crew_build;dur=1.2, kickoff;dur=48210.5,
+      agent-local-guide;desc="Local Guide";dur=30211.0,
+      tool-search-the-internet;desc="Search the internet x3";dur=2950.2, ...
+  Agent spans overlap (the manager's span contains its coworkers'), tool
+  durations are summed per tool.
+- GET /metrics (Prometheus text format 0.0.4): stage / agent / tool latency
+  histograms, tool calls, LLM tokens per agent, cache hits and misses,
+  crew queue depth
+
+Crew-side timings are collected INSIDE the worker (RunProfiler, fed by the
+crew event bus, see crew_events.py) and returned with the result as a plain
+dict, so they survive the process pool too.
+
+Tokens per agent come from the per-call usage ledger (llms/prompt_cache.py):
+crew_output.token_usage sums the LLM instances' lifetime counters, and those
+LLMs are shared by every run (crew.build_crew copies agents, not LLMs).
+Routed LLMs and the native Gemini model (also with LLM_ROUTING_ENABLED=false)
+report per-call usage.
+
+No prometheus_client dependency: the few metric types needed are kept here,
+thread-safe, like the other runtime stats.
+
+Config (.env):
+    METRICS_ENABLED=true       # GET /metrics
+    SERVER_TIMING=true         # Server-Timing header on /chat
+"""
+import os
+import re
+import time
+import math
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+# Seconds. Stages go from sub-millisecond lookups to multi-minute crew runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+# Metric types
+# =============================================================================
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values: dict = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values → [bucket counts..., sum, count]
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        for key, series in values:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}"
+
+
+class Collected:
+    """
+    Metric read at scrape time from existing stats (caches, crew pool):
+    collect() returns [(labels dict, value), ...]
+    """
+
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], list]):
+        self.name = name
+        self.help = help
+        self.kind = kind   # counter | gauge
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        try:
+            samples = self.collect()
+        except Exception as e:
+            print(f"Metric {self.name} collection failed: {e}")
+            return
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in samples:
+            names = tuple(labels)
+            yield f"{self.name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collected(self, name: str, help: str, kind: str, collect: Callable[[], list]) -> Collected:
+        return self.register(Collected(name, help, kind, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    "carribulus_stage_seconds", "Request hot-path stage latency", ("stage",))
+agent_seconds = registry.histogram(
+    "carribulus_agent_seconds", "Agent execution latency (manager spans include delegated work)", ("agent",))
+tool_seconds = registry.histogram(
+    "carribulus_tool_seconds", "Tool call latency", ("tool",))
+tool_calls = registry.counter(
+    "carribulus_tool_calls_total", "Tool calls by outcome (ok | cached | error)", ("tool", "outcome"))
+llm_tokens = registry.counter(
+    "carribulus_llm_tokens_total", "LLM tokens per agent (input includes cached_input)", ("agent", "kind"))
+requests_total = registry.counter(
+    "carribulus_requests_total", "Chat requests by endpoint and route", ("endpoint", "route"))
+
+
+# Per-request stage timing (Server-Timing)
+# =============================================================================
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "unnamed"
+
+
+class StageTimings:
+    """Stages of one request, in order, rendered as a Server-Timing header"""
+
+    __slots__ = ("started_at", "_entries")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._entries: list = []   # (metric name, seconds, description)
+
+    def add(self, name: str, seconds: float, desc: Optional[str] = None):
+        self._entries.append((name, seconds, desc))
+
+    def add_run(self, profile: Optional[dict]):
+        """Crew-side stages of a RunProfiler profile (queue, build, kickoff, agents, tools)"""
+        if not profile:
+            return
+        for name in ("queue", "crew_build", "kickoff"):
+            if profile.get(name) is not None:
+                self.add(name, profile[name])
+        for role, seconds in profile.get("agents", {}).items():
+            self.add(f"agent-{_slug(role)}", seconds, role)
+        for tool, t in profile.get("tools", {}).items():
+            self.add(f"tool-{_slug(tool)}", sum(t["seconds"]), f"{tool} x{t['calls']}")
+
+    def header(self) -> str:
+        parts = []
+        for name, seconds, desc in self._entries:
+            desc_part = f';desc="{_escape(desc)}"' if desc else ""
+            parts.append(f"{name}{desc_part};dur={seconds * 1000:.1f}")
+        parts.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Timings of the request being handled (each request runs in its own task)
+_request_timings: ContextVar[Optional[StageTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timing() -> StageTimings:
+    timings = StageTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[StageTimings]:
+    return _request_timings.get()
+
+
+@contextmanager
+def stage(name: str):
+    """Time a hot-path stage: histogram + the current request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stage_seconds.observe(seconds, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+
+# Crew-side profile (collected in the worker)
+# =============================================================================
+
+class RunProfiler:
+    """
+    Crew build / kickoff time, per-agent and per-tool time of ONE crew run,
+    fed by crew events (see crew_events.CrewEventStream). Runs in the worker,
+    profile() is a plain dict the API process turns into metrics.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.stages: dict = {}
+        self.agents: dict = defaultdict(float)
+        self.tools: dict = {}
+        self.tokens: dict = {}
+        self._open_agents: dict = defaultdict(list)   # role → start times (agents can nest)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - start
+
+    def _tool(self, name: str) -> dict:
+        # Caller holds _lock
+        return self.tools.setdefault(name, {"calls": 0, "cached": 0, "errors": 0, "seconds": []})
+
+    def observe(self, event: dict):
+        kind = event.get("type")
+        now = time.perf_counter()
+        with self._lock:
+            if kind == "agent_started":
+                self._open_agents[event.get("agent") or "unknown"].append(now)
+            elif kind == "agent_finished":
+                starts = self._open_agents.get(event.get("agent") or "unknown")
+                if starts:
+                    self.agents[event.get("agent") or "unknown"] += now - starts.pop()
+            elif kind == "tool_finished":
+                tool = self._tool(event.get("tool") or "unknown")
+                tool["calls"] += 1
+                tool["cached"] += 1 if event.get("from_cache") else 0
+                if event.get("duration_s") is not None:
+                    tool["seconds"].append(event["duration_s"])
+            elif kind == "tool_error":
+                tool = self._tool(event.get("tool") or "unknown")
+                tool["calls"] += 1
+                tool["errors"] += 1
+
+    def observer(self, on_event: Optional[Callable[[dict], None]]) -> Callable[[dict], None]:
+        """Event callback feeding this profile, then on_event (if any)"""
+        if on_event is None:
+            return self.observe
+
+        def forward(event: dict):
+            self.observe(event)
+            on_event(event)
+        return forward
+
+    def profile(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                **self.stages,
+                "agents": dict(self.agents),
+                "tools": {name: {**t, "seconds": list(t["seconds"])} for name, t in self.tools.items()},
+                "tokens": dict(self.tokens),
+            }
+
+
+def record_run(profile: Optional[dict]):
+    """Crew run profile → metrics (once per run, not per coalesced request)"""
+    if not profile:
+        return
+    for name in ("queue", "crew_build", "kickoff"):
+        if profile.get(name) is not None:
+            stage_seconds.observe(profile[name], stage=name)
+    for role, seconds in profile.get("agents", {}).items():
+        agent_seconds.observe(seconds, agent=role)
+    for tool, t in profile.get("tools", {}).items():
+        for seconds in t["seconds"]:
+            tool_seconds.observe(seconds, tool=tool)
+        ok = t["calls"] - t["cached"] - t["errors"]
+        for outcome, count in (("ok", ok), ("cached", t["cached"]), ("error", t["errors"])):
+            if count > 0:
+                tool_calls.inc(count, tool=tool, outcome=outcome)
+    for role, usage in profile.get("tokens", {}).items():
+        for kind in ("input_tokens", "cached_input_tokens", "output_tokens"):
+            if usage.get(kind):
+                llm_tokens.inc(usage[kind], agent=role, kind=kind.removesuffix("_tokens"))
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,91 @@
+"""
+Fast-Path Request Router
+
+Every message used to go through the hierarchical crew (Gemini manager,
+max_iter=25, delegation round-trips), even a "Hello". The router picks the
+cheapest path that can answer the request (see intent.py):
+
+- direct:  greetings / chit-chat  → one small LLM call, no crew at all
+- expert:  single-domain question → that expert alone, sequential crew
+- planning: detailed trip planning (explicit "plan" / "itinerary" / number
+            of days) → transport / local / news research in parallel, then
+            the manager compiles (PLANNING_MODE=parallel)
+- manager: multi-domain, trip planning or vague → full hierarchical crew
+
+Vague requests ("I want to travel", "help me plan a trip") stay with the
+manager, which asks the clarifying questions; short replies to those
+questions ("ok", "great") go back to the manager too, not the direct path.
+Two-domain questions without an itinerary signal ("hotel near the temples")
+also go to the manager rather than the full planning fan-out.
+
+Config (.env):
+    ROUTER_ENABLED=true       # false = everything goes to the manager
+    PLANNING_MODE=parallel    # parallel | manager (planning via the hierarchical crew)
+"""
+import os
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from carribulus.intent import classify_intent, domain_scores
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+PLANNING_MODE = os.getenv("PLANNING_MODE", "parallel").lower()
+
+# Intent → expert agent (method name in crew.py)
+INTENT_EXPERTS = {
+    "transport": "transport_expert",
+    "local": "local_guide",
+    "news": "news_analyst",
+    "vision": "vision_translator",
+}
+
+
+class Route(NamedTuple):
+    path: str                     # "direct" | "expert" | "planning" | "manager"
+    intent: str                   # see intent.classify_intent
+    expert: Optional[str] = None  # set for the "expert" path
+
+
+# Requests per path / expert, for /stats
+_path_counts: Counter = Counter()
+_expert_counts: Counter = Counter()
+
+
+def route_request(topic: str, previous_reply: str = "") -> Route:
+    """Pick the execution path for a user message (previous_reply: last assistant turn)"""
+    route = _pick_route(topic, previous_reply)
+    _path_counts[route.path] += 1
+    if route.expert:
+        _expert_counts[route.expert] += 1
+    return route
+
+
+def _pick_route(topic: str, previous_reply: str = "") -> Route:
+    intent = classify_intent(topic, previous_reply)
+    if not ROUTER_ENABLED:
+        return Route("manager", intent)
+    if intent == "greeting":
+        return Route("direct", intent)
+    if intent in INTENT_EXPERTS:
+        return Route("expert", intent, INTENT_EXPERTS[intent])
+    if intent == "planning" and PLANNING_MODE == "parallel" and _detailed_plan(topic):
+        return Route("planning", intent)
+    return Route("manager", intent)
+
+
+def _detailed_plan(topic: str) -> bool:
+    """
+    An explicit itinerary request ("plan", "itinerary", a number of days) with
+    more than the bare signal (a duration or topics to cover): worth fanning out
+    """
+    scores = domain_scores(topic)
+    return scores["planning"] >= 1 and sum(scores.values()) >= 2
+
+
+def router_stats() -> dict:
+    return {
+        "enabled": ROUTER_ENABLED,
+        "planning_mode": PLANNING_MODE,
+        "paths": dict(_path_counts),
+        "experts": dict(_expert_counts),
+    }
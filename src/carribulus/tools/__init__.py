@@ -6,6 +6,13 @@ Organized by provider:
 - tavily_tools: Tavily (deep search)
 - serpapi_tools: SerpAPI (Google Flights, Hotels)
 - vision_tools: Image analysis (Gemini, HuggingFace, OpenRouter)
+- hedged_vision: one vision tool over all three (fastest healthy provider, hedged requests)
+
+All of them share one pooled HTTP client (http_pool); search tools cache
+their results with a per-tool TTL (tool_cache) and compact their output to
+a per-tool token budget (compaction). Vision tools load images through one
+size-limited, downscaling loader (image_loader) and cache answers by image
+content + question (vision_cache).
 """
 
 # Serper.dev tools
@@ -13,6 +20,7 @@ from carribulus.tools.serper_tools import (
     serper_search,      # General search (buses, trains, etc.)
     serper_places,      # Google Places (attractions, restaurants)
     serper_news,        # News search (events, safety)
+    SerperSearchTool,
     SerperNewsTool,
 )
 
@@ -27,6 +35,40 @@ from carribulus.tools.serpapi_tools import (
     serpapi_hotels,     # Google Hotels (precise pricing)
 )
 
+# Shared HTTP transport
+from carribulus.tools.http_pool import (
+    http_client,
+    async_http_client,
+    run_io,
+    await_io,
+    http_stats,
+    close_http_clients,
+)
+
+# Persistent tool-result cache
+from carribulus.tools.tool_cache import (
+    tool_cache,
+    cached_tool,
+)
+
+# Token-budgeted output compaction
+from carribulus.tools.compaction import (
+    compacted_output,
+    compaction_stats,
+)
+
+# Shared image loader for the vision tools
+from carribulus.tools.image_loader import (
+    load_image,
+    image_stats,
+)
+
+# Content-addressed vision result cache
+from carribulus.tools.vision_cache import (
+    vision_cache,
+    cached_vision,
+)
+
 # Vision tools
 from carribulus.tools.vision_tools import (
     gemini_vision,      # Gemini Flash series - recommend, high quota
@@ -34,19 +76,47 @@ from carribulus.tools.vision_tools import (
     openrouter_vision,  # OpenRouter NVIDIA/nemotron VL
 )
 
+# Composite vision tool (latency-aware provider selection + hedged requests)
+from carribulus.tools.hedged_vision import (
+    hedged_vision,
+    hedged_vision_stats,
+)
+
 __all__ = [
     # Serper
     "serper_search",
     "serper_places",
     "serper_news",
+    "SerperSearchTool",
     "SerperNewsTool",
     # Tavily
     "tavily_search",
     # SerpAPI
     "serpapi_flights",
     "serpapi_hotels",
+    # HTTP transport
+    "http_client",
+    "async_http_client",
+    "run_io",
+    "await_io",
+    "http_stats",
+    "close_http_clients",
+    # Tool-result cache
+    "tool_cache",
+    "cached_tool",
+    # Output compaction
+    "compacted_output",
+    "compaction_stats",
+    # Image loader
+    "load_image",
+    "image_stats",
+    # Vision result cache
+    "vision_cache",
+    "cached_vision",
     # Vision
     "gemini_vision",
     "huggingface_vision",
     "openrouter_vision",
+    "hedged_vision",
+    "hedged_vision_stats",
 ]
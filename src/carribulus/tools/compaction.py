@@ -0,0 +1,407 @@
+"""
+Token-Budgeted Tool Output Compaction
+
+Tool outputs go into the agent's context verbatim and are re-sent on every
+ReAct iteration (advanced Tavily search alone returned ~10 long results as
+indented JSON). Search tools now pass their output through a compaction
+stage before the agent sees it (@compacted_output on `_arun`, outside the
+tool cache, so budget changes apply to cached results too):
+
+1. Tavily-style JSON → plain result blocks (title, content, url)
+2. Lines / sentences made up ENTIRELY of boilerplate dropped (cookie banners,
+   "subscribe", "all rights reserved", ...): content that merely mentions
+   "cookie" or "blog in" stays
+3. Repeated sentences and near-identical snippets deduped (word-set Jaccard),
+   repeated table headers dropped
+4. URLs replaced by [n] references, listed once at the end (tracking params stripped)
+5. Per-tool token budget: trailing (lowest ranked) results are cut to fit
+
+Every call logs tokens before/after; totals per tool are in compaction_stats()
+and each tool_finished event carries the numbers (see crew_events.py).
+Tokens are counted with tiktoken, loaded on a background thread at import
+(it may download its BPE file); a chars / 4 estimate is used until then.
+Error outputs are passed through untouched.
+
+Config (.env):
+    TOOL_COMPACTION_ENABLED=true
+    TOOL_TOKEN_BUDGET=1500                 # default budget per tool output
+    TOOL_TOKEN_BUDGET_TAVILY_SEARCH=1500   # override any tool's budget
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TOOL_COMPACTION_ENABLED = os.getenv("TOOL_COMPACTION_ENABLED", "true").lower() == "true"
+TOOL_TOKEN_BUDGET = int(os.getenv("TOOL_TOKEN_BUDGET", "1500"))
+
+# Default token budget per tool (see tool_cache.DEFAULT_TTLS for the names)
+DEFAULT_BUDGETS = {
+    "tavily_search": 1500,
+    "serper_search": 1200,
+    "serper_places": 1000,
+    "serper_news": 1200,
+    "serpapi_flights": 1500,
+    "serpapi_hotels": 1500,
+}
+
+# Outputs starting with these are failures, leave them alone
+_ERROR_PREFIXES = ("Error", "API Error", "❌")
+
+
+def tool_budget(tool: str) -> int:
+    override = os.getenv(f"TOOL_TOKEN_BUDGET_{tool.upper()}")
+    if override is not None:
+        return int(override)
+    return DEFAULT_BUDGETS.get(tool, TOOL_TOKEN_BUDGET)
+
+
+# Token counting
+# =============================================================================
+
+_encoder = None
+
+
+def _load_encoder():
+    """
+    tiktoken may download the cl100k BPE file on first use: load it on a
+    background thread at import, never on the shared tool I/O loop
+    """
+    global _encoder
+    try:
+        import tiktoken
+        _encoder = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        print("tiktoken unavailable, estimating tool output tokens as characters / 4.")
+
+
+threading.Thread(target=_load_encoder, name="tiktoken-load", daemon=True).start()
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken (cl100k) once loaded, else ~4 characters per token"""
+    encoder = _encoder
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+# Compaction steps
+# =============================================================================
+
+_URL = re.compile(r"https?://[^\s<>\"')\]]+")
+_MD_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^\s)]+)\)")
+# Boilerplate PHRASES: a line / sentence is dropped only if it consists entirely
+# of them (plus separators), never because one word of it appears in content
+# ("The famous cookie festival returns", "the blog in Penang")
+_BOILERPLATE_PHRASES = (
+    r"(accept|reject|allow|manage)( all| necessary)? cookies?( settings| preferences)?",
+    r"(this (web)?site|we) uses? cookies\b.{0,100}",
+    r"cookies? (policy|settings|preferences|consent)",
+    r"subscribe( now| today| here)?( to (our|the) newsletter)?",
+    r"sign (up|in)( now| here| for (our|the|a free) (newsletter|account))?",
+    r"log ?(in|out)( now| here)?",
+    r"(join|get|read) (our|the) newsletter",
+    r"newsletter( sign ?up)?",
+    r"(©|\(c\)|copyright) ?\d{4}.{0,80}",
+    r"(©|\(c\)|copyright)? ?.{0,60}all rights reserved",
+    r"privacy policy",
+    r"terms (of (use|service)|(and|&) conditions)",
+    r"skip to (main )?content",
+    r"(please )?enable javascript.{0,80}",
+    r"advertisement|sponsored( content)?",
+    r"click here( to [\w ]{0,40})?",
+    r"share (this( article| page| post)?|on \w+)",
+    r"follow us( on \w+)?",
+    r"download (our|the) app.{0,40}",
+    r"read more|see more|show more|load more",
+)
+_PHRASE = "(?:" + "|".join(f"(?:{p})" for p in _BOILERPLATE_PHRASES) + ")"
+_BOILERPLATE = re.compile(rf"[\W_]*{_PHRASE}(?:[\s|•·,/>-]+{_PHRASE})*[\W_]*", re.IGNORECASE)
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|msclkid|ref|ref_src|srsltid|ved|ei|sa|usg)$", re.IGNORECASE)
+_TABLE_SEPARATOR = re.compile(r"^\|[\s|:-]+\|$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Blocks with fewer words are never treated as near-duplicates (table rows, titles)
+_MIN_DEDUPE_WORDS = 8
+_DEDUPE_SIMILARITY = 0.8
+_BOILERPLATE_MAX_LEN = 120
+
+
+def _from_json(text: str) -> str:
+    """Search API JSON (e.g. Tavily) → result blocks; anything else unchanged"""
+    stripped = text.lstrip()
+    if not stripped.startswith("{"):
+        return text
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError:
+        return text
+    if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+        return text
+
+    blocks = []
+    if data.get("answer"):
+        blocks.append(f"Answer: {data['answer']}")
+    for item in data["results"]:
+        if not isinstance(item, dict):
+            continue
+        lines = [f"### {item.get('title', 'No title')}"]
+        if item.get("content"):
+            lines.append(str(item["content"]).strip())
+        if item.get("url"):
+            lines.append(item["url"])
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def _is_boilerplate(text: str) -> bool:
+    """The WHOLE text is boilerplate ("Accept all cookies", "Privacy Policy | Terms of Use")"""
+    text = text.strip()
+    return len(text) <= _BOILERPLATE_MAX_LEN and _BOILERPLATE.fullmatch(text) is not None
+
+
+def _drop_boilerplate(lines: list) -> list:
+    return [line for line in lines if line.startswith(("#", "|")) or not _is_boilerplate(line)]
+
+
+def _clean_paragraphs(lines: list) -> list:
+    """Long scraped paragraphs: drop boilerplate sentences and sentences already seen"""
+    seen = set()
+    cleaned = []
+    for line in lines:
+        if len(line) <= _BOILERPLATE_MAX_LEN or line.startswith("|"):
+            cleaned.append(line)
+            continue
+        sentences = []
+        for sentence in _SENTENCE_END.split(line):
+            key = re.sub(r"\W+", " ", sentence).strip().lower()
+            if _is_boilerplate(sentence):
+                continue
+            if len(key) >= 30:
+                if key in seen:
+                    continue
+                seen.add(key)
+            sentences.append(sentence)
+        if sentences:
+            cleaned.append(" ".join(sentences))
+    return cleaned
+
+
+def _drop_repeated_table_headers(lines: list) -> list:
+    """A second table with the same columns doesn't need its header again"""
+    seen = set()
+    kept = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        is_header = (line.startswith("|") and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]))
+        if is_header:
+            if line in seen:
+                i += 2
+                continue
+            seen.add(line)
+        kept.append(line)
+        i += 1
+    return kept
+
+
+def _words(block: str) -> frozenset:
+    return frozenset(w for w in re.findall(r"\w+", _URL.sub(" ", block).lower()) if len(w) > 2)
+
+
+def _dedupe_blocks(blocks: list) -> list:
+    kept, kept_words = [], []
+    for block in blocks:
+        words = _words(block)
+        if len(words) >= _MIN_DEDUPE_WORDS and any(
+            len(words & other) / len(words | other) >= _DEDUPE_SIMILARITY for other in kept_words
+        ):
+            continue
+        kept.append(block)
+        if len(words) >= _MIN_DEDUPE_WORDS:
+            kept_words.append(words)
+    return kept
+
+
+def _clean_url(url: str) -> str:
+    """Drop tracking query params and fragments (the link still works)"""
+    url = url.rstrip(".,;:")
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _reference_urls(blocks: list) -> tuple:
+    """Replace every URL with [n] (same URL → same n); returns (blocks, refs)"""
+    refs: "OrderedDict[str, int]" = OrderedDict()
+
+    def ref(url: str) -> str:
+        url = _clean_url(url)
+        if url not in refs:
+            refs[url] = len(refs) + 1
+        return f"[{refs[url]}]"
+
+    def replace(block: str) -> str:
+        block = _MD_LINK.sub(lambda m: f"{m.group(1)} {ref(m.group(2))}", block)
+        return _URL.sub(lambda m: ref(m.group(0)), block)
+
+    return [replace(b) for b in blocks], refs
+
+
+def _fit_budget(blocks: list, budget: int) -> tuple:
+    """Keep leading blocks (best ranked first) within budget; returns (blocks, lines dropped)"""
+    kept, used = [], 0
+    for index, block in enumerate(blocks):
+        cost = count_tokens(block) + 1
+        if used + cost <= budget:
+            kept.append(block)
+            used += cost
+            continue
+        # Partially keep the block that crosses the budget, line by line
+        lines = block.split("\n")
+        partial = []
+        for line in lines:
+            line_cost = count_tokens(line) + 1
+            if used + line_cost > budget:
+                # One long paragraph: keep its beginning (~4 characters per token)
+                room = budget - used
+                if room >= 20 and not line.startswith("|"):
+                    partial.append(line[:room * 3].rsplit(" ", 1)[0] + " …")
+                    used = budget
+                break
+            partial.append(line)
+            used += line_cost
+        if partial:
+            kept.append("\n".join(partial))
+        dropped = len(lines) - len([l for l in partial if not l.endswith(" …")]) + sum(b.count("\n") + 1 for b in blocks[index + 1:])
+        return kept, dropped
+    return kept, 0
+
+
+def compact(text: str, budget: int) -> str:
+    """Run the compaction steps on one tool output (see module docstring)"""
+    text = _from_json(text)
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    lines = _drop_repeated_table_headers(_clean_paragraphs(_drop_boilerplate(lines)))
+
+    blocks = [b.strip() for b in re.split(r"\n{2,}", "\n".join(lines)) if b.strip()]
+    blocks = _dedupe_blocks(blocks)
+    blocks, refs = _reference_urls(blocks)
+
+    # Reserve room for the reference list (upper bound: every reference kept)
+    ref_lines = {n: f"[{n}] {url}" for url, n in refs.items()}
+    ref_cost = count_tokens("\n".join(ref_lines.values())) if refs else 0
+    blocks, dropped = _fit_budget(blocks, max(budget // 2, budget - ref_cost))
+
+    body = "\n\n".join(blocks)
+    if dropped:
+        body += f"\n\n[{dropped} more lines omitted to fit the tool output budget]"
+    used = [n for n in ref_lines if f"[{n}]" in body]
+    if used:
+        body += "\n\nSources:\n" + "\n".join(ref_lines[n] for n in used)
+    return body
+
+
+# Stats
+# =============================================================================
+
+class _CompactionStats:
+    __slots__ = ("calls", "tokens_before", "tokens_after", "compaction_s")
+
+    def __init__(self):
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.compaction_s = 0.0
+
+
+_stats_lock = threading.Lock()
+_stats: dict = defaultdict(_CompactionStats)
+
+# Compacted output → its numbers, so the tool_finished event can report them
+_RECENT_SIZE = 256
+_recent: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _output_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def compaction_report(output) -> Optional[dict]:
+    """Token numbers of a recently compacted tool output (None if it wasn't)"""
+    if not isinstance(output, str):
+        return None
+    with _stats_lock:
+        return _recent.get(_output_key(output))
+
+
+def compaction_stats() -> dict:
+    with _stats_lock:
+        tools = {}
+        for tool, s in _stats.items():
+            tools[tool] = {
+                "calls": s.calls,
+                "tokens_before": s.tokens_before,
+                "tokens_after": s.tokens_after,
+                "tokens_saved": s.tokens_before - s.tokens_after,
+                "reduction": round(1 - s.tokens_after / s.tokens_before, 3) if s.tokens_before else 0.0,
+                "compaction_avg_ms": round(s.compaction_s / s.calls * 1000, 2) if s.calls else 0.0,
+                "budget": tool_budget(tool),
+            }
+    return {"enabled": TOOL_COMPACTION_ENABLED, "tools": tools}
+
+
+def _record(tool: str, before: int, after: int, elapsed: float, output: str):
+    report = {"tokens_before": before, "tokens_after": after}
+    with _stats_lock:
+        s = _stats[tool]
+        s.calls += 1
+        s.tokens_before += before
+        s.tokens_after += after
+        s.compaction_s += elapsed
+        _recent[_output_key(output)] = report
+        while len(_recent) > _RECENT_SIZE:
+            _recent.popitem(last=False)
+    print(f"Tool output compacted [{tool}]: {before} → {after} tokens "
+          f"(-{before - after}, {elapsed * 1000:.1f} ms)")
+
+
+def compact_output(tool: str, result):
+    """Compact one tool result (no-op for errors, non-strings or when disabled)"""
+    if not TOOL_COMPACTION_ENABLED or not isinstance(result, str) or not result or result.startswith(_ERROR_PREFIXES):
+        return result
+    started = time.perf_counter()
+    before = count_tokens(result)
+    compacted = compact(result, tool_budget(tool))
+    after = count_tokens(compacted)
+    _record(tool, before, after, time.perf_counter() - started, compacted)
+    return compacted
+
+
+def compacted_output(name: Optional[str] = None):
+    """
+    Compact the string output of a tool's `_arun` (async) or `_run` (sync).
+    Put it ABOVE @cached_tool: the cache keeps the full output.
+
+    name: budget name (e.g. "serper_news"); None = the tool's `cache_name`
+    """
+    def decorator(run):
+        if inspect.iscoroutinefunction(run):
+            @functools.wraps(run)
+            async def async_wrapper(self, *args, **kwargs):
+                return compact_output(name or self.cache_name, await run(self, *args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(run)
+        def wrapper(self, *args, **kwargs):
+            return compact_output(name or self.cache_name, run(self, *args, **kwargs))
+        return wrapper
+    return decorator
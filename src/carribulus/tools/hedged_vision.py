@@ -0,0 +1,314 @@
+"""
+Hedged Multi-Provider Vision Tool
+
+vision_translator was pinned to Hugging Face, and the free-tier vision
+endpoints have wildly variable tail latency. HedgedVisionTool puts all three
+providers (Gemini, Hugging Face, OpenRouter) behind one tool:
+
+- Rolling latency / error window per provider (last VISION_HEDGE_WINDOW calls)
+- The request goes to the fastest HEALTHY provider first (rolling median).
+  A provider is unhealthy after VISION_HEDGE_MAX_CONSECUTIVE_ERRORS failures
+  in a row (for VISION_PROVIDER_COOLDOWN seconds) or when more than half of
+  its recent calls failed; unhealthy providers are only used as a last resort.
+  Providers without enough samples yet are assumed to be as slow as the
+  default deadline, so they get tried once the known ones slow down
+- Hedge: no answer within the primary's p95 latency (clamped to
+  VISION_HEDGE_MIN_DELAY..VISION_HEDGE_MAX_DELAY, VISION_HEDGE_DEFAULT_DELAY
+  until there are samples) → the same request goes to the next provider,
+  the first answer wins and the other call is cancelled
+- Failover: a provider that errors is replaced by the next one immediately
+- The image is loaded, downscaled and base64-encoded ONCE (image_loader.py),
+  both requests send the same encoded payload; answers go through the
+  vision cache like the single-provider tools
+
+Config (.env):
+    VISION_PROVIDERS=gemini,huggingface,openrouter   # preference until there are samples
+    VISION_HEDGE_ENABLED=true
+    VISION_HEDGE_WINDOW=50
+    VISION_HEDGE_DEFAULT_DELAY=8        # seconds
+    VISION_HEDGE_MIN_DELAY=2
+    VISION_HEDGE_MAX_DELAY=30
+    VISION_HEDGE_MAX_CONSECUTIVE_ERRORS=3
+    VISION_PROVIDER_COOLDOWN=60         # seconds
+"""
+import os
+import time
+import asyncio
+import statistics
+import threading
+from collections import deque
+from typing import Type
+
+from pydantic import BaseModel
+from crewai.tools import BaseTool
+
+from carribulus.tools.http_pool import run_io
+from carribulus.tools.image_loader import LoadedImage
+from carribulus.tools.vision_cache import cached_vision
+from carribulus.tools.vision_tools import (
+    VisionToolInput,
+    gemini_vision,
+    huggingface_vision,
+    openrouter_vision,
+)
+
+VISION_PROVIDERS = [p.strip() for p in os.getenv("VISION_PROVIDERS", "gemini,huggingface,openrouter").split(",") if p.strip()]
+VISION_HEDGE_ENABLED = os.getenv("VISION_HEDGE_ENABLED", "true").lower() == "true"
+VISION_HEDGE_WINDOW = int(os.getenv("VISION_HEDGE_WINDOW", "50"))
+VISION_HEDGE_DEFAULT_DELAY = float(os.getenv("VISION_HEDGE_DEFAULT_DELAY", "8"))
+VISION_HEDGE_MIN_DELAY = float(os.getenv("VISION_HEDGE_MIN_DELAY", "2"))
+VISION_HEDGE_MAX_DELAY = float(os.getenv("VISION_HEDGE_MAX_DELAY", "30"))
+VISION_HEDGE_MAX_CONSECUTIVE_ERRORS = int(os.getenv("VISION_HEDGE_MAX_CONSECUTIVE_ERRORS", "3"))
+VISION_PROVIDER_COOLDOWN = float(os.getenv("VISION_PROVIDER_COOLDOWN", "60"))
+
+# Fewer successful samples than this → latency is unknown (default deadline is assumed)
+_MIN_SAMPLES = 3
+
+# Provider → (single-provider tool, API key env var)
+PROVIDERS = {
+    "gemini": (gemini_vision, "GEMINI_API_KEY"),
+    "huggingface": (huggingface_vision, "HF_TOKEN"),
+    "openrouter": (openrouter_vision, "OPENROUTER_API_KEY"),
+}
+
+_ERROR_PREFIXES = ("Error", "API Error", "❌")
+
+
+def _failed(answer) -> bool:
+    return not isinstance(answer, str) or not answer.strip() or answer.startswith(_ERROR_PREFIXES)
+
+
+# Rolling provider stats
+# =============================================================================
+
+class _ProviderStats:
+    __slots__ = ("latencies", "outcomes", "consecutive_errors", "last_error_at",
+                 "calls", "errors", "wins", "hedge_wins", "cancelled")
+
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)   # seconds, successful calls
+        self.outcomes = deque(maxlen=window)    # True = ok
+        self.consecutive_errors = 0
+        self.last_error_at = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self.hedge_wins = 0     # answered first as the hedged (second) request
+        self.cancelled = 0
+
+
+class ProviderHealth:
+    """Rolling latency / error windows, thread-safe"""
+
+    def __init__(self, providers: list, window: int = VISION_HEDGE_WINDOW):
+        self.providers = providers
+        self._stats = {p: _ProviderStats(window) for p in providers}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float, ok: bool):
+        with self._lock:
+            s = self._stats[provider]
+            s.calls += 1
+            s.outcomes.append(ok)
+            if ok:
+                s.latencies.append(seconds)
+                s.consecutive_errors = 0
+            else:
+                s.errors += 1
+                s.consecutive_errors += 1
+                s.last_error_at = time.time()
+
+    def record_cancelled(self, provider: str):
+        with self._lock:
+            self._stats[provider].cancelled += 1
+
+    def record_win(self, provider: str, hedge: bool):
+        with self._lock:
+            self._stats[provider].wins += 1
+            if hedge:
+                self._stats[provider].hedge_wins += 1
+
+    def _healthy(self, s: _ProviderStats, now: float) -> bool:
+        # Caller holds _lock
+        if (s.consecutive_errors >= VISION_HEDGE_MAX_CONSECUTIVE_ERRORS
+                and now - s.last_error_at < VISION_PROVIDER_COOLDOWN):
+            return False
+        recent = list(s.outcomes)[-10:]
+        return len(recent) < 4 or recent.count(False) * 2 <= len(recent)
+
+    def _expected_latency(self, s: _ProviderStats) -> float:
+        # Caller holds _lock
+        if len(s.latencies) < _MIN_SAMPLES:
+            return VISION_HEDGE_DEFAULT_DELAY
+        return statistics.median(s.latencies)
+
+    def ranked(self, available: list) -> list:
+        """Healthy providers fastest first, then the unhealthy ones"""
+        now = time.time()
+        with self._lock:
+            order = {p: i for i, p in enumerate(self.providers)}
+            return sorted(
+                available,
+                key=lambda p: (not self._healthy(self._stats[p], now),
+                               self._expected_latency(self._stats[p]), order[p]),
+            )
+
+    def hedge_delay(self, provider: str) -> float:
+        """p95 of the provider's recent successful latencies (clamped)"""
+        with self._lock:
+            latencies = sorted(self._stats[provider].latencies)
+        if len(latencies) < _MIN_SAMPLES:
+            return VISION_HEDGE_DEFAULT_DELAY
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return min(VISION_HEDGE_MAX_DELAY, max(VISION_HEDGE_MIN_DELAY, p95))
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            providers = {}
+            for p, s in self._stats.items():
+                latencies = sorted(s.latencies)
+                providers[p] = {
+                    "healthy": self._healthy(s, now),
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "wins": s.wins,
+                    "hedge_wins": s.hedge_wins,
+                    "cancelled": s.cancelled,
+                    "p50_ms": round(statistics.median(latencies) * 1000) if latencies else None,
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000)
+                              if latencies else None,
+                }
+        return providers
+
+
+provider_health = ProviderHealth([p for p in VISION_PROVIDERS if p in PROVIDERS])
+
+_counts = {"requests": 0, "hedged": 0, "failovers": 0, "all_failed": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+def hedged_vision_stats() -> dict:
+    with _counts_lock:
+        counts = dict(_counts)
+    return {"enabled": VISION_HEDGE_ENABLED, **counts, "providers": provider_health.stats()}
+
+
+# Hedged execution
+# =============================================================================
+
+async def _call(provider: str, key: str, image: LoadedImage, question: str) -> tuple:
+    tool = PROVIDERS[provider][0]
+    start = time.perf_counter()
+    try:
+        answer = await tool._analyze(key, image, question)
+    except asyncio.CancelledError:
+        provider_health.record_cancelled(provider)
+        raise
+    except Exception as e:
+        answer = f"Error calling {provider}: {str(e)}"
+    provider_health.record(provider, time.perf_counter() - start, ok=not _failed(answer))
+    return provider, answer
+
+
+async def analyze_hedged(image: LoadedImage, question: str, available: dict) -> str:
+    """
+    First answer from the ranked providers: hedge to the next one when the
+    current deadline passes, fail over immediately on errors. At most two
+    calls are in flight.
+    """
+    queue = provider_health.ranked(list(available))
+    _count("requests")
+    pending: set = set()
+    errors = []
+    hedged = False
+
+    def launch() -> str:
+        provider = queue.pop(0)
+        pending.add(asyncio.create_task(_call(provider, available[provider], image, question)))
+        return provider
+
+    first = current = launch()
+    try:
+        while pending:
+            # Only arm the hedge timer while a second call could still be started
+            can_hedge = VISION_HEDGE_ENABLED and queue and len(pending) < 2
+            timeout = provider_health.hedge_delay(current) if can_hedge else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                hedged = True
+                _count("hedged")
+                print(f"Vision hedge: no answer from {current} within {timeout:.1f}s, also asking {queue[0]}")
+                current = launch()
+                continue
+
+            for task in done:
+                provider, answer = task.result()
+                if not _failed(answer):
+                    provider_health.record_win(provider, hedge=hedged and provider != first)
+                    print(f"Vision answer from {provider}" + (" (hedged)" if hedged else ""))
+                    return answer
+                errors.append(f"{provider}: {answer}")
+                if queue and len(pending) < 2:
+                    _count("failovers")
+                    print(f"Vision failover: {provider} failed, trying {queue[0]}")
+                    current = launch()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    _count("all_failed")
+    return "Error: all vision providers failed. " + " | ".join(errors)
+
+
+# Composite tool
+# =============================================================================
+
+class HedgedVisionTool(BaseTool):
+    """
+    One vision tool over every configured provider (with an API key),
+    latency-aware selection + hedged requests, see module docstring.
+    """
+
+    name: str = "Analyze Image"
+    description: str = """Analyze and describe images (fastest available vision model, automatic fallback).
+
+    Accepts: Image URLs, local file paths, or base64 encoded images.
+    Use for: menu translation, sign reading, image description, visual content analysis.
+    """
+
+    args_schema: Type[BaseModel] = VisionToolInput
+
+    def _run(
+        self,
+        image_source: str,
+        question: str = "Describe the content of this image in detail."
+    ) -> str:
+        return run_io(self._arun(image_source, question))
+
+    async def _arun(
+        self,
+        image_source: str,
+        question: str = "Describe the content of this image in detail."
+    ) -> str:
+        available = {
+            provider: os.getenv(PROVIDERS[provider][1])
+            for provider in provider_health.providers
+            if os.getenv(PROVIDERS[provider][1])
+        }
+        if not available:
+            keys = ", ".join(PROVIDERS[p][1] for p in provider_health.providers)
+            return f"Error: no vision provider configured (set one of {keys})."
+
+        return await cached_vision(
+            "hedged", image_source, question,
+            lambda image: analyze_hedged(image, question, available)
+        )
+
+hedged_vision = HedgedVisionTool()
@@ -0,0 +1,255 @@
+"""
+Shared HTTP Transport for all tools
+
+Every tool used to call bare `requests.get/post` (and the HF tool built a
+new OpenAI client per call), so each tool call paid DNS + TCP + TLS again.
+All tools now share ONE pooled httpx client:
+
+- Per-host keep-alive connection pools (connections are reused across
+  tool calls, agents and crew runs in this process)
+- Async: tools implement `_arun` on a shared httpx.AsyncClient that lives
+  on ONE background event loop (the "tool I/O loop"). The blocking `_run`
+  just hands its coroutine to that loop (run_io), async callers await it
+  (await_io). Many crew runs overlap their network waits on one loop,
+  instead of a thread sitting in each 60-90s HTTP call.
+- Optional HTTP/2 (needs the `h2` package: pip install "httpx[http2]")
+- Connection reuse stats per host (new connections vs reused, TLS
+  handshakes, HTTP versions, time to first byte), see http_stats()
+
+Config (.env):
+    HTTP_MAX_CONNECTIONS=100      # open connections in total (all hosts)
+    HTTP_MAX_KEEPALIVE=20         # idle connections kept alive for reuse
+    HTTP_KEEPALIVE_EXPIRY=60      # seconds an idle connection is kept
+    HTTP_TIMEOUT=60               # default timeout (tools may override)
+    HTTP2=false
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Awaitable, Optional
+
+import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"
+
+# Browser-like UA, some image hosts refuse default client agents
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print('HTTP2=true but the h2 package is missing (pip install "httpx[http2]"), using HTTP/1.1.')
+        return False
+
+
+# Connection Reuse Stats
+# =============================================================================
+
+class _HostStats:
+    __slots__ = ("requests", "connections", "tls_handshakes", "errors", "ttfb_total", "versions")
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.errors = 0
+        self.ttfb_total = 0.0
+        self.versions = defaultdict(int)
+
+
+_stats_lock = threading.Lock()
+_host_stats: dict = defaultdict(_HostStats)
+
+
+def _trace_for(host: str):
+    """httpcore trace hook: counts new TCP connections / TLS handshakes per host"""
+    def trace(event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            with _stats_lock:
+                _host_stats[host].connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with _stats_lock:
+                _host_stats[host].tls_handshakes += 1
+    return trace
+
+
+def _async_trace_for(host: str):
+    sync_trace = _trace_for(host)
+
+    async def trace(event_name: str, info: dict):
+        sync_trace(event_name, info)
+    return trace
+
+
+def _on_request(request: httpx.Request):
+    request.extensions["trace"] = _trace_for(request.url.host)
+    request.extensions["sent_at"] = time.perf_counter()
+
+
+async def _on_request_async(request: httpx.Request):
+    request.extensions["trace"] = _async_trace_for(request.url.host)
+    request.extensions["sent_at"] = time.perf_counter()
+
+
+def _on_response(response: httpx.Response):
+    request = response.request
+    ttfb = time.perf_counter() - request.extensions.get("sent_at", time.perf_counter())
+    with _stats_lock:
+        stats = _host_stats[request.url.host]
+        stats.requests += 1
+        stats.ttfb_total += ttfb
+        stats.versions[response.http_version] += 1
+        if response.status_code >= 400:
+            stats.errors += 1
+
+
+async def _on_response_async(response: httpx.Response):
+    _on_response(response)
+
+
+def http_stats() -> dict:
+    """Per-host connection reuse (reused = requests served on a kept-alive connection)"""
+    with _stats_lock:
+        hosts = {}
+        for host, s in _host_stats.items():
+            reused = max(0, s.requests - s.connections)
+            hosts[host] = {
+                "requests": s.requests,
+                "new_connections": s.connections,
+                "reused_connections": reused,
+                "reuse_rate": round(reused / s.requests, 3) if s.requests else 0.0,
+                "tls_handshakes": s.tls_handshakes,
+                "errors": s.errors,
+                "ttfb_avg_ms": round(s.ttfb_total / s.requests * 1000, 1) if s.requests else 0.0,
+                "http_versions": dict(s.versions),
+            }
+    return {
+        "http2": _http2_enabled,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_MAX_KEEPALIVE,
+        "hosts": hosts,
+    }
+
+
+# Shared Client
+# =============================================================================
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_http2_enabled = False
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def http_client() -> httpx.Client:
+    """Process-wide pooled client (thread-safe, shared by every tool)"""
+    global _client, _http2_enabled
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _http2_enabled = _http2_available()
+                _client = httpx.Client(
+                    limits=_limits(),
+                    http2=_http2_enabled,
+                    timeout=HTTP_TIMEOUT,
+                    headers=DEFAULT_HEADERS,
+                    follow_redirects=True,
+                    event_hooks={"request": [_on_request], "response": [_on_response]},
+                )
+    return _client
+
+
+# Shared Async Client (on the tool I/O loop)
+# =============================================================================
+# An AsyncClient's connections belong to the event loop that opened them,
+# so the async client is only ever used on this one dedicated loop.
+
+_io_loop: Optional[asyncio.AbstractEventLoop] = None
+_io_thread: Optional[threading.Thread] = None
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def io_loop() -> asyncio.AbstractEventLoop:
+    """Background event loop that runs every tool's network I/O"""
+    global _io_loop, _io_thread
+    if _io_loop is None:
+        with _client_lock:
+            if _io_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="tool-io", daemon=True)
+                thread.start()
+                _io_loop, _io_thread = loop, thread
+    return _io_loop
+
+
+def async_http_client() -> httpx.AsyncClient:
+    """Pooled async client; call from coroutines running on io_loop() only"""
+    global _async_client, _http2_enabled
+    if _async_client is None:
+        _http2_enabled = _http2_available()
+        _async_client = httpx.AsyncClient(
+            limits=_limits(),
+            http2=_http2_enabled,
+            timeout=HTTP_TIMEOUT,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            event_hooks={"request": [_on_request_async], "response": [_on_response_async]},
+        )
+    return _async_client
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def run_io(coro: Awaitable):
+    """Run a tool coroutine on the I/O loop and block until done (sync `_run` path)"""
+    loop = io_loop()
+    if _running_loop() is loop:
+        raise RuntimeError("run_io() called from the tool I/O loop, await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def await_io(coro: Awaitable):
+    """Await a tool coroutine from any event loop (e.g. the API loop)"""
+    loop = io_loop()
+    if _running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def close_http_clients():
+    """Close pooled connections and stop the tool I/O loop (API shutdown)"""
+    global _client, _async_client, _io_loop, _io_thread
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        if _io_loop is not None:
+            if _async_client is not None:
+                asyncio.run_coroutine_threadsafe(_async_client.aclose(), _io_loop).result(timeout=5)
+                _async_client = None
+            _io_loop.call_soon_threadsafe(_io_loop.stop)
+            _io_thread.join(timeout=5)
+            _io_loop.close()
+            _io_loop, _io_thread = None, None
@@ -0,0 +1,327 @@
+"""
+Shared Image Loader for the vision tools
+
+The vision tools used to base64 the ORIGINAL bytes of whatever they got:
+a 12 MB phone photo of a menu went up as ~16 MB of base64 JSON, EXIF
+(GPS position, camera) included, and was downscaled by the provider anyway.
+All three tools now load images through load_image():
+
+- URLs are streamed with a hard size limit (Content-Length checked first,
+  the download is aborted as soon as the limit is crossed), local files and
+  base64 inputs get the same limit
+- The image is rotated per its EXIF orientation, downscaled so the long
+  side is at most IMAGE_MAX_SIDE (enough for OCR of menus and signs),
+  re-encoded as JPEG without EXIF/metadata. If that would not make it
+  smaller (small PNG screenshots without EXIF), the original bytes are kept
+- Payload bytes before/after and the provider call (upload + inference)
+  latency are recorded per provider, see image_stats(). IMAGE_PREPROCESS=false
+  sends originals, so both sides can be compared on the same images
+
+Needs Pillow (installed with gradio); without it images are sent as-is.
+
+Config (.env):
+    IMAGE_MAX_DOWNLOAD_MB=20      # hard limit for downloads / files / base64
+    IMAGE_PREPROCESS=true
+    IMAGE_MAX_SIDE=1600           # long side in pixels after downscaling
+    IMAGE_JPEG_QUALITY=85
+"""
+import io
+import os
+import re
+import time
+import base64
+import asyncio
+import hashlib
+import binascii
+import mimetypes
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from carribulus.tools.http_pool import async_http_client
+
+IMAGE_MAX_DOWNLOAD_BYTES = int(float(os.getenv("IMAGE_MAX_DOWNLOAD_MB", "20")) * 1024 * 1024)
+IMAGE_PREPROCESS = os.getenv("IMAGE_PREPROCESS", "true").lower() == "true"
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "1600"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+
+
+class ImageTooLargeError(ValueError):
+    pass
+
+
+def _pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+        return True
+    except ImportError:
+        print("Pillow is not installed (pip install pillow), images are sent without downscaling.")
+        return False
+
+
+_PILLOW = _pillow_available() if IMAGE_PREPROCESS else False
+
+
+@dataclass(slots=True)
+class LoadedImage:
+    data: bytes               # bytes to send (preprocessed, or the original)
+    mime_type: str
+    original_bytes: int
+    width: int = 0            # after preprocessing (0 = unknown, not decoded)
+    height: int = 0
+    load_ms: float = 0.0      # download/read + preprocessing
+    sha256: str = ""          # of the original bytes
+    phash: Optional[int] = None  # 64-bit dHash, finds near-duplicate candidates (None without Pillow)
+    thumbnail: Optional[bytes] = None  # THUMBNAIL_SIDE² grayscale pixels, confirms them
+    # Encoded on first use, then shared by every request that sends this image
+    _b64: Optional[str] = field(default=None, init=False, repr=False)
+    _data_uri: Optional[str] = field(default=None, init=False, repr=False)
+
+    @property
+    def b64(self) -> str:
+        if self._b64 is None:
+            self._b64 = base64.b64encode(self.data).decode("utf-8")
+        return self._b64
+
+    @property
+    def data_uri(self) -> str:
+        if self._data_uri is None:
+            self._data_uri = f"data:{self.mime_type};base64,{self.b64}"
+        return self._data_uri
+
+    @property
+    def payload_bytes(self) -> int:
+        """Size of the base64 text that goes into the request body"""
+        return (len(self.data) + 2) // 3 * 4
+
+
+# Loading
+# =============================================================================
+
+def _limit_error(size: int) -> ImageTooLargeError:
+    return ImageTooLargeError(
+        f"Image is larger than the {IMAGE_MAX_DOWNLOAD_BYTES / 1024 / 1024:.0f} MB limit "
+        f"({size / 1024 / 1024:.1f} MB)")
+
+
+def _decode_base64(b64_data: str) -> bytes:
+    # Checked before decoding: the decoded size is ~3/4 of the text
+    if len(b64_data) * 3 // 4 > IMAGE_MAX_DOWNLOAD_BYTES:
+        raise _limit_error(len(b64_data) * 3 // 4)
+    try:
+        return base64.b64decode(b64_data, validate=False)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 image data: {e}")
+
+
+async def _download(url: str) -> tuple:
+    """Stream the image, abort as soon as it crosses the size limit"""
+    async with async_http_client().stream("GET", url, timeout=30) as response:
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > IMAGE_MAX_DOWNLOAD_BYTES:
+            raise _limit_error(int(length))
+
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > IMAGE_MAX_DOWNLOAD_BYTES:
+                raise _limit_error(size)
+            chunks.append(chunk)
+
+        content_type = response.headers.get("Content-Type", "")
+        if "image/" in content_type:
+            # "image/jpeg; charset=utf-8" → "image/jpeg"
+            mime_type = content_type.split(";")[0].strip()
+        else:
+            mime_type = mimetypes.guess_type(url)[0] or "image/jpeg"
+    return b"".join(chunks), mime_type
+
+
+def _read_file(file_path: str) -> tuple:
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Image file not found: {file_path}")
+    if not path.is_file():
+        raise ValueError(f"Path is not a file: {file_path}")
+    size = path.stat().st_size
+    if size > IMAGE_MAX_DOWNLOAD_BYTES:
+        raise _limit_error(size)
+    return path.read_bytes(), mimetypes.guess_type(str(path))[0] or "image/jpeg"
+
+
+async def _load_raw(image_source: str) -> tuple:
+    """
+    (original bytes, MIME type) for every input format:
+    1. data:image/jpeg;base64,xxx
+    2. Very long string → raw base64 (assumed JPEG)
+    3. https://... → streamed download
+    4. Local path
+    """
+    if image_source.startswith("data:"):
+        match = re.match(r"data:([^;]+);base64,(.+)", image_source, re.DOTALL)
+        if not match:
+            raise ValueError("Invalid data URI format")
+        return _decode_base64(match.group(2)), match.group(1)
+
+    if len(image_source) > 500 and "/" not in image_source[:50] and "\\" not in image_source[:50]:
+        return _decode_base64(image_source), "image/jpeg"
+
+    if image_source.startswith(("http://", "https://")):
+        return await _download(image_source)
+
+    return await asyncio.to_thread(_read_file, image_source)
+
+
+# Preprocessing
+# =============================================================================
+
+# Side of the grayscale thumbnail that confirms near-duplicates: a 64-bit
+# dHash can't tell two text menus apart, pixels at this size can
+THUMBNAIL_SIDE = 256
+
+
+def _thumbnail(image) -> bytes:
+    from PIL import Image
+
+    return image.convert("L").resize((THUMBNAIL_SIDE, THUMBNAIL_SIDE), Image.Resampling.BOX).tobytes()
+
+
+def _dhash(image) -> int:
+    """Difference hash: 9x8 grayscale, one bit per horizontal gradient"""
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def _preprocess(raw: bytes, mime_type: str) -> tuple:
+    """
+    (bytes, mime, width, height, dhash, thumbnail): EXIF-rotated, downscaled, JPEG without metadata.
+    Falls back to the original bytes if Pillow can't decode the image, or if
+    re-encoding a small image without EXIF would only make it bigger.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            # JPEG: decode straight at a reduced scale (still >= IMAGE_MAX_SIDE)
+            image.draft("RGB", (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+            has_exif = "exif" in image.info
+            image = ImageOps.exif_transpose(image)
+            resized = max(image.size) > IMAGE_MAX_SIDE
+            if resized:
+                image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.Resampling.LANCZOS)
+            if image.mode != "RGB":
+                # Transparent PNG/WebP: flatten onto white (keeps dark text readable)
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            out = io.BytesIO()
+            # No exif= / icc_profile= passed: metadata is not written
+            image.save(out, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+            width, height = image.size
+            phash = _dhash(image)
+            thumbnail = _thumbnail(image)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        print(f"Image preprocessing skipped ({e}), sending the original bytes.")
+        return raw, mime_type, 0, 0, None, None
+
+    data = out.getvalue()
+    if not resized and not has_exif and len(data) >= len(raw):
+        return raw, mime_type, width, height, phash, thumbnail
+    return data, "image/jpeg", width, height, phash, thumbnail
+
+
+async def load_image(image_source: str) -> LoadedImage:
+    """Load any supported image input, size-limited and ready to upload"""
+    start = time.perf_counter()
+    raw, mime_type = await _load_raw(image_source.strip())
+    width = height = 0
+    data, phash, thumbnail = raw, None, None
+    if _PILLOW:
+        # CPU-bound, keep it off the tool I/O loop
+        data, mime_type, width, height, phash, thumbnail = await asyncio.to_thread(_preprocess, raw, mime_type)
+    image = LoadedImage(data=data, mime_type=mime_type, original_bytes=len(raw),
+                        width=width, height=height,
+                        load_ms=(time.perf_counter() - start) * 1000,
+                        sha256=hashlib.sha256(raw).hexdigest(), phash=phash, thumbnail=thumbnail)
+    _record_load(image)
+    return image
+
+
+# Stats
+# =============================================================================
+
+class _UploadStats:
+    __slots__ = ("calls", "errors", "payload_bytes", "original_payload_bytes", "call_s")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.payload_bytes = 0
+        self.original_payload_bytes = 0
+        self.call_s = 0.0
+
+
+_stats_lock = threading.Lock()
+_loads = {"images": 0, "original_bytes": 0, "sent_bytes": 0, "load_s": 0.0}
+_uploads: dict = defaultdict(_UploadStats)
+
+
+def _record_load(image: LoadedImage):
+    with _stats_lock:
+        _loads["images"] += 1
+        _loads["original_bytes"] += image.original_bytes
+        _loads["sent_bytes"] += len(image.data)
+        _loads["load_s"] += image.load_ms / 1000
+    size = f", {image.width}x{image.height}" if image.width else ""
+    print(f"Image loaded: {image.original_bytes / 1024:,.0f} KB → {len(image.data) / 1024:,.0f} KB "
+          f"({image.mime_type}{size}, {image.load_ms:.0f} ms)")
+
+
+def record_upload(provider: str, image: LoadedImage, seconds: float, ok: bool = True):
+    """One provider call with this image: request payload size and latency"""
+    original_payload = (image.original_bytes + 2) // 3 * 4
+    with _stats_lock:
+        s = _uploads[provider]
+        s.calls += 1
+        s.errors += 0 if ok else 1
+        s.payload_bytes += image.payload_bytes
+        s.original_payload_bytes += original_payload
+        s.call_s += seconds
+    print(f"Vision call [{provider}]: payload {original_payload / 1024:,.0f} KB → "
+          f"{image.payload_bytes / 1024:,.0f} KB base64, {seconds * 1000:,.0f} ms"
+          f"{'' if ok else ' (failed)'}")
+
+
+def image_stats() -> dict:
+    with _stats_lock:
+        images = _loads["images"]
+        providers = {
+            provider: {
+                "calls": s.calls,
+                "errors": s.errors,
+                "payload_kb_avg": round(s.payload_bytes / s.calls / 1024, 1),
+                "original_payload_kb_avg": round(s.original_payload_bytes / s.calls / 1024, 1),
+                "call_avg_ms": round(s.call_s / s.calls * 1000, 1),
+            }
+            for provider, s in _uploads.items() if s.calls
+        }
+        return {
+            "preprocess": _PILLOW,
+            "max_side": IMAGE_MAX_SIDE,
+            "images": images,
+            "original_kb": round(_loads["original_bytes"] / 1024, 1),
+            "sent_kb": round(_loads["sent_bytes"] / 1024, 1),
+            "reduction": round(1 - _loads["sent_bytes"] / _loads["original_bytes"], 3)
+                         if _loads["original_bytes"] else 0.0,
+            "load_avg_ms": round(_loads["load_s"] / images * 1000, 1) if images else 0.0,
+            "providers": providers,
+        }
@@ -5,14 +5,46 @@ https://serpapi.com/
 Provides precise pricing for:
 - Flights (Google Flights)
 - Hotels (Google Hotels)
+
+Natively async (`_arun`) on the shared pooled HTTP client; `_run` runs the
+same coroutine on the tool I/O loop (see http_pool.py).
+
+Flexible dates: given a departure window (and optional trip lengths), the
+flights tool searches every date combination concurrently and returns one
+price matrix with the cheapest combination highlighted.
+
+Area comparison: given several areas for the same dates, the hotels tool
+searches them concurrently and returns one merged, deduplicated ranking.
+
+Responses are parsed once into compact records (travel_records.py), all
+formatting and ranking below works from those. The Markdown output is then
+compacted to a per-tool token budget (compaction.py).
+
+Config (.env):
+    FLIGHT_MATRIX_CONCURRENCY=4      # SerpAPI searches in flight per matrix
+    FLIGHT_MATRIX_MAX_SEARCHES=30    # date combinations allowed per matrix
+    HOTEL_COMPARE_MAX_AREAS=6        # areas allowed per hotel comparison
 """
 
 import os
-import requests
-from typing import Optional, Type, Literal
+import asyncio
+import datetime
+import httpx
+from typing import List, Optional, Type, Literal
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
+from carribulus.tools.http_pool import async_http_client, run_io
+from carribulus.tools.tool_cache import cached_tool, normalize_query, canonical_ages, canonical_code
+from carribulus.tools.compaction import compacted_output
+from carribulus.tools.travel_records import FlightOption, FlightResults, HotelOption, parse_hotels
+
+SERPAPI_URL = "https://serpapi.com/search"
+
+FLIGHT_MATRIX_CONCURRENCY = int(os.getenv("FLIGHT_MATRIX_CONCURRENCY", "4"))
+FLIGHT_MATRIX_MAX_SEARCHES = int(os.getenv("FLIGHT_MATRIX_MAX_SEARCHES", "30"))
+HOTEL_COMPARE_MAX_AREAS = int(os.getenv("HOTEL_COMPARE_MAX_AREAS", "6"))
+
 
 # Input Schemas with Validation
 # =============================================================================
@@ -59,6 +91,14 @@ class FlightSearchInput(BaseModel):
         default="MYR",
         description="Currency code for prices. Default is MYR (Malaysian Ringgit). Common: USD, THB, JPY"
     )
+    outbound_date_end: Optional[str] = Field(
+        default=None,
+        description="Flexible dates: last departure date (YYYY-MM-DD) of a window starting at outbound_date. Every day in the window is searched at once and a price matrix is returned. Use for 'cheapest day to fly' questions."
+    )
+    return_offsets: Optional[str] = Field(
+        default=None,
+        description="Flexible dates, round trip: trip lengths in days separated by comma (e.g. '5,6,7'), return date = departure date + offset. Leave empty for one-way (or to keep the return_date trip length)."
+    )
 
 
 class HotelSearchInput(BaseModel):
@@ -113,6 +153,33 @@ class HotelSearchInput(BaseModel):
         default=8,
         description="Sort results by: 3=Lowest price, 8=Highest rating (default), 13=Most reviewed"
     )
+    areas: Optional[List[str]] = Field(
+        default=None,
+        description="Compare several areas in ONE call (same dates): each area is appended to query, e.g. query='hotels in Tokyo', areas=['Shinjuku', 'Shibuya', 'Asakusa']. Returns one ranked comparison table."
+    )
+
+
+# Cache keys (see tool_cache.py): calls that return the same results share one entry
+# =============================================================================
+
+def _canonical_flight_args(args: dict) -> dict:
+    args["departure_id"] = canonical_code(args["departure_id"])
+    args["arrival_id"] = canonical_code(args["arrival_id"])
+    args["currency"] = canonical_code(args["currency"])
+    args["outbound_date"] = args["outbound_date"].strip()
+    args["return_date"] = (args.get("return_date") or "").strip() or None
+    args["outbound_date_end"] = (args.get("outbound_date_end") or "").strip() or None
+    args["return_offsets"] = canonical_ages(args.get("return_offsets"))  # '7, 5' → '5,7'
+    return args
+
+def _canonical_hotel_args(args: dict) -> dict:
+    args["query"] = normalize_query(args["query"])
+    args["currency"] = canonical_code(args["currency"])
+    args["children_ages"] = canonical_ages(args.get("children_ages")) if args.get("children") else None
+    if args.get("hotel_class"):
+        args["hotel_class"] = canonical_ages(args["hotel_class"])  # '5,4' → '4,5'
+    args["areas"] = sorted({normalize_query(a) for a in args.get("areas") or [] if a and a.strip()}) or None
+    return args
 
 
 # Flight Search Tool
@@ -144,6 +211,8 @@ class SerpAPIFlightsTool(BaseTool):
     - Default is economy class, MYR currency
     - If user mentions "business class" → travel_class=3
     - If user mentions "direct flight only" → stops=0
+    - "Cheapest day to fly" / flexible dates → set outbound_date_end (window end)
+      and, for round trips, return_offsets (trip lengths). ONE call searches all dates.
 
     Examples of airport codes:
     - Malaysia: KUL (KLIA), PEN (Penang)
@@ -163,19 +232,42 @@ class SerpAPIFlightsTool(BaseTool):
         children: int = 0,
         travel_class: int = 1,
         stops: int = 0,
-        currency: str = "MYR"
+        currency: str = "MYR",
+        outbound_date_end: Optional[str] = None,
+        return_offsets: Optional[str] = None
+    ) -> str:
+        return run_io(self._arun(
+            departure_id, arrival_id, outbound_date, return_date,
+            adults, children, travel_class, stops, currency,
+            outbound_date_end, return_offsets
+        ))
+
+    @compacted_output("serpapi_flights")
+    @cached_tool("serpapi_flights", canonicalize=_canonical_flight_args)
+    async def _arun(
+        self,
+        departure_id: str,
+        arrival_id: str,
+        outbound_date: str,
+        return_date: Optional[str] = None,
+        adults: int = 1,
+        children: int = 0,
+        travel_class: int = 1,
+        stops: int = 0,
+        currency: str = "MYR",
+        outbound_date_end: Optional[str] = None,
+        return_offsets: Optional[str] = None
     ) -> str:
         api_key = os.getenv("SERPAPI_API_KEY")
         if not api_key:
             return "Error: SERPAPI_API_KEY not found. Please add it to your .env file."
         
-        # Build request parameters
+        # Build request parameters (dates are added per search)
         params = {
             "api_key": api_key,
             "engine": "google_flights", # Google Flights
             "departure_id": departure_id.upper().strip(),
             "arrival_id": arrival_id.upper().strip(),
-            "outbound_date": outbound_date,
             "currency": currency.upper(),
             "hl": "en",
             "adults": adults,
@@ -186,46 +278,170 @@ class SerpAPIFlightsTool(BaseTool):
         # Add stops filter
         if stops < 3:
             params["stops"] = str(stops)
-        
-        # Determine trip type
-        if return_date:
-            params["return_date"] = return_date
-            params["type"] = 1  # Round trip
-            trip_type = "Round-trip"
-        else:
-            params["type"] = 2  # One way
-            trip_type = "One-way"
+
+        # Flexible dates: one concurrent search per date combination
+        if outbound_date_end or return_offsets:
+            return await self._search_date_matrix(
+                params, outbound_date, outbound_date_end, return_date, return_offsets, travel_class
+            )
         
         try:
-            response = requests.get(
-                "https://serpapi.com/search",
-                params=params,
-                timeout=60
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._search(params, outbound_date, return_date)
             
             # Check for errors
             if "error" in data:
                 return f"API Error: {data['error']}"
             
             return self._format_flight_results(
-                data, 
+                FlightResults.from_serpapi(data), 
                 departure_id.upper(), 
                 arrival_id.upper(),
-                trip_type,
+                "Round-trip" if return_date else "One-way",
                 currency.upper(),
                 travel_class
             )
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "Error: Request timed out. Please try again."
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return f"Error searching flights: {str(e)}"
+
+    async def _search(self, params: dict, outbound_date: str, return_date: Optional[str]) -> dict:
+        """One Google Flights search for a date pair (raises httpx errors)"""
+        params = dict(params, outbound_date=outbound_date)
+        
+        # Determine trip type
+        if return_date:
+            params["return_date"] = return_date
+            params["type"] = 1  # Round trip
+        else:
+            params["type"] = 2  # One way
+        
+        response = await async_http_client().get(
+            SERPAPI_URL,
+            params=params,
+            timeout=60
+        )
+        response.raise_for_status()
+        return response.json()
+
+    # Flexible-date matrix
+    # -------------------------------------------------------------------------
+
+    async def _search_date_matrix(
+        self,
+        params: dict,
+        outbound_date: str,
+        outbound_date_end: Optional[str],
+        return_date: Optional[str],
+        return_offsets: Optional[str],
+        travel_class: int
+    ) -> str:
+        """Search every (departure, return) combination concurrently, return one price matrix"""
+        try:
+            first_day = datetime.date.fromisoformat(outbound_date.strip())
+            last_day = datetime.date.fromisoformat(outbound_date_end.strip()) if outbound_date_end else first_day
+            if return_offsets:
+                offsets = sorted({int(x.strip()) for x in return_offsets.split(",") if x.strip()})
+            elif return_date:
+                # Keep the trip length of the given return date
+                offsets = [(datetime.date.fromisoformat(return_date.strip()) - first_day).days]
+            else:
+                offsets = [None]  # One-way
+        except ValueError:
+            return "Error: Flexible dates need YYYY-MM-DD dates and return_offsets like '5,6,7'."
+        
+        if last_day < first_day:
+            return "Error: outbound_date_end must be on or after outbound_date."
+        if any(offset is not None and offset < 0 for offset in offsets):
+            return "Error: return_offsets must be 0 or more days."
+        
+        departures = [first_day + datetime.timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        combos = [(day, offset) for day in departures for offset in offsets]
+        if len(combos) > FLIGHT_MATRIX_MAX_SEARCHES:
+            return (f"Error: {len(combos)} date combinations requested, the limit is {FLIGHT_MATRIX_MAX_SEARCHES}. "
+                    "Narrow the date window or use fewer return_offsets.")
+        
+        limit = asyncio.Semaphore(max(1, FLIGHT_MATRIX_CONCURRENCY))
+        
+        async def cheapest(day: datetime.date, offset: Optional[int]):
+            back = (day + datetime.timedelta(days=offset)).isoformat() if offset is not None else None
+            async with limit:
+                try:
+                    data = await self._search(params, day.isoformat(), back)
+                except httpx.HTTPError as e:
+                    print(f"Flight matrix search {day} (+{offset}) failed: {e}")
+                    return None
+            if "error" in data:
+                return None
+            # Keep only the cheapest record per cell, not the whole response
+            return FlightResults.from_serpapi(data).cheapest()
+        
+        results = await asyncio.gather(*(cheapest(day, offset) for day, offset in combos))
+        return self._format_date_matrix(
+            dict(zip(combos, results)), departures, offsets,
+            params["departure_id"], params["arrival_id"], params["currency"], travel_class
+        )
+
+    def _format_date_matrix(
+        self,
+        cells: dict,
+        departures: list,
+        offsets: list,
+        departure: str,
+        arrival: str,
+        currency: str,
+        travel_class: int
+    ) -> str:
+        """Cheapest fare per (departure date, trip length) as a Markdown matrix"""
+        class_names = {1: "Economy", 2: "Premium Economy", 3: "Business", 4: "First Class"}
+        class_name = class_names.get(travel_class, "Economy")
+        round_trip = offsets != [None]
+        
+        found = {combo: flight for combo, flight in cells.items() if flight}
+        if not found:
+            return (f"❌ No flights found for {departure} → {arrival} between "
+                    f"{departures[0]} and {departures[-1]}. Try other dates or check airport codes.")
+        best_combo = min(found, key=lambda combo: found[combo].price)
+        
+        results = []
+        results.append(f"## ✈️ Flexible dates: {departure} → {arrival}")
+        results.append(f"{'Round-trip' if round_trip else 'One-way'} | {class_name} | "
+                       f"Cheapest fare per date in {currency} | {len(cells)} searches\n")
+        
+        def cell(combo) -> str:
+            flight = found.get(combo)
+            if not flight:
+                return "-"
+            price = f"{flight.price:,}"
+            return f"**{price}** 🏆" if combo == best_combo else price
+        
+        if round_trip:
+            results.append("| Depart \\ Trip length | " + " | ".join(f"{o} day{'s' if o != 1 else ''}" for o in offsets) + " |")
+            results.append("|---" * (len(offsets) + 1) + "|")
+            for day in departures:
+                results.append(f"| {day:%a %d %b} | " + " | ".join(cell((day, o)) for o in offsets) + " |")
+        else:
+            results.append("| Depart | Cheapest |")
+            results.append("|---|---|")
+            for day in departures:
+                results.append(f"| {day:%a %d %b} | {cell((day, None))} |")
+        results.append("")
+        
+        day, offset = best_combo
+        dates = f"{day:%a %d %b}" + (f" → {day + datetime.timedelta(days=offset):%a %d %b}" if offset is not None else "")
+        results.append(f"### 🏆 Cheapest: {dates}\n")
+        results.append("| # | Airline | Route | Duration | Stops | Price |")
+        results.append("|---|---------|-------|----------|-------|-------|")
+        results.append(self._format_flight_row(1, found[best_combo], currency))
+        results.append("")
+        results.append("Search the cheapest dates again without outbound_date_end for all flight options.")
+        
+        return "\n".join(results)
     
     def _format_flight_results(
         self, 
-        data: dict, 
+        flights: FlightResults, 
         departure: str, 
         arrival: str,
         trip_type: str,
@@ -242,20 +458,19 @@ class SerpAPIFlightsTool(BaseTool):
         results.append(f"{trip_type} | {class_name} | Prices in {currency}\n")
         
         # Price insights
-        if "price_insights" in data:
-            insights = data["price_insights"]
+        if flights.has_insights:
             results.append("### 💡 Price Insights")
-            if "lowest_price" in insights:
-                results.append(f"- **Lowest price:** {currency} {insights['lowest_price']}")
-            if "typical_price_range" in insights:
-                low, high = insights["typical_price_range"]
+            if flights.lowest_price is not None:
+                results.append(f"- **Lowest price:** {currency} {flights.lowest_price}")
+            if flights.typical_range:
+                low, high = flights.typical_range
                 results.append(f"- **Typical range:** {currency} {low} - {high}")
-            if "price_level" in insights:
-                results.append(f"- **Current prices:** {insights['price_level']}")
+            if flights.price_level:
+                results.append(f"- **Current prices:** {flights.price_level}")
             results.append("")
         
         # Best flights
-        best_flights = data.get("best_flights", [])
+        best_flights = flights.best
         if best_flights:
             results.append("### Best Flights\n")
             results.append("| # | Airline | Route | Duration | Stops | Price |")
@@ -267,7 +482,7 @@ class SerpAPIFlightsTool(BaseTool):
             results.append("")
         
         # Other options
-        other_flights = data.get("other_flights", [])
+        other_flights = flights.other
         if other_flights:
             results.append("### More Options\n")
             results.append("| # | Airline | Route | Duration | Stops | Price |")
@@ -284,31 +499,17 @@ class SerpAPIFlightsTool(BaseTool):
         
         return "\n".join(results)
     
-    def _format_flight_row(self, index: int, flight_data: dict, currency: str) -> str:
+    def _format_flight_row(self, index: int, flight: FlightOption, currency: str) -> str:
         """Format a single flight as table row"""
-        price = flight_data.get("price", "N/A")
-        total_duration = flight_data.get("total_duration", 0)
-        hours = total_duration // 60
-        mins = total_duration % 60
+        price = flight.price if flight.price is not None else "N/A"
+        hours = flight.total_duration // 60
+        mins = flight.total_duration % 60
         duration_str = f"{hours}h {mins}m"
         
-        flights = flight_data.get("flights", [])
-        stops = len(flights) - 1
+        stops = flight.stops
         stops_str = "Direct" if stops == 0 else f"{stops} stop{'s' if stops > 1 else ''}"
         
-        # Get airline and route info
-        if flights:
-            first_leg = flights[0]
-            last_leg = flights[-1]
-            airline = first_leg.get("airline", "Unknown")
-            dep_time = first_leg.get("departure_airport", {}).get("time", "")
-            arr_time = last_leg.get("arrival_airport", {}).get("time", "")
-            route = f"{dep_time} → {arr_time}"
-        else:
-            airline = "Unknown"
-            route = "N/A"
-        
-        return f"| {index} | {airline} | {route} | {duration_str} | {stops_str} | {currency} {price} |"
+        return f"| {index} | {flight.airline} | {flight.route} | {duration_str} | {stops_str} | {currency} {price} |"
 
 
 # Hotel Search Tool
@@ -338,6 +539,7 @@ class SerpAPIHotelsTool(BaseTool):
     - Always NEED check-in and check-out dates
     - If user mentions "budget" → consider max_price
     - If user mentions "luxury/5-star" → hotel_class="5"
+    - Comparing several areas/neighbourhoods → ONE call with areas=[...]
 
     Examples of good queries:
     - "hotels in Tokyo Shinjuku"
@@ -359,17 +561,39 @@ class SerpAPIHotelsTool(BaseTool):
         max_price: Optional[int] = None,
         hotel_class: Optional[str] = None,
         currency: str = "MYR",
-        sort_by: int = 8
+        sort_by: int = 8,
+        areas: Optional[List[str]] = None
+    ) -> str:
+        return run_io(self._arun(
+            query, check_in_date, check_out_date, adults, children, children_ages,
+            min_price, max_price, hotel_class, currency, sort_by, areas
+        ))
+
+    @compacted_output("serpapi_hotels")
+    @cached_tool("serpapi_hotels", canonicalize=_canonical_hotel_args)
+    async def _arun(
+        self,
+        query: str,
+        check_in_date: str,
+        check_out_date: str,
+        adults: int = 1,
+        children: int = 0,
+        children_ages: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        hotel_class: Optional[str] = None,
+        currency: str = "MYR",
+        sort_by: int = 8,
+        areas: Optional[List[str]] = None
     ) -> str:
         api_key = os.getenv("SERPAPI_API_KEY")
         if not api_key:
             return "Error: SERPAPI_API_KEY not found. Please add it to your .env file."
         
-        # Build request parameters
+        # Build request parameters (the query is added per search)
         params = {
             "api_key": api_key,
             "engine": "google_hotels", # Google Hotels
-            "q": query,
             "check_in_date": check_in_date,
             "check_out_date": check_out_date,
             "currency": currency.upper(),
@@ -409,35 +633,156 @@ class SerpAPIHotelsTool(BaseTool):
             params["max_price"] = max_price
         if hotel_class:
             params["hotel_class"] = hotel_class
+
+        # Several areas: one concurrent search each, merged into one ranking
+        areas = [a.strip() for a in areas or [] if a and a.strip()]
+        if areas:
+            return await self._compare_areas(
+                params, query, areas, check_in_date, check_out_date, currency.upper(), sort_by
+            )
         
         try:
-            response = requests.get(
-                "https://serpapi.com/search",
-                params=params,
-                timeout=60
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = await self._search(params, query)
             
             if "error" in data:
                 return f"API Error: {data['error']}"
             
             return self._format_hotel_results(
-                data, 
+                parse_hotels(data), 
                 query, 
                 check_in_date, 
                 check_out_date,
                 currency.upper()
             )
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "Error: Request timed out. Please try again."
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return f"Error searching hotels: {str(e)}"
+
+    async def _search(self, params: dict, query: str) -> dict:
+        """One Google Hotels search (raises httpx errors)"""
+        response = await async_http_client().get(
+            SERPAPI_URL,
+            params=dict(params, q=query),
+            timeout=60
+        )
+        response.raise_for_status()
+        return response.json()
+
+    # Multi-area comparison
+    # -------------------------------------------------------------------------
+
+    async def _compare_areas(
+        self,
+        params: dict,
+        query: str,
+        areas: List[str],
+        check_in: str,
+        check_out: str,
+        currency: str,
+        sort_by: int
+    ) -> str:
+        """Search every area concurrently, merge + dedupe properties, rank across areas"""
+        if len(areas) > HOTEL_COMPARE_MAX_AREAS:
+            return f"Error: {len(areas)} areas requested, the limit is {HOTEL_COMPARE_MAX_AREAS}. Compare fewer areas."
+
+        async def search_area(area: str):
+            try:
+                data = await self._search(params, f"{query} {area}")
+            except httpx.HTTPError as e:
+                print(f"Hotel search for area '{area}' failed: {e}")
+                return None
+            return None if "error" in data else parse_hotels(data)
+
+        found = await asyncio.gather(*(search_area(area) for area in areas))
+        if all(hotels is None for hotels in found):
+            return "Error: Hotel search failed for every area. Please try again."
+
+        # Same property found in several areas (overlapping neighbourhoods): keep one row
+        merged: dict = {}
+        for area, hotels in zip(areas, found):
+            for hotel in hotels or []:
+                if hotel.key in merged:
+                    if area not in merged[hotel.key]["areas"]:
+                        merged[hotel.key]["areas"].append(area)
+                else:
+                    merged[hotel.key] = {"hotel": hotel, "areas": [area]}
+
+        return self._format_area_comparison(
+            list(merged.values()), areas, [hotels is None for hotels in found],
+            query, check_in, check_out, currency, sort_by
+        )
+
+    def _format_area_comparison(
+        self,
+        entries: list,
+        areas: List[str],
+        failed: List[bool],
+        query: str,
+        check_in: str,
+        check_out: str,
+        currency: str,
+        sort_by: int
+    ) -> str:
+        """One ranked table across all areas (sort_by decides the ranking, the rest break ties)"""
+        results = []
+        results.append(f"## 🏨 Hotels compared: {query} ({', '.join(areas)})")
+        results.append(f"Check-in: {check_in} | Check-out: {check_out} | Prices in {currency}\n")
+
+        if not entries:
+            results.append("❌ No hotels found in these areas.")
+            results.append("Try different dates or broaden your location.")
+            return "\n".join(results)
+
+        nights = _stay_nights(check_in, check_out)
+
+        def price(entry) -> float:
+            value = entry["hotel"].price
+            return value if value is not None else float("inf")
+
+        def rating(entry) -> float:
+            return entry["hotel"].rating or 0.0
+
+        if sort_by == 3:    # Lowest price
+            entries.sort(key=lambda e: (price(e), -rating(e)))
+        elif sort_by == 13: # Most reviewed
+            entries.sort(key=lambda e: (-e["hotel"].reviews, price(e)))
+        else:               # Highest rating
+            entries.sort(key=lambda e: (-rating(e), price(e)))
+
+        results.append("| # | Hotel | Area | Rating | Price/Night | Total |")
+        results.append("|---|-------|------|--------|-------------|-------|")
+        for i, entry in enumerate(entries[:15], 1):
+            hotel = entry["hotel"]
+            results.append(
+                f"| {i} | {_short_name(hotel)} | {', '.join(entry['areas'])} | {_rating_cell(hotel)} | "
+                f"{hotel.price_text} | {_total_cell(hotel, nights, currency)} |"
+            )
+        results.append("")
+
+        # Best pick per area
+        results.append("### Per Area\n")
+        for area, area_failed in zip(areas, failed):
+            in_area = [e for e in entries if area in e["areas"]]
+            if area_failed:
+                results.append(f"- **{area}**: search failed")
+                continue
+            if not in_area:
+                results.append(f"- **{area}**: no hotels found")
+                continue
+            cheapest = min(in_area, key=price)["hotel"]
+            best = max(in_area, key=lambda e: (rating(e), -price(e)))["hotel"]
+            results.append(
+                f"- **{area}** ({len(in_area)} hotels): cheapest {cheapest.name} ({cheapest.price_text}), "
+                f"best rated {best.name} (⭐ {best.rating if best.rating is not None else 'N/A'})"
+            )
+
+        return "\n".join(results)
     
     def _format_hotel_results(
         self, 
-        data: dict, 
+        hotels: List[HotelOption], 
         query: str,
         check_in: str,
         check_out: str,
@@ -448,72 +793,72 @@ class SerpAPIHotelsTool(BaseTool):
         results.append(f"## 🏨 Hotels: {query}")
         results.append(f"Check-in: {check_in} | Check-out: {check_out} | Prices in {currency}\n")
         
-        properties = data.get("properties", [])
-        
-        if not properties:
+        if not hotels:
             results.append("❌ No hotels found for this search.")
             results.append("Try different dates or broaden your location.")
             return "\n".join(results)
         
+        nights = _stay_nights(check_in, check_out)
+        
         # Summary table
         results.append("| # | Hotel | Rating | Price/Night | Total | Amenities |")
         results.append("|---|-------|--------|-------------|-------|-----------|")
         
-        for i, hotel in enumerate(properties[:10], 1):
-            name = hotel.get("name", "Unknown Hotel")
-            # Truncate long names
-            if len(name) > 30:
-                name = name[:27] + "..."
-            
-            rating = hotel.get("overall_rating", "N/A")
-            reviews = hotel.get("reviews", 0)
-            rating_str = f"⭐ {rating} ({reviews:,})" if rating != "N/A" else "N/A"
-            
-            # Price info
-            rate = hotel.get("rate_per_night", {})
-            price_per_night = rate.get("lowest", "N/A")
-            
-            total = hotel.get("total_rate", {})
-            total_price = total.get("lowest", "N/A")
-            
+        for i, hotel in enumerate(hotels[:10], 1):
             # Amenities (first 3)
-            amenities = hotel.get("amenities", [])[:3]
-            amenities_str = ", ".join(amenities) if amenities else "-"
+            amenities_str = ", ".join(hotel.amenities[:3]) if hotel.amenities else "-"
             if len(amenities_str) > 25:
                 amenities_str = amenities_str[:22] + "..."
             
-            results.append(f"| {i} | {name} | {rating_str} | {price_per_night} | {total_price} | {amenities_str} |")
+            results.append(
+                f"| {i} | {_short_name(hotel)} | {_rating_cell(hotel)} | {hotel.price_text} | "
+                f"{_total_cell(hotel, nights, currency)} | {amenities_str} |"
+            )
         
         results.append("")
         
         # Detailed info for top 3
         results.append("### Top Recommendations\n")
-        for i, hotel in enumerate(properties[:3], 1):
-            name = hotel.get("name", "Unknown Hotel")
-            hotel_type = hotel.get("type", "Hotel")
-            rating = hotel.get("overall_rating", "N/A")
-            reviews = hotel.get("reviews", 0)
-            
-            rate = hotel.get("rate_per_night", {})
-            price = rate.get("lowest", "N/A")
-            
-            amenities = hotel.get("amenities", [])
-            
-            results.append(f"**{i}. {name}** ({hotel_type})")
-            results.append(f"- ⭐ Rating: {rating}/5 from {reviews:,} reviews")
-            results.append(f"- 💰 Price: {price}/night")
-            if amenities:
-                results.append(f"- 🏷️ Amenities: {', '.join(amenities[:5])}")
-            
-            link = hotel.get("link", "")
-            if link:
-                results.append(f"- [View & Book]({link})")
+        for i, hotel in enumerate(hotels[:3], 1):
+            rating = hotel.rating if hotel.rating is not None else "N/A"
+            results.append(f"**{i}. {hotel.name}** ({hotel.type})")
+            results.append(f"- ⭐ Rating: {rating}/5 from {hotel.reviews:,} reviews")
+            results.append(f"- 💰 Price: {hotel.price_text}/night")
+            if hotel.amenities:
+                results.append(f"- 🏷️ Amenities: {', '.join(hotel.amenities[:5])}")
+            if hotel.link:
+                results.append(f"- [View & Book]({hotel.link})")
             
             results.append("")
         
         return "\n".join(results)
 
 
+def _stay_nights(check_in: str, check_out: str) -> int:
+    try:
+        nights = (datetime.date.fromisoformat(check_out) - datetime.date.fromisoformat(check_in)).days
+    except ValueError:
+        return 1
+    return max(1, nights)
+
+
+def _short_name(hotel: HotelOption) -> str:
+    # Truncate long names
+    return hotel.name if len(hotel.name) <= 30 else hotel.name[:27] + "..."
+
+
+def _rating_cell(hotel: HotelOption) -> str:
+    return f"⭐ {hotel.rating} ({hotel.reviews:,})" if hotel.rating is not None else "N/A"
+
+
+def _total_cell(hotel: HotelOption, nights: int, currency: str) -> str:
+    """Google's stay total, else estimated from the nightly price (for the budget)"""
+    if hotel.total_text != "N/A":
+        return hotel.total_text
+    total = hotel.total_for(nights)
+    return f"≈ {currency} {total:,.0f}" if total is not None else "N/A"
+
+
 # Tool Instances
 # =============================================================================
 
@@ -7,29 +7,131 @@ Tools:
 - serper_search: General web search (for transportation beside flights)
 - serper_places: Google Places search (for attractions, restaurants, locations)
 - SerperNewsTool: Custom news search with date range (for events, safety alerts)
+
+All tools are natively async (`_arun`) on the shared pooled HTTP client,
+`_run` runs the same coroutine on the tool I/O loop (see http_pool.py).
+Outputs are compacted to a per-tool token budget (see compaction.py).
 """
-from crewai_tools import SerperDevTool
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import requests
+from typing import Literal
+import httpx
 import json
 import os
 
+from carribulus.tools.http_pool import async_http_client, run_io
+from carribulus.tools.tool_cache import cached_tool, normalize_query
+from carribulus.tools.compaction import compacted_output
+
+SERPER_URL = "https://google.serper.dev"
 
-# CrewAI Built-in Serper Tools
+
+# Serper Search / Places Tool
 # =============================================================================
+# Replaces the crewai_tools SerperDevTool (bare requests.post per call, and
+# no /places endpoint support: serper_places used to run a plain web search)
+
+class SerperSearchInput(BaseModel):
+    """Input schema for web / places search"""
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+class SerperSearchTool(BaseTool):
+    """
+    Serper web search ("search") or Google Places search ("places").
+    """
+    name: str = "Search the internet with Serper"
+    description: str = "A tool that can be used to search the internet with a search_query."
+    args_schema: type[BaseModel] = SerperSearchInput
+    search_type: Literal["search", "places"] = "search"
+    n_results: int = 10
+    country: str = "my"  # Malaysia perspective
+
+    @property
+    def cache_name(self) -> str:
+        return f"serper_{self.search_type}"  # serper_search / serper_places
+
+    def _run(self, search_query: str) -> str:
+        return run_io(self._arun(search_query))
+
+    @compacted_output()
+    @cached_tool(canonicalize=lambda args: {"search_query": normalize_query(args["search_query"])})
+    async def _arun(self, search_query: str) -> str:
+        api_key = os.getenv("SERPER_API_KEY")
+        if not api_key:
+            return "Error: SERPER_API_KEY not found in environment variables"
+
+        payload = {"q": search_query, "gl": self.country, "num": self.n_results}
+        headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
+
+        try:
+            response = await async_http_client().post(f"{SERPER_URL}/{self.search_type}", headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            return f"Error searching with Serper: {str(e)}"
+        except json.JSONDecodeError:
+            return "Error: Invalid response from Serper API"
+
+        if self.search_type == "places":
+            return self._format_places(search_query, data.get("places", []))
+        return self._format_search(search_query, data)
+
+    def _format_search(self, query: str, data: dict) -> str:
+        results = [f"## Search: {query}\n"]
+
+        graph = data.get("knowledgeGraph")
+        if graph:
+            results.append(f"**{graph.get('title', '')}** {graph.get('type', '')}")
+            if graph.get("description"):
+                results.append(graph["description"])
+            for key, value in (graph.get("attributes") or {}).items():
+                results.append(f"- {key}: {value}")
+            results.append("")
+
+        organic = data.get("organic", [])[:self.n_results]
+        if not organic and not graph:
+            return f"No results found for: {query}"
+        for i, item in enumerate(organic, 1):
+            results.append(f"### {i}. {item.get('title', 'No title')}")
+            results.append(item.get("snippet", ""))
+            if item.get("link"):
+                results.append(item["link"])
+            results.append("")
+
+        questions = data.get("peopleAlsoAsk", [])[:3]
+        if questions:
+            results.append("### People also ask")
+            for item in questions:
+                results.append(f"- **{item.get('question', '')}** {item.get('snippet', '')}")
+
+        return "\n".join(results)
+
+    def _format_places(self, query: str, places: list) -> str:
+        if not places:
+            return f"No places found for: {query}"
+
+        results = [f"## Places: {query}\n"]
+        for i, place in enumerate(places[:self.n_results], 1):
+            rating = place.get("rating")
+            rating_str = f" | ⭐ {rating} ({place.get('ratingCount', 0):,})" if rating else ""
+            results.append(f"### {i}. {place.get('title', 'Unknown')}")
+            results.append(f"{place.get('category', 'Place')}{rating_str}")
+            if place.get("address"):
+                results.append(place["address"])
+            if place.get("website"):
+                results.append(place["website"])
+            results.append("")
+        return "\n".join(results)
+
 
 # General web search - for transportation (exclude flights)
-serper_search = SerperDevTool(
-    n_results=10,
-    country="my",  # Malaysia perspective
-)
+serper_search = SerperSearchTool()
 
 # Google Places search - for attractions, restaurants, landmarks
-serper_places = SerperDevTool(
-    search_url="https://google.serper.dev/places",
-    n_results=10,
-    country="my",  # Malaysia perspective
+serper_places = SerperSearchTool(
+    name="Search places with Serper",
+    description="A tool that searches Google Places (attractions, restaurants, landmarks) with a search_query.",
+    search_type="places",
 )
 
 
@@ -68,13 +170,21 @@ class SerperNewsTool(BaseTool):
     args_schema: type[BaseModel] = NewsSearchInput
     
     def _run(self, query: str, search_type: str = "events") -> str:
+        return run_io(self._arun(query, search_type))
+
+    @compacted_output("serper_news")
+    @cached_tool("serper_news", canonicalize=lambda args: {
+        "query": normalize_query(args["query"]),
+        "search_type": normalize_query(args["search_type"]),
+    })
+    async def _arun(self, query: str, search_type: str = "events") -> str:
         """Execute news search with past month filter"""
         
         api_key = os.getenv("SERPER_API_KEY")
         if not api_key:
             return "Error: SERPER_API_KEY not found in environment variables"
         
-        url = "https://google.serper.dev/news"
+        url = f"{SERPER_URL}/news"
         
         # Build search query based on type
         if search_type == "safety":
@@ -82,12 +192,12 @@ class SerperNewsTool(BaseTool):
         else:  # events
             enhanced_query = f"{query} (events OR festival OR concert OR exhibition OR celebration)"
         
-        payload = json.dumps({
+        payload = {
             "q": enhanced_query,
             "gl": "my",  # Malaysia perspective
             "tbs": "qdr:m",  # Past month
             "num": 10
-        })
+        }
         
         headers = {
             "X-API-KEY": api_key,
@@ -95,7 +205,7 @@ class SerperNewsTool(BaseTool):
         }
         
         try:
-            response = requests.post(url, headers=headers, data=payload, timeout=60)
+            response = await async_http_client().post(url, headers=headers, json=payload, timeout=60)
             response.raise_for_status()
             data = response.json()
             
@@ -125,7 +235,7 @@ class SerperNewsTool(BaseTool):
             
             return "\n".join(results)
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return f"Error searching news: {str(e)}"
         except json.JSONDecodeError:
             return "Error: Invalid response from Serper API"
@@ -1,14 +1,81 @@
 """
 Tavily Search Tools
 https://tavily.com/
-https://docs.crewai.com/en/tools/search-research/tavilysearchtool
+https://docs.tavily.com/documentation/api-reference/endpoint/search
 
 Tavily is best for:
 - Deep search and comprehensive information gathering
 - Getting curated, relevant content
 - Academic and in-depth queries
+
+Calls the Tavily REST API on the shared pooled async HTTP client (see
+http_pool.py) instead of the crewai_tools TavilySearchTool (tavily-python
+opens a new requests connection per search). Same name; the JSON output is
+compacted into plain result blocks before the agent sees it (compaction.py).
 """
-from crewai_tools import TavilySearchTool
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Literal
+import httpx
+import json
+import os
+
+from carribulus.tools.http_pool import async_http_client, run_io
+from carribulus.tools.tool_cache import cached_tool, normalize_query
+from carribulus.tools.compaction import compacted_output
+
+TAVILY_URL = "https://api.tavily.com/search"
+
+
+class TavilySearchInput(BaseModel):
+    """Input schema for Tavily search"""
+    query: str = Field(..., description="The search query string.")
+
+
+class TavilySearchTool(BaseTool):
+    """Tavily web search, returns results as JSON (content truncated per result)"""
+    name: str = "Tavily Search"
+    description: str = (
+        "A tool that performs web searches using the Tavily Search API. "
+        "It returns a JSON object containing the search results."
+    )
+    args_schema: type[BaseModel] = TavilySearchInput
+    search_depth: Literal["basic", "advanced"] = "basic"
+    max_results: int = 5
+    max_content_length_per_result: int = 1000
+
+    def _run(self, query: str) -> str:
+        return run_io(self._arun(query))
+
+    @compacted_output("tavily_search")
+    @cached_tool("tavily_search", canonicalize=lambda args: {"query": normalize_query(args["query"])})
+    async def _arun(self, query: str) -> str:
+        api_key = os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            return "Error: TAVILY_API_KEY not found in environment variables"
+
+        payload = {
+            "query": query,
+            "search_depth": self.search_depth,
+            "max_results": self.max_results,
+        }
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+        try:
+            response = await async_http_client().post(TAVILY_URL, headers=headers, json=payload, timeout=60)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            return f"Error searching with Tavily: {str(e)}"
+        except json.JSONDecodeError:
+            return "Error: Invalid response from Tavily API"
+
+        for item in data.get("results", []):
+            content = item.get("content")
+            if isinstance(content, str) and len(content) > self.max_content_length_per_result:
+                item["content"] = content[:self.max_content_length_per_result] + "..."
+
+        return json.dumps(data, indent=2, ensure_ascii=False)
 
 
 # Deep search for comprehensive local information
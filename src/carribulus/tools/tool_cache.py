@@ -0,0 +1,287 @@
+"""
+Persistent TTL Tool-Result Cache
+
+Search results barely change within minutes, yet every tool call hit the
+network (even when the manager re-delegated the same query within one run).
+Tools opt in with the @cached_tool decorator on `_arun` (or `_run`):
+
+- Key: tool name + canonicalized arguments (e.g. upper-cased IATA codes,
+  normalized queries, sorted children ages), so trivially different calls
+  share one entry
+- Storage: in-memory LRU (hot, per process) in front of a SQLite file
+  (WAL, survives restarts and is shared by every worker process)
+- TTL per tool (flights 15 min, news 1 h, places 1 day, ...)
+- Error outputs are never cached
+- Hit/miss stats per tool, see tool_cache.stats()
+
+Config (.env):
+    TOOL_CACHE_ENABLED=true
+    TOOL_CACHE_PATH=tool_cache.db
+    TOOL_CACHE_MEMORY_SIZE=256          # 0 = SQLite only
+    TOOL_CACHE_TTL_SERPAPI_FLIGHTS=900  # override any tool's TTL (seconds)
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Callable, Optional
+
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "tool_cache.db")
+TOOL_CACHE_MEMORY_SIZE = int(os.getenv("TOOL_CACHE_MEMORY_SIZE", "256"))
+
+# Default TTL (seconds) per tool
+DEFAULT_TTLS = {
+    "serpapi_flights": 15 * 60,     # prices move fast
+    "serpapi_hotels": 60 * 60,
+    "serper_news": 60 * 60,
+    "serper_search": 6 * 3600,
+    "serper_places": 24 * 3600,     # places barely change
+    "tavily_search": 24 * 3600,
+}
+
+# Outputs starting with these are failures, never cache them
+_ERROR_PREFIXES = ("Error", "API Error", "❌")
+
+
+def tool_ttl(tool: str) -> int:
+    override = os.getenv(f"TOOL_CACHE_TTL_{tool.upper()}")
+    if override is not None:
+        return int(override)
+    return DEFAULT_TTLS.get(tool, 0)
+
+
+# Argument canonicalization
+# =============================================================================
+
+def normalize_query(text: Optional[str]) -> Optional[str]:
+    """Case/whitespace-insensitive free-text query"""
+    if text is None:
+        return None
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+
+def canonical_ages(ages: Optional[str]) -> Optional[str]:
+    """'8, 5' → '5,8' (order of children doesn't change the results)"""
+    if not ages:
+        return None
+    parts = [a.strip() for a in str(ages).split(",") if a.strip()]
+    try:
+        return ",".join(str(a) for a in sorted(int(a) for a in parts))
+    except ValueError:
+        return ",".join(sorted(parts))
+
+
+def canonical_code(code: Optional[str]) -> Optional[str]:
+    """IATA / currency codes: ' kul ' → 'KUL'"""
+    return code.strip().upper() if isinstance(code, str) else code
+
+
+def cache_key(tool: str, args: dict) -> str:
+    payload = json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{tool}\x1f{payload}".encode("utf-8")).hexdigest()
+
+
+# Cache
+# =============================================================================
+
+class _ToolStats:
+    __slots__ = ("memory_hits", "disk_hits", "misses", "stores")
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+
+class ToolResultCache:
+    """Memory LRU + SQLite, thread-safe (tools run on crew worker threads)"""
+
+    def __init__(self, path: str = TOOL_CACHE_PATH, memory_size: int = TOOL_CACHE_MEMORY_SIZE,
+                 enabled: bool = TOOL_CACHE_ENABLED):
+        self.path = path
+        self.memory_size = max(0, memory_size)
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._puts = 0
+        self._stats: dict = defaultdict(_ToolStats)
+
+    def _db(self) -> sqlite3.Connection:
+        # Caller holds _db_lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, result TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, expires_at: float, result: str):
+        # Caller holds _lock
+        if not self.memory_size:
+            return
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, tool: str, key: str) -> Optional[str]:
+        now = time.time()
+        stats = self._stats[tool]
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    stats.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        try:
+            with self._db_lock:
+                row = self._db().execute(
+                    "SELECT result, expires_at FROM tool_results WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Tool cache read failed: {e}")
+            row = None
+
+        if row is None:
+            stats.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, row[1], row[0])
+        stats.disk_hits += 1
+        return row[0]
+
+    def put(self, tool: str, key: str, result: str, ttl: int):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, result)
+        try:
+            with self._db_lock:
+                conn = self._db()
+                conn.execute(
+                    "INSERT INTO tool_results (key, tool, result, expires_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET result = excluded.result, expires_at = excluded.expires_at",
+                    (key, tool, result, expires_at)
+                )
+                self._puts += 1
+                if self._puts % 100 == 0:
+                    conn.execute("DELETE FROM tool_results WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            print(f"Tool cache write failed: {e}")
+        self._stats[tool].stores += 1
+
+    def stats(self) -> dict:
+        tools = {}
+        for tool, s in list(self._stats.items()):
+            hits = s.memory_hits + s.disk_hits
+            lookups = hits + s.misses
+            tools[tool] = {
+                "hits": hits,
+                "memory_hits": s.memory_hits,
+                "disk_hits": s.disk_hits,
+                "misses": s.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": s.stores,
+                "ttl_s": tool_ttl(tool),
+            }
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "memory_entries": len(self._memory),
+            "memory_size": self.memory_size,
+            "tools": tools,
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+tool_cache = ToolResultCache()
+
+
+def _cacheable(result) -> bool:
+    return isinstance(result, str) and bool(result) and not result.startswith(_ERROR_PREFIXES)
+
+
+def cached_tool(name: Optional[str] = None, canonicalize: Optional[Callable[[dict], dict]] = None):
+    """
+    Cache the string output of a tool's `_arun` (async) or `_run` (sync).
+
+    name:         cache/TTL name (e.g. "serper_news"); None = the tool's `cache_name`
+    canonicalize: args dict → canonical args dict (what makes two calls "the same")
+    """
+    def decorator(run):
+        signature = inspect.signature(run)
+
+        def lookup(self, args, kwargs) -> Optional[tuple]:
+            """(tool, key, ttl), or None if this call isn't cached"""
+            tool = name or self.cache_name
+            ttl = tool_ttl(tool)
+            if not tool_cache.enabled or ttl <= 0:
+                return None
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            call_args = dict(bound.arguments)
+            call_args.pop("self", None)
+            return tool, cache_key(tool, canonicalize(dict(call_args)) if canonicalize else call_args), ttl
+
+        if inspect.iscoroutinefunction(run):
+            @functools.wraps(run)
+            async def async_wrapper(self, *args, **kwargs):
+                entry = lookup(self, args, kwargs)
+                if entry is None:
+                    return await run(self, *args, **kwargs)
+                tool, key, ttl = entry
+
+                # SQLite access off the event loop
+                cached = await asyncio.to_thread(tool_cache.get, tool, key)
+                if cached is not None:
+                    return cached
+
+                result = await run(self, *args, **kwargs)
+                if _cacheable(result):
+                    await asyncio.to_thread(tool_cache.put, tool, key, result, ttl)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(run)
+        def wrapper(self, *args, **kwargs):
+            entry = lookup(self, args, kwargs)
+            if entry is None:
+                return run(self, *args, **kwargs)
+            tool, key, ttl = entry
+
+            cached = tool_cache.get(tool, key)
+            if cached is not None:
+                return cached
+
+            result = run(self, *args, **kwargs)
+            if _cacheable(result):
+                tool_cache.put(tool, key, result, ttl)
+            return result
+
+        return wrapper
+    return decorator
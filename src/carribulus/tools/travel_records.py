@@ -0,0 +1,163 @@
+"""
+Compact Flight / Hotel Result Records
+
+SerpAPI responses are large nested JSON (booking tokens, carbon emissions,
+images, nearby places, ...), and the tools used to format straight from
+those dicts, keeping whole responses alive while e.g. a flight matrix or an
+area comparison was being assembled.
+
+The responses are now parsed ONCE into small `__slots__` dataclasses that
+hold only the fields we show or compute with. Formatting, ranking (cheapest
+fare, hotel sort), merging and budget totals all work from these records.
+
+See tests/bench_travel_records.py for memory and parse-time numbers.
+"""
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _number(value) -> Optional[float]:
+    """SerpAPI prices: 310, 310.5 or 'MYR 1,310' → float (None if absent)"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    digits = re.sub(r"[^\d.]", "", str(value or ""))
+    try:
+        return float(digits) if digits else None
+    except ValueError:
+        return None
+
+
+# Flights
+# =============================================================================
+
+@dataclass(slots=True, frozen=True)
+class FlightLeg:
+    airline: str
+    flight_number: str
+    departure_airport: str
+    departure_time: str
+    arrival_airport: str
+    arrival_time: str
+    duration: int  # minutes
+
+
+@dataclass(slots=True, frozen=True)
+class FlightOption:
+    price: Optional[int]
+    total_duration: int  # minutes, layovers included
+    legs: tuple
+
+    @property
+    def stops(self) -> int:
+        return max(0, len(self.legs) - 1)
+
+    @property
+    def airline(self) -> str:
+        return self.legs[0].airline if self.legs else "Unknown"
+
+    @property
+    def route(self) -> str:
+        if not self.legs:
+            return "N/A"
+        return f"{self.legs[0].departure_time} → {self.legs[-1].arrival_time}"
+
+    @classmethod
+    def from_serpapi(cls, data: dict) -> "FlightOption":
+        legs = tuple(
+            FlightLeg(
+                airline=leg.get("airline", "Unknown"),
+                flight_number=leg.get("flight_number", ""),
+                departure_airport=(leg.get("departure_airport") or {}).get("id", ""),
+                departure_time=(leg.get("departure_airport") or {}).get("time", ""),
+                arrival_airport=(leg.get("arrival_airport") or {}).get("id", ""),
+                arrival_time=(leg.get("arrival_airport") or {}).get("time", ""),
+                duration=int(leg.get("duration") or 0),
+            )
+            for leg in data.get("flights", [])
+        )
+        price = data.get("price")
+        return cls(
+            price=int(price) if isinstance(price, (int, float)) and not isinstance(price, bool) else None,
+            total_duration=int(data.get("total_duration") or 0),
+            legs=legs,
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class FlightResults:
+    best: tuple
+    other: tuple
+    lowest_price: Optional[int] = None
+    typical_range: Optional[tuple] = None
+    price_level: Optional[str] = None
+
+    @property
+    def has_insights(self) -> bool:
+        return self.lowest_price is not None or self.typical_range is not None or self.price_level is not None
+
+    def cheapest(self) -> Optional[FlightOption]:
+        priced = [f for f in (*self.best, *self.other) if f.price is not None]
+        return min(priced, key=lambda f: f.price) if priced else None
+
+    @classmethod
+    def from_serpapi(cls, data: dict) -> "FlightResults":
+        insights = data.get("price_insights") or {}
+        typical = insights.get("typical_price_range")
+        return cls(
+            best=tuple(FlightOption.from_serpapi(f) for f in data.get("best_flights", [])),
+            other=tuple(FlightOption.from_serpapi(f) for f in data.get("other_flights", [])),
+            lowest_price=insights.get("lowest_price"),
+            typical_range=tuple(typical) if typical and len(typical) == 2 else None,
+            price_level=insights.get("price_level"),
+        )
+
+
+# Hotels
+# =============================================================================
+
+@dataclass(slots=True, frozen=True)
+class HotelOption:
+    key: str                  # property_token (or the name), for dedupe across searches
+    name: str
+    type: str
+    rating: Optional[float]
+    reviews: int
+    price: Optional[float]    # lowest per night
+    price_text: str           # as shown by Google, e.g. "MYR 310"
+    total: Optional[float]    # lowest for the whole stay
+    total_text: str
+    amenities: tuple
+    link: str
+
+    def total_for(self, nights: int) -> Optional[float]:
+        """Stay total for the budget: Google's total, else price per night x nights"""
+        if self.total is not None:
+            return self.total
+        return self.price * nights if self.price is not None else None
+
+    @classmethod
+    def from_serpapi(cls, data: dict) -> "HotelOption":
+        name = data.get("name", "Unknown Hotel")
+        rate = data.get("rate_per_night") or {}
+        total = data.get("total_rate") or {}
+        rating = data.get("overall_rating")
+        return cls(
+            key=data.get("property_token") or re.sub(r"\s+", " ", name).strip().lower(),
+            name=name,
+            type=data.get("type", "Hotel"),
+            rating=float(rating) if isinstance(rating, (int, float)) else None,
+            reviews=int(data.get("reviews") or 0),
+            price=_number(rate.get("extracted_lowest", rate.get("lowest"))),
+            price_text=rate.get("lowest", "N/A"),
+            total=_number(total.get("extracted_lowest", total.get("lowest"))),
+            total_text=total.get("lowest", "N/A"),
+            amenities=tuple(data.get("amenities") or ()),
+            link=data.get("link", ""),
+        )
+
+
+def parse_hotels(data: dict) -> list:
+    return [HotelOption.from_serpapi(p) for p in data.get("properties", [])]
@@ -0,0 +1,280 @@
+"""
+Content-Addressed Vision Result Cache
+
+Travellers share the same menu / sign photos, and the same image comes back
+in a follow-up turn with a slightly different question. Every time it was
+downloaded, re-encoded and sent through a full VLM call again.
+
+Vision analyses are now cached by IMAGE CONTENT + normalized question:
+
+- Exact: sha256 of the original image bytes
+- Near-duplicate (OFF by default): 64-bit perceptual hash (dHash) of the
+  image within VISION_CACHE_PHASH_DISTANCE bits finds candidates (the same
+  photo recompressed by a chat app, resized, ...). A dHash can't tell two
+  text menus apart (different dishes and prices hash identically), so every
+  candidate is confirmed: same aspect ratio and at most
+  VISION_CACHE_PIXEL_DIFF of the pixels of a 256x256 grayscale thumbnail
+  differing noticeably
+- Question: case/whitespace/punctuation-insensitive ("Translate this menu?"
+  == "translate this menu")
+- Source aliases: a URL / local file (path + size + mtime) / base64 string
+  that was already loaded maps straight to its content hash, so a repeat
+  skips the download too, not only the model call
+- In-memory LRU (VISION_CACHE_SIZE entries) with a TTL, error outputs are
+  never cached, answers are shared by all vision providers
+
+Config (.env):
+    VISION_CACHE_ENABLED=true
+    VISION_CACHE_SIZE=256
+    VISION_CACHE_TTL=86400           # seconds
+    VISION_CACHE_PHASH_DISTANCE=0    # max differing bits of 64, 0 = exact only
+    VISION_CACHE_PIXEL_DIFF=0.0005   # near-duplicates: max fraction of differing thumbnail pixels
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from carribulus.tools.image_loader import LoadedImage, load_image
+
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+VISION_CACHE_SIZE = int(os.getenv("VISION_CACHE_SIZE", "256"))
+VISION_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL", str(24 * 3600)))
+VISION_CACHE_PHASH_DISTANCE = int(os.getenv("VISION_CACHE_PHASH_DISTANCE", "0"))
+VISION_CACHE_PIXEL_DIFF = float(os.getenv("VISION_CACHE_PIXEL_DIFF", "0.0005"))
+
+# Thumbnail pixels differing by more than this (of 255) count as different
+_PIXEL_TOLERANCE = 64
+# Max relative difference of the aspect ratios of near-duplicates
+_ASPECT_TOLERANCE = 0.02
+
+# Outputs starting with these are failures, never cache them
+_ERROR_PREFIXES = ("Error", "API Error", "❌")
+
+
+def normalize_question(question: Optional[str]) -> str:
+    """'  Translate this MENU, please? ' → 'translate this menu please'"""
+    words = re.findall(r"\w+", str(question or "").lower())
+    return " ".join(words)
+
+
+def _aspect(image: LoadedImage) -> float:
+    return image.width / image.height if image.width and image.height else 0.0
+
+
+def same_picture(entry: "_Entry", image: LoadedImage, max_diff: float = VISION_CACHE_PIXEL_DIFF) -> bool:
+    """Confirm a dHash candidate: same aspect ratio, (almost) the same thumbnail pixels"""
+    if entry.thumbnail is None or image.thumbnail is None or not entry.aspect:
+        return False
+    if abs(entry.aspect - _aspect(image)) > _ASPECT_TOLERANCE * entry.aspect:
+        return False
+    a = np.frombuffer(entry.thumbnail, dtype=np.uint8).astype(np.int16)
+    b = np.frombuffer(image.thumbnail, dtype=np.uint8).astype(np.int16)
+    if a.shape != b.shape:
+        return False
+    return float((np.abs(a - b) > _PIXEL_TOLERANCE).mean()) <= max_diff
+
+
+def source_key(image_source: str) -> Optional[str]:
+    """
+    Identity of an image INPUT (before loading it):
+    URL as given, local file by path + size + mtime, base64 by its digest
+    """
+    source = image_source.strip()
+    if source.startswith(("http://", "https://")):
+        return f"url:{source}"
+    if source.startswith("data:") or len(source) > 500:
+        return "b64:" + hashlib.sha256(source.encode("utf-8")).hexdigest()
+    try:
+        stat = Path(source).stat()
+    except OSError:
+        return None
+    return f"file:{Path(source).resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+@dataclass(slots=True)
+class _Entry:
+    sha256: str
+    phash: Optional[int]
+    aspect: float
+    thumbnail: Optional[bytes]
+    question: str
+    answer: str
+    provider: str
+    expires_at: float
+
+
+class VisionCache:
+    """LRU of (image sha256, normalized question) → answer, thread-safe"""
+
+    def __init__(self, size: int = VISION_CACHE_SIZE, ttl: float = VISION_CACHE_TTL,
+                 phash_distance: int = VISION_CACHE_PHASH_DISTANCE, enabled: bool = VISION_CACHE_ENABLED):
+        self.size = max(0, size)
+        self.ttl = ttl
+        self.phash_distance = phash_distance
+        self.enabled = enabled and self.size > 0
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        # source key → (sha256, expires_at) of the image it loaded
+        self._sources: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.source_hits = 0    # download + model call skipped
+        self.exact_hits = 0     # model call skipped
+        self.near_hits = 0      # model call skipped (perceptual match)
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _live(self, key: tuple, now: float) -> Optional[_Entry]:
+        # Caller holds _lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _near(self, image: LoadedImage, question: str, now: float) -> Optional[_Entry]:
+        # Caller holds _lock. Linear scan, the cache holds a few hundred entries
+        candidates = []
+        for entry in self._entries.values():
+            if entry.question != question or entry.phash is None or entry.expires_at <= now:
+                continue
+            distance = (entry.phash ^ image.phash).bit_count()
+            if distance <= self.phash_distance:
+                candidates.append((distance, entry))
+        best = None
+        for _, entry in sorted(candidates, key=lambda c: c[0]):
+            if same_picture(entry, image):
+                best = entry
+                break
+        if best is not None:
+            self._entries.move_to_end((best.sha256, question))
+        return best
+
+    def _alias(self, source: Optional[str], image: LoadedImage, now: float):
+        # Caller holds _lock
+        if source is None:
+            return
+        self._sources[source] = (image.sha256, now + self.ttl)
+        self._sources.move_to_end(source)
+        while len(self._sources) > self.size:
+            self._sources.popitem(last=False)
+
+    def get_by_source(self, image_source: str, question: str) -> Optional[str]:
+        """Answer for an input that was loaded before, without loading it again"""
+        if not self.enabled:
+            return None
+        source = source_key(image_source)
+        if source is None:
+            return None
+        now = time.time()
+        with self._lock:
+            alias = self._sources.get(source)
+            if alias is None or alias[1] <= now:
+                return None
+            # Exact only: near-duplicates need the loaded thumbnail to be confirmed
+            entry = self._live((alias[0], question), now)
+            if entry is None:
+                return None
+            self._sources.move_to_end(source)
+            self.source_hits += 1
+        print(f"Vision cache hit (source, {entry.provider}): download and model call skipped")
+        return entry.answer
+
+    def get(self, image_source: str, image: LoadedImage, question: str) -> Optional[str]:
+        """Answer for this image content (exact, then near-duplicate)"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._live((image.sha256, question), now)
+            kind = "exact"
+            if entry is None and image.phash is not None and self.phash_distance > 0:
+                entry = self._near(image, question, now)
+                kind = "near-duplicate"
+            if entry is None:
+                self.misses += 1
+                return None
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            self._alias(source_key(image_source), image, now)
+        print(f"Vision cache hit ({kind}, {entry.provider}): model call skipped")
+        return entry.answer
+
+    def put(self, image_source: str, image: LoadedImage, question: str, answer: str, provider: str):
+        if not self.enabled or not isinstance(answer, str) or not answer or answer.startswith(_ERROR_PREFIXES):
+            return
+        now = time.time()
+        key = (image.sha256, question)
+        with self._lock:
+            self._entries[key] = _Entry(image.sha256, image.phash, _aspect(image), image.thumbnail,
+                                        question, answer, provider, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._alias(source_key(image_source), image, now)
+            self.stores += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.source_hits + self.exact_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "sources": len(self._sources),
+                "size": self.size,
+                "hits": hits,
+                "source_hits": self.source_hits,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+vision_cache = VisionCache()
+
+
+async def cached_vision(
+    provider: str,
+    image_source: str,
+    question: str,
+    analyze: Callable[[LoadedImage], Awaitable[str]],
+) -> str:
+    """
+    Vision tool flow: source alias → load image → content lookup → model call
+    (analyze) → store. Returns the answer or an "Error ..." string.
+    """
+    normalized = normalize_question(question)
+    answer = vision_cache.get_by_source(image_source, normalized)
+    if answer is not None:
+        return answer
+
+    # Size-limited, downscaled, EXIF stripped (see image_loader.py)
+    try:
+        image = await load_image(image_source)
+    except Exception as e:
+        return f"Error processing image: {str(e)}"
+
+    answer = vision_cache.get(image_source, image, normalized)
+    if answer is not None:
+        return answer
+
+    answer = await analyze(image)
+    vision_cache.put(image_source, image, normalized, answer, provider)
+    return answer
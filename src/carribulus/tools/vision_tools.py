@@ -9,18 +9,25 @@ Supports:
 - URL links (https://...)
 - Local file paths (C:\\...\\image.jpg)
 - Base64 encoded strings (raw or data URI)
+
+Natively async (`_arun`): downloads and API calls run on the shared pooled
+HTTP client, `_run` runs the same coroutine on the tool I/O loop (see http_pool.py).
+
+All inputs go through the shared image loader (image_loader.py): size-limited
+download, downscaled to an OCR-friendly resolution, EXIF stripped, encoded once.
+Answers are cached by image content + question (vision_cache.py).
 """
 
 import os
-import re
-import base64
-import requests
-import mimetypes
-from pathlib import Path
-from typing import Type, Tuple
+import time
+from typing import Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from carribulus.tools.http_pool import async_http_client, run_io
+from carribulus.tools.image_loader import LoadedImage, record_upload
+from carribulus.tools.vision_cache import cached_vision
 
 
 # Image Input Schema
@@ -68,108 +75,37 @@ class GeminiVisionTool(BaseTool):
         self,
         image_source: str,
         question: str = "Describe the content of this image in detail."
+    ) -> str:
+        return run_io(self._arun(image_source, question))
+
+    async def _arun(
+        self,
+        image_source: str,
+        question: str = "Describe the content of this image in detail."
     ) -> str:
         # Check API key
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             return "Error: GEMINI_API_KEY not found in environment variables."
         
-        # Convert to base64
-        try:
-            image_b64, mime_type = self._get_image_base64(image_source)
-        except Exception as e:
-            return f"Error processing image: {str(e)}"
-        
+        # Repeat images skip the download and the model call (see vision_cache.py)
+        return await cached_vision(
+            "gemini", image_source, question,
+            lambda image: self._analyze(api_key, image, question)
+        )
+    
+    async def _analyze(self, api_key: str, image: LoadedImage, question: str) -> str:
         # Call Gemini API
+        start = time.perf_counter()
         try:
-            result = self._call_gemini_vision(api_key, image_b64, mime_type, question)
+            result = await self._call_gemini_vision(api_key, image.b64, image.mime_type, question)
+            record_upload("gemini", image, time.perf_counter() - start)
             return result
         except Exception as e:
+            record_upload("gemini", image, time.perf_counter() - start, ok=False)
             return f"Error calling Gemini Vision API: {str(e)}"
     
-    def _get_image_base64(self, image_source: str) -> Tuple[str, str]:
-        """
-        Convert to base64 + MIME type
-
-        Unified processing for all input formats:
-        1. data:image/jpeg;base64,xxx → Extract base64 and MIME
-        2. Very long string → Assume it's raw base64
-        3. https://... → Download and convert
-        4. Local path → Read and convert
-
-        Returns:
-            Tuple of (base64_string, mime_type)
-        """
-        image_source = image_source.strip()
-        
-        # Case 1: If it is data URI format already
-        # For example: data:image/jpeg;base64,/9j/4AAQ...
-        if image_source.startswith("data:"):
-            match = re.match(r"data:([^;]+);base64,(.+)", image_source)
-            if match:
-                mime_type = match.group(1)  # 1st group: image/jpeg
-                b64_data = match.group(2)   # 2nd group: /9j/4AAQ...
-                return b64_data, mime_type
-            else:
-                raise ValueError("Invalid data URI format")
-        
-        # Case 2: Raw base64
-        if len(image_source) > 500 and "/" not in image_source[:50] and "\\" not in image_source[:50]:
-            return image_source, "image/jpeg"  # Assume is JPEG
-        
-        # Case 3: URL
-        if image_source.startswith(("http://", "https://")):
-            return self._download_image_to_base64(image_source)
-        
-        # Case 4: Local image path
-        return self._read_local_file_to_base64(image_source)
-    
-    def _download_image_to_base64(self, url: str) -> Tuple[str, str]:
-        """
-        Download image from URL and convert to base64
-        """
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-
-        # Get MIME type (from response header or guess)
-        content_type = response.headers.get("Content-Type", "")
-        if "image/" in content_type:
-            # "image/jpeg; charset=utf-8" → "image/jpeg"
-            mime_type = content_type.split(";")[0].strip()
-        else:
-            # Guess from URL extension (.jpg → image/jpeg)
-            mime_type = mimetypes.guess_type(url)[0] or "image/jpeg"
-
-        # base64.b64encode() returns bytes, need to decode to string
-        b64_data = base64.b64encode(response.content).decode("utf-8")
-        return b64_data, mime_type
-    
-    def _read_local_file_to_base64(self, file_path: str) -> Tuple[str, str]:
-        """
-        Read local file and convert to base64
-        """
-        path = Path(file_path)
-        
-        if not path.exists():
-            raise FileNotFoundError(f"Image file not found: {file_path}")
-        
-        if not path.is_file():
-            raise ValueError(f"Path is not a file: {file_path}")
-        
-        # Get MIME type from extension
-        mime_type = mimetypes.guess_type(str(path))[0] or "image/jpeg"
-        
-        # "rb" = read binary（Image is binary）
-        with open(path, "rb") as f:
-            b64_data = base64.b64encode(f.read()).decode("utf-8")
-        
-        return b64_data, mime_type
-    
-    def _call_gemini_vision(
+    async def _call_gemini_vision(
         self,
         api_key: str,
         image_b64: str,
@@ -203,7 +139,7 @@ class GeminiVisionTool(BaseTool):
         }
         
         # POST
-        response = requests.post(url, json=payload, timeout=60)
+        response = await async_http_client().post(url, json=payload, timeout=60)
         
         if response.status_code != 200:
             error_msg = response.json().get("error", {}).get("message", response.text)
@@ -223,6 +159,21 @@ gemini_vision = GeminiVisionTool()
 # Provider 2: Hugging Face Vision
 # =============================================================================
 
+# Only touched from the tool I/O loop (single thread), so no lock needed
+_hf_clients: dict = {}
+
+def _hf_client(hf_token: str) -> AsyncOpenAI:
+    """One OpenAI SDK client per token, on the shared async connection pool"""
+    client = _hf_clients.get(hf_token)
+    if client is None:
+        client = AsyncOpenAI(
+            base_url="https://router.huggingface.co/v1",
+            api_key=hf_token,
+            http_client=async_http_client(),
+        )
+        _hf_clients[hf_token] = client
+    return client
+
 class HuggingFaceVisionTool(BaseTool):
     """
     Uses Hugging Face to call Qwen Vision model 
@@ -245,40 +196,35 @@ class HuggingFaceVisionTool(BaseTool):
         image_source: str,
         question: str = "Describe the content of this image in detail."
     ) -> str:
+        return run_io(self._arun(image_source, question))
+
+    async def _arun(
+        self,
+        image_source: str,
+        question: str = "Describe the content of this image in detail."
+    ) -> str:
         
         hf_token = os.getenv("HF_TOKEN")
         if not hf_token:
             return "Error: HF_TOKEN not found in environment variables."
 
-        image_source = image_source.strip()
-        
-        if image_source.startswith(("http://", "https://")):
-            image_url = image_source
-        elif image_source.startswith("data:"):
-            image_url = image_source
-        elif len(image_source) > 500:
-            # Raw base64，add data URI prefix
-            image_url = f"data:image/jpeg;base64,{image_source}"
-        else:
-            # If local file path, convert to data URI
-            try:
-                path = Path(image_source)
-                mime_type = mimetypes.guess_type(str(path))[0] or "image/jpeg"
-                with open(path, "rb") as f:
-                    b64_data = base64.b64encode(f.read()).decode("utf-8")
-                image_url = f"data:{mime_type};base64,{b64_data}"
-            except Exception as e:
-                return f"Error reading file: {str(e)}"
+        # URLs are downloaded too (size-limited and downscaled) instead of
+        # letting the provider fetch the full-size original
+        return await cached_vision(
+            "huggingface", image_source, question,
+            lambda image: self._analyze(hf_token, image, question)
+        )
+
+    async def _analyze(self, hf_token: str, image: LoadedImage, question: str) -> str:
+        image_url = image.data_uri
         
+        start = time.perf_counter()
         try:
             # Uses OpenAI SDK，but direct to Hugging Face Router
-            client = OpenAI(
-                base_url="https://router.huggingface.co/v1",
-                api_key=hf_token,
-            )
+            client = _hf_client(hf_token)
             
             # messages.content is list，including text & image_url
-            completion = client.chat.completions.create(
+            completion = await client.chat.completions.create(
                 model="Qwen/Qwen3-VL-8B-Instruct:novita",
                 messages=[{
                     "role": "user",
@@ -290,9 +236,11 @@ class HuggingFaceVisionTool(BaseTool):
                 max_tokens=2048
             )
             
+            record_upload("huggingface", image, time.perf_counter() - start)
             return completion.choices[0].message.content
             
         except Exception as e:
+            record_upload("huggingface", image, time.perf_counter() - start, ok=False)
             return f"Error calling Hugging Face API: {str(e)}"
 
 huggingface_vision = HuggingFaceVisionTool()
@@ -319,47 +267,28 @@ class OpenRouterVisionTool(BaseTool):
         image_source: str,
         question: str = "Describe the content of this image in detail."
     ) -> str:
+        return run_io(self._arun(image_source, question))
+
+    async def _arun(
+        self,
+        image_source: str,
+        question: str = "Describe the content of this image in detail."
+    ) -> str:
         
         api_key = os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             return "Error: OPENROUTER_API_KEY not found in environment variables."
         
-        image_source = image_source.strip()
-        
-        if image_source.startswith(("http://", "https://")):
-            # URL needs to convert to base64
-            # OpenRouter seems not directly support URL
-            try:
-                headers = {"User-Agent": "Mozilla/5.0"}
-                response = requests.get(image_source, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                content_type = response.headers.get("Content-Type", "")
-                if "image/" in content_type:
-                    mime_type = content_type.split(";")[0].strip()
-                else:
-                    mime_type = mimetypes.guess_type(image_source)[0] or "image/jpeg"
-                
-                b64_data = base64.b64encode(response.content).decode("utf-8")
-                image_url = f"data:{mime_type};base64,{b64_data}"
-            except Exception as e:
-                return f"Error downloading image: {str(e)}"
-            
-        elif image_source.startswith("data:"):
-            image_url = image_source
-        elif len(image_source) > 500:
-            image_url = f"data:image/jpeg;base64,{image_source}"
-        else:
-            # For local file path
-            try:
-                path = Path(image_source)
-                mime_type = mimetypes.guess_type(str(path))[0] or "image/jpeg"
-                with open(path, "rb") as f:
-                    b64_data = base64.b64encode(f.read()).decode("utf-8")
-                image_url = f"data:{mime_type};base64,{b64_data}"
-            except Exception as e:
-                return f"Error reading file: {str(e)}"
+        return await cached_vision(
+            "openrouter", image_source, question,
+            lambda image: self._analyze(api_key, image, question)
+        )
+
+    async def _analyze(self, api_key: str, image: LoadedImage, question: str) -> str:
+        # OpenRouter seems not directly support URL, images always go as data URI
+        image_url = image.data_uri
         
+        start = time.perf_counter()
         try:
             # Headers
             headers = {
@@ -380,7 +309,7 @@ class OpenRouterVisionTool(BaseTool):
                 "max_tokens": 2048
             }
             
-            response = requests.post(
+            response = await async_http_client().post(
                 "https://openrouter.ai/api/v1/chat/completions",
                 headers=headers,
                 json=payload,
@@ -392,9 +321,11 @@ class OpenRouterVisionTool(BaseTool):
                 raise Exception(f"OpenRouter API error ({response.status_code}): {error}")
             
             data = response.json()
+            record_upload("openrouter", image, time.perf_counter() - start)
             return data["choices"][0]["message"]["content"]
             
         except Exception as e:
+            record_upload("openrouter", image, time.perf_counter() - start, ok=False)
             return f"Error calling OpenRouter API: {str(e)}"
 
 openrouter_vision = OpenRouterVisionTool()
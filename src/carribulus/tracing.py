@@ -0,0 +1,291 @@
+"""
+MLflow Tracing: Background Batching Export + Sampling
+
+mlflow.crewai.autolog() exports every span synchronously when it ends: one
+SQLite write per span (sqlite:///mlflow.db) on the crew's own thread, and
+under concurrency the single database file became a lock-contention point.
+
+setup_tracing() keeps autolog (spans are still recorded in memory by MLflow)
+but replaces the exporter:
+
+- Child spans are no longer written one by one, the whole trace is exported
+  when its root span ends (same spans / trace info as before)
+- Finished traces go to a bounded queue (TRACE_QUEUE_SIZE). A full queue
+  DROPS the trace (counted) instead of blocking the crew
+- One background thread writes them in batches (up to TRACE_BATCH_SIZE
+  traces, at least every TRACE_FLUSH_INTERVAL seconds): a single writer,
+  no lock contention on the SQLite file
+- Sampling, decided when the trace is complete:
+    head  keep TRACE_SAMPLE_RATE of the traces (0.0 - 1.0)
+    tail  always keep errored traces (TRACE_KEEP_ERRORS) and slow ones
+          (at least TRACE_SLOW_THRESHOLD seconds), whatever the rate
+  MLflow's own MLFLOW_TRACE_SAMPLING_RATIO samples at span START and would
+  drop errors / slow runs too, leave it unset
+- Pending traces are flushed at shutdown (API lifespan / process exit)
+
+The exporter hooks into MLflow internals (span processor factory, the
+exporter's _log_spans / _log_trace; checked against mlflow 3.6 - 3.7). If
+the installed MLflow lacks them, a warning is printed and plain autolog with
+MLflow's own synchronous export is used instead.
+
+Used by the CLI (main.py), the API (lifespan) and the crew workers (process
+pool workers are separate processes and set it up on their first run).
+
+Config (.env):
+    ENABLE_TRACING=true
+    MLFLOW_TRACKING_URI=sqlite:///mlflow.db
+    TRACE_SAMPLE_RATE=1.0
+    TRACE_KEEP_ERRORS=true
+    TRACE_SLOW_THRESHOLD=60          # seconds, 0 = off
+    TRACE_QUEUE_SIZE=256             # traces waiting for export, more are dropped
+    TRACE_BATCH_SIZE=16
+    TRACE_FLUSH_INTERVAL=2           # seconds
+"""
+import os
+import time
+import queue
+import atexit
+import random
+import threading
+from typing import Optional
+
+ENABLE_TRACING = os.getenv("ENABLE_TRACING", "true").lower() == "true"
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "sqlite:///mlflow.db")
+MLFLOW_EXPERIMENT = "Carribulus-TravelAgent"
+TRACE_SAMPLE_RATE = min(1.0, max(0.0, float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))))
+TRACE_KEEP_ERRORS = os.getenv("TRACE_KEEP_ERRORS", "true").lower() == "true"
+TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", "60"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "256"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "16"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2"))
+
+# Max time spent flushing pending traces at shutdown
+_SHUTDOWN_TIMEOUT = 10.0
+
+_setup_lock = threading.Lock()
+_setup_done = False
+_enabled = False
+_exporter: Optional["BatchingTraceExporter"] = None
+
+
+def keep_trace(trace_info, rate: float = TRACE_SAMPLE_RATE) -> Optional[str]:
+    """Sampling decision for a finished trace: the reason to keep it, or None"""
+    state = str(getattr(getattr(trace_info, "state", None), "value", getattr(trace_info, "state", "")))
+    if TRACE_KEEP_ERRORS and state.upper() == "ERROR":
+        return "error"
+    duration_ms = getattr(trace_info, "execution_duration", None) or 0
+    if TRACE_SLOW_THRESHOLD > 0 and duration_ms >= TRACE_SLOW_THRESHOLD * 1000:
+        return "slow"
+    if rate >= 1.0 or random.random() < rate:
+        return "sampled"
+    return None
+
+
+class BatchingTraceExporter:
+    """
+    OpenTelemetry SpanExporter in front of MLflow's exporter: sampled, whole
+    traces through a bounded queue to one background writer thread.
+    """
+
+    def __init__(self, inner, queue_size: int = TRACE_QUEUE_SIZE, batch_size: int = TRACE_BATCH_SIZE,
+                 flush_interval: float = TRACE_FLUSH_INTERVAL):
+        self.inner = inner   # mlflow MlflowV3SpanExporter (does the actual writes)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+        self.kept: dict = {"error": 0, "slow": 0, "sampled": 0}
+        self.sampled_out = 0
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self.batches = 0
+        self._export_time_total = 0.0
+
+        self._thread = threading.Thread(target=self._worker, name="trace-export", daemon=True)
+        self._thread.start()
+
+    # Called by MLflow's span processor when a span ends (on the crew's thread)
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        from mlflow.tracing.trace_manager import InMemoryTraceManager
+
+        manager = InMemoryTraceManager.get_instance()
+        for span in spans:
+            if span.parent is not None:
+                continue  # exported with its trace when the root span ends
+            manager_trace = manager.pop_trace(span.context.trace_id)
+            if manager_trace is None:
+                continue
+            reason = keep_trace(manager_trace.trace.info)
+            with self._lock:
+                if reason is None:
+                    self.sampled_out += 1
+                    continue
+                self.kept[reason] += 1
+            try:
+                self._queue.put_nowait(manager_trace)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+        return SpanExportResult.SUCCESS
+
+    def _write(self, manager_trace):
+        trace = manager_trace.trace
+        # Same writes as MLflow's synchronous path, all spans of the trace at once
+        incremental = getattr(self.inner, "_should_export_spans_incrementally", False)
+        if incremental and trace.info.experiment_id:
+            self.inner._log_spans(trace.info.experiment_id, list(trace.data.spans))
+        self.inner._log_trace(trace, prompts=manager_trace.prompts)
+
+    def _worker(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = time.perf_counter()
+            exported = failed = 0
+            for manager_trace in batch:
+                try:
+                    self._write(manager_trace)
+                    exported += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Trace export failed: {e}")
+                finally:
+                    self._queue.task_done()
+            with self._lock:
+                self.exported += exported
+                self.failed += failed
+                self.batches += 1
+                self._export_time_total += time.perf_counter() - start
+
+    def shutdown(self, timeout: float = _SHUTDOWN_TIMEOUT):
+        """Flush what is queued (bounded by timeout), then stop the writer"""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        if self._queue.unfinished_tasks:
+            print(f"Trace export: {self._queue.unfinished_tasks} traces not flushed at shutdown")
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        deadline = time.time() + timeout_millis / 1000
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+        return not self._queue.unfinished_tasks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "kept": dict(self.kept),
+                "sampled_out": self.sampled_out,
+                "dropped": self.dropped,
+                "exported": self.exported,
+                "failed": self.failed,
+                "batches": self.batches,
+                "export_time_avg_ms": round(self._export_time_total / self.batches * 1000, 2) if self.batches else 0.0,
+            }
+
+
+def _batching_support():
+    """
+    (span processor class, otlp metrics flag) if this MLflow exposes the
+    internals the batching exporter relies on, else None
+    """
+    try:
+        import mlflow.tracing.provider as mlflow_provider
+        from mlflow.tracing.export.mlflow_v3 import MlflowV3SpanExporter
+        from mlflow.tracing.processor.mlflow_v3 import MlflowV3SpanProcessor
+        from mlflow.tracing.trace_manager import InMemoryTraceManager
+        from mlflow.tracing.utils.otlp import should_export_otlp_metrics
+    except ImportError:
+        return None
+    required = (
+        (mlflow_provider, ("_get_mlflow_span_processor", "reset")),
+        (MlflowV3SpanExporter, ("_log_spans", "_log_trace")),
+        (InMemoryTraceManager, ("get_instance", "pop_trace")),
+    )
+    if not all(hasattr(obj, name) for obj, names in required for name in names):
+        return None
+    return MlflowV3SpanProcessor, should_export_otlp_metrics()
+
+
+def setup_tracing() -> bool:
+    """
+    Enable MLflow crewAI autolog with the batching exporter (once per process).
+    Returns True if tracing is enabled.
+    """
+    global _setup_done, _enabled, _exporter
+    if not ENABLE_TRACING:
+        return False
+    with _setup_lock:
+        if _setup_done:
+            return _enabled
+        _setup_done = True
+        try:
+            import mlflow
+            import mlflow.crewai
+        except ImportError as e:
+            print(f"📊 MLflow Tracing: DISABLED (mlflow not available: {e})")
+            return False
+
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+        support = _batching_support()
+        if support is None:
+            print(f"⚠️ MLflow {mlflow.__version__}: span exporter internals not found, "
+                  "traces are exported synchronously (no batching / sampling)")
+        else:
+            import mlflow.tracing.provider as mlflow_provider
+            from mlflow.tracing.export.mlflow_v3 import MlflowV3SpanExporter
+
+            processor_class, export_metrics = support
+            exporter = BatchingTraceExporter(MlflowV3SpanExporter(tracking_uri=MLFLOW_TRACKING_URI))
+            _exporter = exporter
+            atexit.register(exporter.shutdown)
+
+            # MLflow builds its span processor lazily (first span): hand it ours
+            def batching_span_processor(tracking_uri: str):
+                return processor_class(span_exporter=exporter, export_metrics=export_metrics)
+
+            mlflow_provider._get_mlflow_span_processor = batching_span_processor
+            mlflow_provider.reset()   # in case a tracer provider was built already
+
+        mlflow.crewai.autolog()
+        mlflow.set_experiment(MLFLOW_EXPERIMENT)
+        _enabled = True
+        if _exporter is not None:
+            print(f"📊 MLflow Tracing: ENABLED [{MLFLOW_TRACKING_URI}] "
+                  f"(background export, sample rate {TRACE_SAMPLE_RATE:g}, errors"
+                  f"{' + slow runs' if TRACE_SLOW_THRESHOLD > 0 else ''} always kept)")
+        else:
+            print(f"📊 MLflow Tracing: ENABLED [{MLFLOW_TRACKING_URI}] (synchronous export)")
+        return True
+
+
+def shutdown_tracing():
+    """Flush pending traces (API lifespan shutdown)"""
+    if _exporter is not None:
+        _exporter.shutdown()
+
+
+def tracing_stats() -> dict:
+    stats = {"enabled": _enabled, "batching": _exporter is not None, "sample_rate": TRACE_SAMPLE_RATE,
+             "keep_errors": TRACE_KEEP_ERRORS, "slow_threshold_s": TRACE_SLOW_THRESHOLD}
+    if _exporter is not None:
+        stats.update(_exporter.stats())
+    return stats
@@ -1,5 +1,6 @@
 import gradio as gr
 import httpx
+import json
 import os
 import uuid
 from dotenv import load_dotenv
@@ -8,6 +9,46 @@ load_dotenv()
 
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
 
+async def _iter_sse(response):
+    """Parse a Server-Sent-Events stream into JSON payloads"""
+    data_lines = []
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+        elif not line.strip() and data_lines:
+            yield json.loads("\n".join(data_lines))
+            data_lines = []
+
+def _describe_event(event):
+    """Turn a backend event into one progress line (None = not shown)"""
+    kind = event.get("type")
+    agent = event.get("agent") or "Agent"
+    if kind == "session" and event.get("route") == "expert":
+        return f"⚡ Fast path: {event.get('expert')}"
+    if kind == "session" and event.get("route") == "planning":
+        return "🔀 Planning mode: transport, local and news experts research in parallel"
+    if kind == "fan_out":
+        return f"⏱️ Parallel research: {event.get('research_wall_s')}s instead of {event.get('research_sequential_s')}s ({event.get('speedup')}x)"
+    if kind == "task_finished" and event.get("duration_s") is not None:
+        return f"📋 {agent} done ({event['duration_s']:.1f}s)"
+    if kind == "coalesced":
+        return "🔗 Joined an identical request already in progress"
+    if kind == "delegation":
+        return f"🧭 {agent} → {event.get('coworker') or 'expert'}"
+    if kind == "agent_started":
+        return f"🧑‍💼 {agent} is working..."
+    if kind == "tool_started":
+        return f"🔧 {agent}: {event.get('tool')}"
+    if kind == "tool_finished":
+        duration = event.get("duration_s")
+        line = f"✅ {event.get('tool')}" + (f" ({duration:.1f}s)" if duration is not None else "")
+        if event.get("tokens_before"):
+            line += f" · {event['tokens_before']} → {event['tokens_after']} tokens"
+        return line
+    if kind == "tool_error":
+        return f"⚠️ {event.get('tool')} failed"
+    return None
+
 async def chat_function(message, history, session_id):
     if not message:
         yield "", history
@@ -16,13 +57,40 @@ async def chat_function(message, history, session_id):
     history.append({"role": "user", "content": message})
     yield "", history
 
+    # Live progress box (collapsible), filled as the crew works
+    steps = []
+    draft = ""
+    status = {"role": "assistant", "content": "Thinking...", "metadata": {"title": "🧭 Planning your trip", "status": "pending"}}
+    history.append(status)
+    yield "", history
+
+    bot_response_text = None
     try:
         async with httpx.AsyncClient(timeout=150.0) as client:
             payload = {"message": message, "session_id": session_id}
-            response = await client.post(f"{API_URL}/chat", json=payload)
-            response.raise_for_status()
-            result = response.json()
-            bot_response_text = result.get("response", "Error: Empty response")
+            async with client.stream("POST", f"{API_URL}/chat/stream", json=payload) as response:
+                if response.status_code == 503:
+                    retry_after = response.headers.get("Retry-After", "a few")
+                    bot_response_text = f"Server is busy, please retry in {retry_after} seconds."
+                else:
+                    response.raise_for_status()
+                    async for event in _iter_sse(response):
+                        kind = event.get("type")
+                        if kind == "done":
+                            bot_response_text = event.get("response", "Error: Empty response")
+                            break
+                        if kind == "error":
+                            bot_response_text = f"Error: {event.get('detail', 'Unknown error')}"
+                            break
+                        if kind == "token":
+                            draft += event.get("text", "")
+                        else:
+                            line = _describe_event(event)
+                            if not line:
+                                continue
+                            steps.append(line)
+                        status["content"] = "\n".join(steps) + (f"\n\n✍️ ...{draft[-300:]}" if draft else "")
+                        yield "", history
     except httpx.ConnectError:
         bot_response_text = "Error: Could not connect to backend"
     except httpx.TimeoutException:
@@ -30,6 +98,11 @@ async def chat_function(message, history, session_id):
     except Exception as e:
         bot_response_text = f"Error: {str(e)}"
 
+    if bot_response_text is None:
+        bot_response_text = "Error: Stream ended without a response"
+
+    status["metadata"] = {"title": f"🧭 Done ({len(steps)} steps)", "status": "done"}
+    status["content"] = "\n".join(steps) or "Answered directly."
     history.append({"role": "assistant", "content": bot_response_text})
     yield "", history
 
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark: per-request crew construction cost
+
+Compares:
+- before: Carribulus().crew()  (re-parse YAML, rebuild manager + 4 agents every request)
+- after:  build_crew()         (copy of the process-wide blueprint)
+
+No LLM/API calls are made, only construction is timed.
+Measured with crewai 1.2.1, 50 iterations: before 19.4 ms, after 8.2 ms (2.4x).
+
+Running command:
+    python tests/bench_crew_construction.py
+
+Optional:
+- Number of iterations (default 50)
+    python tests/bench_crew_construction.py 200
+"""
+
+import sys
+import time
+import statistics
+import warnings
+
+warnings.filterwarnings("ignore")
+
+
+def _measure(build, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list):
+    ordered = sorted(timings)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"  {label:32} mean {statistics.mean(timings):8.2f} ms | "
+          f"p50 {statistics.median(timings):8.2f} ms | p95 {p95:8.2f} ms")
+
+
+def bench_crew_construction(iterations: int = 50):
+    """Time per-request crew construction, before vs after the blueprint cache"""
+    from carribulus.crew import Carribulus, crew_blueprint, build_crew
+
+    print("=" * 60)
+    print("⏱️  Crew construction benchmark")
+    print("=" * 60)
+
+    # One-time cost (first request after process start)
+    start = time.perf_counter()
+    crew_blueprint()
+    print(f"\n  Blueprint build (once per process): {(time.perf_counter() - start) * 1000:.2f} ms\n")
+
+    # Warm-up so imports/lazy init don't skew the first sample
+    Carribulus().crew()
+    build_crew()
+
+    before = _measure(lambda: Carribulus().crew(), iterations)
+    after = _measure(build_crew, iterations)
+
+    print(f"📋 Per-request cost ({iterations} iterations):")
+    print("-" * 40)
+    _report("before: Carribulus().crew()", before)
+    _report("after:  build_crew()", after)
+
+    speedup = statistics.mean(before) / max(statistics.mean(after), 1e-9)
+    print(f"\n  Speedup: {speedup:.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    bench_crew_construction(n)
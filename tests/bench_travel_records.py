@@ -0,0 +1,183 @@
+"""
+Micro-benchmark: compact flight/hotel records vs raw SerpAPI JSON
+
+Compares, on large synthetic Google Flights / Google Hotels responses:
+- memory kept alive: the decoded JSON dict vs the parsed records
+- parse time: json.loads alone vs json.loads + records
+- ranking time: cheapest flight / best-rated hotel from dicts vs records
+
+No API calls are made, the responses are generated with the same shape
+(and the same bulky extra fields) as real SerpAPI payloads.
+
+Running command:
+    python tests/bench_travel_records.py
+
+Optional:
+- Number of flight options / hotel properties per response (default 2000)
+    python tests/bench_travel_records.py 5000
+"""
+
+import gc
+import sys
+import json
+import time
+import random
+import statistics
+import tracemalloc
+import importlib.util
+from pathlib import Path
+
+
+def _flight(i: int) -> dict:
+    legs = []
+    for leg in range(random.randint(1, 3)):
+        legs.append({
+            "departure_airport": {"name": "Kuala Lumpur International Airport", "id": "KUL", "time": "2026-11-02 08:00"},
+            "arrival_airport": {"name": "Narita International Airport", "id": "NRT", "time": "2026-11-02 16:00"},
+            "duration": random.randint(60, 480),
+            "airplane": "Airbus A330",
+            "airline": random.choice(["AirAsia X", "Malaysia Airlines", "Japan Airlines", "ANA"]),
+            "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/D7.png",
+            "travel_class": "Economy",
+            "flight_number": f"D7 {500 + leg}",
+            "legroom": "29 in",
+            "extensions": ["Below average legroom (29 in)", "In-seat power & USB outlets", "Carbon emissions estimate: 402 kg"],
+        })
+    return {
+        "flights": legs,
+        "layovers": [{"duration": 90, "name": "Hong Kong International Airport", "id": "HKG"}] * (len(legs) - 1),
+        "total_duration": sum(leg["duration"] for leg in legs),
+        "carbon_emissions": {"this_flight": 402000, "typical_for_this_route": 420000, "difference_percent": -4},
+        "price": random.randint(400, 3000),
+        "type": "One way",
+        "airline_logo": "https://www.gstatic.com/flights/airline_logos/70px/multi.png",
+        "booking_token": "WyJDalJJ" + "x" * 300 + str(i),
+    }
+
+
+def _hotel(i: int) -> dict:
+    price = random.randint(150, 1500)
+    return {
+        "type": "hotel",
+        "name": f"Hotel Sakura Shinjuku {i}",
+        "description": "Modern rooms near the station, rooftop bar and onsen-style baths. " * 3,
+        "link": f"https://www.example-hotel.com/{i}",
+        "property_token": f"ChkI{i:08d}" + "y" * 40,
+        "gps_coordinates": {"latitude": 35.69, "longitude": 139.70},
+        "check_in_time": "3:00 PM",
+        "check_out_time": "11:00 AM",
+        "rate_per_night": {"lowest": f"MYR {price:,}", "extracted_lowest": price,
+                           "before_taxes_fees": f"MYR {price - 20:,}", "extracted_before_taxes_fees": price - 20},
+        "total_rate": {"lowest": f"MYR {price * 3:,}", "extracted_lowest": price * 3},
+        "prices": [{"source": s, "logo": "https://www.gstatic.com/travel-hotels/branding/x.png",
+                    "rate_per_night": {"lowest": f"MYR {price:,}", "extracted_lowest": price}}
+                   for s in ("Booking.com", "Agoda", "Expedia", "Trip.com")],
+        "nearby_places": [{"name": "Shinjuku Station", "transportations": [{"type": "Walking", "duration": "5 min"}]}] * 3,
+        "hotel_class": "4-star hotel",
+        "extracted_hotel_class": 4,
+        "images": [{"thumbnail": f"https://lh5.googleusercontent.com/p/{i}-{n}", "original_image": f"https://example.com/{i}-{n}.jpg"}
+                   for n in range(8)],
+        "overall_rating": round(random.uniform(3.0, 5.0), 1),
+        "reviews": random.randint(10, 20000),
+        "ratings": [{"stars": s, "count": random.randint(0, 5000)} for s in range(5, 0, -1)],
+        "location_rating": 4.8,
+        "reviews_breakdown": [{"name": n, "description": n, "total_mentioned": 100, "positive": 80, "negative": 20, "neutral": 0}
+                              for n in ("Location", "Service", "Property", "Room")],
+        "amenities": ["Free Wi-Fi", "Air conditioning", "Restaurant", "Bar", "Room service", "Fitness centre",
+                      "Laundry service", "Accessible", "Spa", "Airport shuttle"],
+    }
+
+
+def _measure(fn, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _retained(build) -> tuple:
+    """(bytes kept alive by build()'s result, result)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def _report(label: str, timings: list):
+    print(f"  {label:34} mean {statistics.mean(timings):8.2f} ms | p50 {statistics.median(timings):8.2f} ms")
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:7.2f} MB"
+
+
+def bench_travel_records(n: int = 2000, iterations: int = 10):
+    """Memory, parse and ranking cost of raw SerpAPI dicts vs compact records"""
+    # Loaded by path: carribulus.tools/__init__ imports every tool (needs crewai)
+    path = Path(__file__).resolve().parents[1] / "src" / "carribulus" / "tools" / "travel_records.py"
+    spec = importlib.util.spec_from_file_location("travel_records", path)
+    travel_records = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(travel_records)
+    FlightResults, parse_hotels = travel_records.FlightResults, travel_records.parse_hotels
+
+    random.seed(42)
+    flights_raw = json.dumps({"best_flights": [_flight(i) for i in range(5)],
+                              "other_flights": [_flight(i) for i in range(5, n)],
+                              "price_insights": {"lowest_price": 400, "typical_price_range": [500, 1200], "price_level": "low"}})
+    hotels_raw = json.dumps({"properties": [_hotel(i) for i in range(n)]})
+
+    print("=" * 66)
+    print("⏱️  Travel records benchmark")
+    print("=" * 66)
+    print(f"  Response size: flights {len(flights_raw) / 1024:,.0f} KB | hotels {len(hotels_raw) / 1024:,.0f} KB ({n} items each)\n")
+
+    # Memory kept alive while results are ranked/formatted
+    print("🧠 Memory kept alive:")
+    print("-" * 40)
+    for label, raw, parse in (("flights", flights_raw, FlightResults.from_serpapi), ("hotels", hotels_raw, parse_hotels)):
+        dict_size, data = _retained(lambda: json.loads(raw))
+        records_size, records = _retained(lambda: parse(json.loads(raw)))
+        print(f"  {label:8} raw dict {_mb(dict_size)} | records {_mb(records_size)} | "
+              f"{dict_size / max(records_size, 1):5.1f}x smaller")
+        del data, records
+
+    # Parse time
+    print(f"\n📋 Parse time ({iterations} iterations):")
+    print("-" * 40)
+    _report("flights: json.loads", _measure(lambda: json.loads(flights_raw), iterations))
+    _report("flights: json.loads + records", _measure(lambda: FlightResults.from_serpapi(json.loads(flights_raw)), iterations))
+    _report("hotels:  json.loads", _measure(lambda: json.loads(hotels_raw), iterations))
+    _report("hotels:  json.loads + records", _measure(lambda: parse_hotels(json.loads(hotels_raw)), iterations))
+
+    # Ranking from already-parsed data
+    flights_dict = json.loads(flights_raw)
+    hotels_dict = json.loads(hotels_raw)
+    flight_records = FlightResults.from_serpapi(flights_dict)
+    hotel_records = parse_hotels(hotels_dict)
+
+    def cheapest_from_dict():
+        options = flights_dict["best_flights"] + flights_dict["other_flights"]
+        return min((f for f in options if isinstance(f.get("price"), (int, float))), key=lambda f: f["price"])
+
+    def best_hotel_from_dict():
+        return sorted(hotels_dict["properties"],
+                      key=lambda h: (-(h.get("overall_rating") or 0), (h.get("rate_per_night") or {}).get("extracted_lowest", 0)))
+
+    print(f"\n🏆 Ranking ({iterations * 10} iterations):")
+    print("-" * 40)
+    _report("cheapest flight: dicts", _measure(cheapest_from_dict, iterations * 10))
+    _report("cheapest flight: records", _measure(flight_records.cheapest, iterations * 10))
+    _report("hotel ranking:   dicts", _measure(best_hotel_from_dict, iterations * 10))
+    _report("hotel ranking:   records", _measure(
+        lambda: sorted(hotel_records, key=lambda h: (-(h.rating or 0), h.price or 0)), iterations * 10))
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bench_travel_records(size)
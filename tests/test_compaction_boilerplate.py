@@ -0,0 +1,73 @@
+"""
+Check compaction's boilerplate filter on news / places snippets
+
+Only lines (or sentences) made up entirely of site chrome are dropped: real
+content that merely contains a boilerplate word ("cookie festival", "blog in")
+must survive.
+
+Running command:
+    python tests/test_compaction_boilerplate.py
+"""
+
+import importlib.util
+from pathlib import Path
+
+# Loaded by path: carribulus.tools/__init__ imports every tool (needs crewai)
+_PATH = Path(__file__).resolve().parents[1] / "src" / "carribulus" / "tools" / "compaction.py"
+_spec = importlib.util.spec_from_file_location("compaction", _PATH)
+compaction = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(compaction)
+
+CONTENT = [
+    "The famous cookie festival returns with 200 bakers.",
+    "Read the blog in Penang for hidden hawker stalls.",
+    "Browse the catalog in store before 9pm.",
+    "Sign up fees for the marathon are RM 80 this year.",
+    "Copyright dispute halts Kuala Lumpur film festival",
+    "Subscribers of the airline's loyalty program get free lounge access.",
+    "Follow the river path to reach the temple at sunrise.",
+    "Nasi Kandar Line Clear - 4.3 ★ (12,000 reviews) - Jalan Penang, open 24 hours",
+]
+
+BOILERPLATE = [
+    "Accept all cookies",
+    "Privacy Policy | Terms of Use | Cookie Settings",
+    "© 2025 The Star Media Group. All rights reserved.",
+    "Subscribe to our newsletter",
+    "Sign in",
+    "Advertisement",
+    "Share this article",
+    "Follow us on Facebook",
+    "Skip to main content",
+    "We use cookies to improve your experience.",
+]
+
+
+def test_content_kept():
+    for line in CONTENT:
+        assert not compaction._is_boilerplate(line), line
+
+
+def test_boilerplate_dropped():
+    for line in BOILERPLATE:
+        assert compaction._is_boilerplate(line), line
+
+
+def test_drop_boilerplate_lines():
+    lines = ["Sign in", CONTENT[0], "Privacy Policy | Terms of Use", CONTENT[1]]
+    assert compaction._drop_boilerplate(lines) == [CONTENT[0], CONTENT[1]]
+
+
+def test_clean_paragraphs():
+    para = ("George Town is famous for street food. We use cookies to improve your experience. "
+            "The famous cookie festival returns with 200 bakers. Accept all cookies.")
+    assert compaction._clean_paragraphs([para]) == [
+        "George Town is famous for street food. The famous cookie festival returns with 200 bakers."]
+
+
+if __name__ == "__main__":
+    test_content_kept()
+    test_boilerplate_dropped()
+    test_drop_boilerplate_lines()
+    test_clean_paragraphs()
+    print("✅ compaction boilerplate checks passed")